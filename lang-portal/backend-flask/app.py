@@ -1,15 +1,26 @@
 import os
-from flask import Flask, g
+import time
+from flask import Flask, g, jsonify, request
 from flask_cors import CORS
 
 from lib.db import Db
+from lib.cache import ResponseCache
+from lib.serialization import JSONProvider
+from lib.metrics import Metrics, SLOW_QUERY_SECONDS, finish_request, parameter_shape, start_request
+from lib.publisher import KEEPALIVE_SECONDS, Publisher
+from lib.reviews import ReviewWriter
+from lib.shards import LearnerShards, MAX_OPEN_SHARDS, learner_id
 
 # Import route loading functions
 from routes.words import load as load_words
 from routes.groups import load as load_groups
 from routes.study_sessions import load as load_study_sessions
-from routes.dashboard import load as load_dashboard
+from routes.dashboard import load as load_dashboard, dashboard_state
 from routes.study_activities import load as load_study_activities
+from routes.cache import load as load_cache
+from routes.roots import load as load_roots
+from routes.metrics import load as load_metrics
+from routes.reset import load as load_reset
 
 def get_allowed_origins(app):
     try:
@@ -32,9 +43,18 @@ def get_allowed_origins(app):
 
 def create_app(test_config=None):
     app = Flask(__name__, instance_relative_config=True)
+    app.json = JSONProvider(app)
     app.config.from_mapping(
         SECRET_KEY='dev',
-        DATABASE=os.path.join(app.instance_path, 'words.db'),
+        DATABASE='words.db',  # the file `invoke init-db` builds
+        TEMPLATE_DATABASE=None,  # what /api/full_reset restores; None builds the seeded template
+        DB_POOL_SIZE=8,
+        RESPONSE_CACHE_MAX_BYTES=16 * 1024 * 1024,  # 0 disables the response cache
+        LEARNER_DB_DIR=None,  # a directory here gives each learner their own database
+        LEARNER_DB_MAX_OPEN=MAX_OPEN_SHARDS,
+        METRICS_ENABLED=True,  # request and SQL metrics at /metrics
+        SLOW_QUERY_SECONDS=SLOW_QUERY_SECONDS,  # log statements slower than this
+        DASHBOARD_KEEPALIVE_SECONDS=KEEPALIVE_SECONDS,  # idle time between SSE keepalive comments
     )
 
     if test_config is None:
@@ -49,7 +69,50 @@ def create_app(test_config=None):
 
     CORS(app, resources={r"/*": {"origins": app.config.get('CORS_ORIGINS', get_allowed_origins(app))}})
 
-    app.db = Db()
+    app.metrics = Metrics()
+    if app.config['METRICS_ENABLED']:
+        @app.before_request
+        def start_request_metrics():
+            g.request_started = time.perf_counter()
+            start_request(app.config['SLOW_QUERY_SECONDS'])
+
+        @app.after_request
+        def record_request_metrics(response):
+            stats = finish_request()
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            app.metrics.observe(request.method, route, response.status_code,
+                                time.perf_counter() - g.request_started, stats)
+            for seconds, sql, parameters, many in (stats.slow if stats else ()):
+                app.logger.warning(
+                    f"Slow query ({seconds * 1000:.1f} ms) in {request.method} {route}: "
+                    f"{' '.join(sql.split())} params={parameter_shape(parameters, many)}"
+                )
+            return response
+
+        @app.teardown_request
+        def clear_request_metrics(exception):
+            finish_request()
+
+    app.db = Db(app.config['DATABASE'], pool_size=app.config['DB_POOL_SIZE'])
+    if app.config['LEARNER_DB_DIR']:
+        app.db.shards = LearnerShards(
+            app.config['DATABASE'], app.config['LEARNER_DB_DIR'],
+            capacity=app.config['LEARNER_DB_MAX_OPEN']
+        )
+
+        @app.before_request
+        def check_learner_id():
+            try:
+                learner_id(request)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+    app.review_writer = ReviewWriter(app.db)
+    # Live dashboard state, computed once per write for every open stream
+    app.dashboard_publisher = Publisher(
+        lambda learner: app.db if learner is None else app.db.shards.get(learner),
+        dashboard_state
+    )
+    app.response_cache = ResponseCache(app.db, max_bytes=app.config['RESPONSE_CACHE_MAX_BYTES'])
 
     @app.teardown_appcontext
     def close_db(exception):
@@ -61,5 +124,9 @@ def create_app(test_config=None):
     load_study_sessions(app)
     load_dashboard(app)
     load_study_activities(app)
+    load_cache(app)
+    load_roots(app)
+    load_metrics(app)
+    load_reset(app)
 
     return app
\ No newline at end of file
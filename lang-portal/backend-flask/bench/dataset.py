@@ -0,0 +1,126 @@
+"""Build a synthetic lang-portal database at a chosen scale.
+
+    python -m bench.dataset bench.db --words 100000 --groups 500 --reviews 5000000
+"""
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from lib.db import Db
+from lib.importer import import_words
+from lib.template import create_schema
+
+ARABIC_LETTERS = 'ابتثجحخدذرزسشصضطظعغفقكلمنهوي'
+TRANSLITERATIONS = dict(zip(ARABIC_LETTERS, (
+  'a', 'b', 't', 'th', 'j', 'H', 'kh', 'd', 'dh', 'r', 'z', 's', 'sh', 'S',
+  'D', 'T', 'Z', "'", 'gh', 'f', 'q', 'k', 'l', 'm', 'n', 'h', 'w', 'y')))
+ROOTS = 2000               # distinct roots, so root lookups return families
+ACTIVITIES = ('Flashcards', 'Typing Tutor', 'Multiple Choice', 'Listening')
+REVIEWS_PER_SESSION = 20
+DAYS = 365                 # sessions are spread over the past year
+BATCH_SIZE = 10000
+
+def word_record(i):
+  """The i-th synthetic word; the same i always gives the same word."""
+  rng = random.Random(i)
+  root = random.Random(i % ROOTS).sample(ARABIC_LETTERS, 3)
+  letters = root + rng.sample(ARABIC_LETTERS, rng.randint(0, 3))
+  return {
+    'english': f'{rng.choice(("to", "the", "a"))} {"".join(rng.sample("abcdefghijklmnopqrstuvwxyz", 6))} {i}',
+    'arabic': ''.join(letters),
+    'root': ' '.join(root),
+    'transliteration': ''.join(TRANSLITERATIONS[letter] for letter in letters),
+    'parts': [{'letter': letter, 'transliteration': TRANSLITERATIONS[letter]} for letter in letters],
+  }
+
+def build(path, words=100000, groups=500, reviews=5000000, sessions=None, extra_memberships=0.2, seed=0, log=print):
+  """Create the schema in `path` and fill it with synthetic data.
+
+  Every word is in one group, and `extra_memberships` of them in a second
+  one. Sessions default to one per REVIEWS_PER_SESSION reviews. Rows go
+  in through the same triggers as live traffic, so the rollups match.
+  """
+  rng = random.Random(seed)
+  sessions = sessions or max(1, reviews // REVIEWS_PER_SESSION)
+  db = Db(path)
+  try:
+    with db.write() as connection:
+      # A throwaway database: trade durability for load speed
+      connection.execute('PRAGMA synchronous = OFF')
+      connection.execute('PRAGMA cache_size = -262144')  # 256MB
+      create_schema(connection)
+      connection.executemany('INSERT INTO study_activities (name, url, preview_url) VALUES (?, ?, ?)', [
+        (name, f'http://localhost:8081/{name.lower().replace(" ", "-")}', None) for name in ACTIVITIES
+      ])
+
+    start = time.perf_counter()
+    members = [[] for _ in range(groups)]
+    for i in range(words):
+      members[i % groups].append(i)
+      if rng.random() < extra_memberships:
+        members[rng.randrange(groups)].append(i)
+    with db.write() as connection:
+      for group, word_numbers in enumerate(members):
+        import_words(connection, (word_record(i) for i in word_numbers), f'Group {group + 1}', batch_size=BATCH_SIZE)
+    log(f'{words} words in {groups} groups in {time.perf_counter() - start:.1f}s')
+
+    start = time.perf_counter()
+    with db.write() as connection:
+      connection.execute('BEGIN IMMEDIATE')
+      word_ids = [row[0] for row in connection.execute('SELECT id FROM words')]
+      group_ids = [row[0] for row in connection.execute('SELECT id FROM groups')]
+      activity_ids = [row[0] for row in connection.execute('SELECT id FROM study_activities')]
+      first_day = datetime.now() - timedelta(days=DAYS)
+      times = sorted(first_day + timedelta(seconds=rng.randrange(DAYS * 86400)) for _ in range(sessions))
+      for offset in range(0, sessions, BATCH_SIZE):
+        connection.executemany('''
+          INSERT INTO study_sessions (word_id, group_id, activity_id, correct, timestamp) VALUES (?, ?, ?, ?, ?)
+        ''', [
+          (rng.choice(word_ids), rng.choice(group_ids), rng.choice(activity_ids), 1, at.strftime('%Y-%m-%d %H:%M:%S'))
+          for at in times[offset:offset + BATCH_SIZE]
+        ])
+      session_rows = connection.execute('SELECT id, timestamp FROM study_sessions').fetchall()
+
+      batch = []
+      for n in range(reviews):
+        session_id, timestamp = session_rows[n * len(session_rows) // reviews]
+        batch.append((rng.choice(word_ids), session_id, rng.random() < 0.8, timestamp))
+        if len(batch) >= BATCH_SIZE:
+          connection.executemany('''
+            INSERT INTO word_review_items (word_id, study_session_id, correct, created_at) VALUES (?, ?, ?, ?)
+          ''', batch)
+          batch = []
+      if batch:
+        connection.executemany('''
+          INSERT INTO word_review_items (word_id, study_session_id, correct, created_at) VALUES (?, ?, ?, ?)
+        ''', batch)
+
+      connection.execute('''
+        INSERT INTO word_reviews (word_id, correct_count, wrong_count, last_reviewed)
+        SELECT word_id, SUM(correct != 0), SUM(correct = 0), MAX(created_at)
+        FROM word_review_items
+        GROUP BY word_id
+      ''')
+      connection.execute('ANALYZE')
+    log(f'{sessions} sessions and {reviews} reviews in {time.perf_counter() - start:.1f}s')
+  finally:
+    db.dispose()
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument('path', help='database file to create (must not exist)')
+  parser.add_argument('--words', type=int, default=100000)
+  parser.add_argument('--groups', type=int, default=500)
+  parser.add_argument('--reviews', type=int, default=5000000)
+  parser.add_argument('--sessions', type=int, help=f'default: one per {REVIEWS_PER_SESSION} reviews')
+  parser.add_argument('--seed', type=int, default=0)
+  args = parser.parse_args()
+
+  if os.path.exists(args.path):
+    parser.error(f'{args.path} already exists')
+  build(args.path, words=args.words, groups=args.groups, reviews=args.reviews, sessions=args.sessions, seed=args.seed)
+
+if __name__ == '__main__':
+  main()
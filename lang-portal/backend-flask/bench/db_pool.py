@@ -0,0 +1,93 @@
+"""Compare requests/sec of per-request connections against the pooled Db.
+
+    python -m bench.db_pool --threads 8 --requests 2000
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from flask import g
+
+from app import create_app
+from lib.db import Db
+
+ENDPOINTS = [
+  '/api/words',
+  '/api/words/1',
+  '/groups',
+  '/groups/1',
+  '/groups/1/words',
+  '/study-activities',
+]
+
+class LegacyDb(Db):
+  """The connection handling Db had before pooling: connect on every request."""
+  def get(self):
+    if 'db' not in g:
+      g.db = sqlite3.connect(self.database)
+      g.db.row_factory = sqlite3.Row
+    return g.db
+
+  def close(self):
+    db = g.pop('db', None)
+    if db is not None:
+      db.close()
+
+def build_database(path):
+  Db(path).init()
+
+def run(app, threads, requests):
+  per_thread = requests // threads
+
+  def worker():
+    client = app.test_client()
+    for i in range(per_thread):
+      response = client.get(ENDPOINTS[i % len(ENDPOINTS)])
+      assert response.status_code == 200, response.status_code
+
+  workers = [threading.Thread(target=worker) for _ in range(threads)]
+  start = time.perf_counter()
+  for worker_thread in workers:
+    worker_thread.start()
+  for worker_thread in workers:
+    worker_thread.join()
+  return per_thread * threads / (time.perf_counter() - start)
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument('--threads', type=int, default=8)
+  parser.add_argument('--requests', type=int, default=2000)
+  args = parser.parse_args()
+
+  workdir = tempfile.mkdtemp()
+  try:
+    pooled_path = os.path.join(workdir, 'pooled.db')
+    legacy_path = os.path.join(workdir, 'legacy.db')
+    build_database(pooled_path)
+    connection = sqlite3.connect(pooled_path)
+    connection.execute('VACUUM INTO ?', (legacy_path,))
+    connection.close()
+    # The legacy setup ran with the default rollback journal
+    sqlite3.connect(legacy_path).execute('PRAGMA journal_mode = DELETE').connection.close()
+
+    config = {'TESTING': True, 'CORS_ORIGINS': ['*']}
+    legacy = create_app({**config, 'DATABASE': legacy_path})
+    legacy.db = LegacyDb(legacy_path)
+    pooled = create_app({**config, 'DATABASE': pooled_path})
+
+    results = {}
+    for name, app in (('per-request connect', legacy), ('pooled + WAL', pooled)):
+      run(app, args.threads, len(ENDPOINTS) * args.threads)  # warm up
+      results[name] = run(app, args.threads, args.requests)
+      print(f'{name:<20} {results[name]:8.0f} req/s')
+    pooled.db.dispose()
+    print(f'speedup              {results["pooled + WAL"] / results["per-request connect"]:8.2f}x')
+  finally:
+    shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,113 @@
+"""Import synthetic words with the streaming importer and the old per-row loop.
+
+    python -m bench.import_words --words 100000
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from lib.db import Db
+from lib.importer import read_records, import_words
+from lib.migrations import migrate
+
+LETTERS = 'ابتثجحخدذرزسشصضطظعغفقكلمنهوي'
+HARAKAT = 'َُِْ'
+SYLLABLES = ['ka', 'ta', 'ba', 'sa', 'la', 'ma', 'na', 'ra', 'da', 'fa', 'qa', 'ha']
+
+def synthetic_word(rng, i):
+  letters = [rng.choice(LETTERS) for _ in range(rng.randint(3, 6))]
+  parts = [{'letter': letter + rng.choice(HARAKAT), 'transliteration': rng.choice(SYLLABLES)} for letter in letters]
+  return {
+    'english': f'synthetic word {i}',
+    'arabic': ''.join(part['letter'] for part in parts),
+    'root': ' '.join(letters[:3]),
+    'transliteration': ''.join(part['transliteration'] for part in parts),
+    'parts': parts
+  }
+
+def write_words(path, count, seed=1):
+  rng = random.Random(seed)
+  with open(path, 'w', encoding='utf-8') as file:
+    file.write('{"words": [\n')
+    for i in range(count):
+      file.write((',\n' if i else '') + json.dumps(synthetic_word(rng, i), ensure_ascii=False))
+    file.write('\n]}\n')
+
+def empty_database(path):
+  # setup + migrations, without the seed groups
+  db = Db(path)
+  with db.write() as connection:
+    for sql_file in sorted(os.listdir('sql/setup')):
+      if sql_file.startswith('create_table_'):
+        connection.executescript(db.sql(f'setup/{sql_file}'))
+  with db.write() as connection:
+    migrate(connection, log=lambda message: None)
+  return db
+
+def legacy_import(connection, path, group_name):
+  # What Db.import_word_json did before: load everything, one INSERT per row
+  connection.execute('INSERT INTO groups (name) VALUES (?)', (group_name,))
+  group_id = connection.execute('SELECT id FROM groups WHERE name = ?', (group_name,)).fetchone()[0]
+  with open(path, 'r', encoding='utf-8') as file:
+    words = json.load(file)['words']
+  for word in words:
+    cursor = connection.execute('''
+      INSERT INTO words (english, arabic, root, transliteration, parts, parts_of_speech)
+      VALUES (?, ?, ?, ?, ?, ?)
+    ''', (word['english'], word['arabic'], word['root'], word['transliteration'], json.dumps(word['parts']), ''))
+    connection.execute('INSERT INTO word_groups (word_id, group_id) VALUES (?, ?)', (cursor.lastrowid, group_id))
+  connection.commit()
+  connection.execute('''
+    UPDATE groups SET words_count = (SELECT COUNT(*) FROM word_groups WHERE group_id = ?) WHERE id = ?
+  ''', (group_id, group_id))
+  connection.commit()
+
+def measure(name, count, function, trace_memory=False):
+  # tracemalloc slows Python code down several times, so it is opt-in
+  if trace_memory:
+    tracemalloc.start()
+  start = time.perf_counter()
+  function()
+  elapsed = time.perf_counter() - start
+  line = f'{name:<12} {elapsed:7.2f}s {count / elapsed:10.0f} words/s'
+  if trace_memory:
+    line += f'   peak {tracemalloc.get_traced_memory()[1] / 2**20:7.1f} MB'
+    tracemalloc.stop()
+  print(line)
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument('--words', type=int, default=100000)
+  parser.add_argument('--batch-size', type=int, default=1000)
+  parser.add_argument('--trace-memory', action='store_true', help='also report peak Python memory')
+  args = parser.parse_args()
+
+  workdir = tempfile.mkdtemp()
+  try:
+    source = os.path.join(workdir, 'words.json')
+    write_words(source, args.words)
+    print(f'{args.words} synthetic words, {os.path.getsize(source) / 2**20:.1f} MB of JSON')
+
+    legacy = empty_database(os.path.join(workdir, 'legacy.db'))
+    with legacy.write() as connection:
+      measure('per-row', args.words, lambda: legacy_import(connection, source, 'Synthetic'), args.trace_memory)
+    legacy.dispose()
+
+    streaming = empty_database(os.path.join(workdir, 'streaming.db'))
+    with streaming.write() as connection:
+      measure('streaming', args.words, lambda: import_words(
+        connection, read_records(source, words_key='words'), 'Synthetic', batch_size=args.batch_size), args.trace_memory)
+      # A second pass exercises the upsert path
+      measure('re-import', args.words, lambda: import_words(
+        connection, read_records(source, words_key='words'), 'Synthetic', batch_size=args.batch_size), args.trace_memory)
+    streaming.dispose()
+  finally:
+    shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+  main()
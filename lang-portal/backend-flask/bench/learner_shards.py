@@ -0,0 +1,80 @@
+"""Compare review ingestion for many learners in one shared database against
+a database per learner.
+
+    python -m bench.learner_shards --learners 8 --requests 2000 --batch 50
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+from app import create_app
+from bench.review_ingest import build_database
+from lib.shards import LEARNER_HEADER
+
+def run(app, learners, requests, batch, word_ids, sessions):
+  per_learner = requests // learners
+
+  def worker(learner):
+    client = app.test_client()
+    headers = {LEARNER_HEADER: learner} if app.db.shards else {}
+    for _ in range(per_learner):
+      reviews = [
+        {'word_id': random.choice(word_ids), 'correct': random.random() < 0.8}
+        for _ in range(batch)
+      ]
+      response = client.post(f'/study-sessions/{sessions[learner]}/reviews', json=reviews, headers=headers)
+      assert response.status_code == 201, response.get_json()
+
+  workers = [threading.Thread(target=worker, args=(learner,)) for learner in sessions]
+  start = time.perf_counter()
+  for worker_thread in workers:
+    worker_thread.start()
+  for worker_thread in workers:
+    worker_thread.join()
+  return per_learner * learners / (time.perf_counter() - start)
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument('--learners', type=int, default=8, help='one thread per learner')
+  parser.add_argument('--requests', type=int, default=2000)
+  parser.add_argument('--batch', type=int, default=50, help='reviews per request')
+  args = parser.parse_args()
+
+  workdir = tempfile.mkdtemp()
+  try:
+    config = {'TESTING': True, 'CORS_ORIGINS': ['*']}
+    learners = [f'learner{i}' for i in range(args.learners)]
+    results = {}
+    for name in ('shared database', 'database per learner'):
+      path = os.path.join(workdir, name.replace(' ', '_') + '.db')
+      word_ids = build_database(path)
+      if name == 'shared database':
+        app = create_app({**config, 'DATABASE': path})
+        # Every learner's sessions in the one database
+        with app.db.write() as connection:
+          sessions = {learner: connection.execute('''
+            INSERT INTO study_sessions (word_id, group_id, activity_id, correct) VALUES (1, 1, 1, 1)
+          ''').lastrowid for learner in learners}
+      else:
+        app = create_app({**config, 'DATABASE': path, 'LEARNER_DB_DIR': os.path.join(workdir, 'learners')})
+        sessions = {}
+        for learner in learners:
+          with app.db.shards.get(learner).write() as connection:
+            sessions[learner] = connection.execute('''
+              INSERT INTO study_sessions (word_id, group_id, activity_id, correct) VALUES (1, 1, 1, 1)
+            ''').lastrowid
+      run(app, args.learners, args.learners, args.batch, word_ids, sessions)  # warm up
+      results[name] = run(app, args.learners, args.requests, args.batch, word_ids, sessions)
+      app.review_writer.stop()
+      app.db.dispose()
+      print(f'{name:<24} {results[name]:8.0f} req/s {results[name] * args.batch:10.0f} reviews/s')
+    print(f'speedup                  {results["database per learner"] / results["shared database"]:8.2f}x')
+  finally:
+    shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+  main()
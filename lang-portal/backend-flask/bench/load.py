@@ -0,0 +1,331 @@
+"""Drive every route through a local WSGI server with concurrent clients and
+report latency percentiles and throughput per endpoint.
+
+    python -m bench.dataset bench.db --words 100000 --groups 500 --reviews 5000000
+    python -m bench.load bench.db --clients 8 --requests 2000 --output results.json
+    python -m bench.load bench.db --baseline results.json --tolerance 0.2
+
+Runs against a copy of the database, since some routes write. With
+--baseline the run fails (exit status 1) when an endpoint's p95 latency or
+throughput is more than --tolerance worse than the stored results.
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from urllib.parse import quote
+
+from werkzeug.serving import make_server
+
+from app import create_app
+from lib.membership import add_words
+
+# rule is the Flask URL rule the scenario exercises; request(rng, sample)
+# returns the path (with query string) and the JSON body, if any
+Scenario = namedtuple('Scenario', 'name method rule request')
+
+def typo(rng, text):
+  """text with one character dropped, doubled or swapped with the next."""
+  i = rng.randrange(len(text))
+  edit = rng.choice(('drop', 'double', 'swap'))
+  if edit == 'drop' and len(text) > 1:
+    return text[:i] + text[i + 1:]
+  if edit == 'swap' and i < len(text) - 1:
+    return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+  return text[:i] + text[i] + text[i:]
+
+SCENARIOS = (
+  Scenario('words', 'GET', '/api/words',
+           lambda rng, s: (f'/api/words?page={rng.randint(1, 20)}&sort_by={rng.choice(("english", "correct_count"))}', None)),
+  Scenario('word details', 'GET', '/api/words',
+           lambda rng, s: (f'/api/words?ids={",".join(map(str, rng.sample(s["words"], 50)))}&include=groups,reviews', None)),
+  Scenario('word', 'GET', '/api/words/<int:word_id>',
+           lambda rng, s: (f'/api/words/{rng.choice(s["words"])}', None)),
+  Scenario('fuzzy lookup', 'GET', '/api/words/fuzzy',
+           lambda rng, s: (f'/api/words/fuzzy?q={quote(typo(rng, rng.choice(s["transliterations"])))}', None)),
+  Scenario('words by letters', 'GET', '/api/words/by_letters',
+           lambda rng, s: (f'/api/words/by_letters?include={quote(",".join(rng.sample(s["letters"], 2)))}'
+                           f'&exclude={quote(rng.choice(s["letters"]))}', None)),
+  Scenario('word search', 'GET', '/api/words/search',
+           lambda rng, s: (f'/api/words/search?q={rng.choice(s["terms"])}', None)),
+  Scenario('create word', 'POST', '/api/words',
+           lambda rng, s: ('/api/words', {'word': f'load test {rng.getrandbits(64)}', 'meaning': 'اختبار'})),
+  Scenario('groups', 'GET', '/groups',
+           lambda rng, s: (f'/groups?page={rng.randint(1, 5)}', None)),
+  Scenario('group', 'GET', '/groups/<int:id>',
+           lambda rng, s: (f'/groups/{rng.choice(s["groups"])}', None)),
+  Scenario('group words', 'GET', '/groups/<int:id>/words',
+           lambda rng, s: (f'/groups/{rng.choice(s["groups"])}/words', None)),
+  Scenario('group words raw', 'GET', '/groups/<int:id>/words/raw',
+           lambda rng, s: (f'/groups/{rng.choice(s["groups"])}/words/raw?format=ndjson', None)),
+  Scenario('group quiz', 'GET', '/api/groups/<int:id>/quiz',
+           lambda rng, s: (f'/api/groups/{rng.choice(s["groups"])}/quiz?n=20', None)),
+  Scenario('group sessions', 'GET', '/groups/<int:id>/study_sessions',
+           lambda rng, s: (f'/groups/{rng.choice(s["groups"])}/study_sessions', None)),
+  Scenario('study activities', 'GET', '/study-activities',
+           lambda rng, s: ('/study-activities', None)),
+  Scenario('study activity', 'GET', '/study-activities/<int:id>',
+           lambda rng, s: (f'/study-activities/{rng.choice(s["activities"])}', None)),
+  Scenario('study sessions', 'GET', '/study-sessions',
+           lambda rng, s: (f'/study-sessions?page={rng.randint(1, 20)}', None)),
+  Scenario('next words', 'GET', '/api/study_sessions/next_words',
+           lambda rng, s: (f'/api/study_sessions/next_words?n=20&group_id={rng.choice(s["groups"])}', None)),
+  Scenario('record reviews', 'POST', '/study-sessions/<int:id>/reviews',
+           lambda rng, s: (f'/study-sessions/{rng.choice(s["sessions"])}/reviews', [
+             {'word_id': rng.choice(s['words']), 'correct': rng.random() < 0.8} for _ in range(20)
+           ])),
+  Scenario('record review', 'POST', '/api/study_sessions/<int:id>/words/<int:word_id>/review',
+           lambda rng, s: (f'/api/study_sessions/{rng.choice(s["sessions"])}/words/{rng.choice(s["words"])}/review',
+                           {'correct': rng.random() < 0.8})),
+  Scenario('recent session', 'GET', '/dashboard/recent-session',
+           lambda rng, s: ('/dashboard/recent-session', None)),
+  Scenario('dashboard stats', 'GET', '/dashboard/stats',
+           lambda rng, s: ('/dashboard/stats', None)),
+  # Connect and read the initial stats and session events
+  Scenario('dashboard events', 'GET', '/api/dashboard/events',
+           lambda rng, s: ('/api/dashboard/events?max_events=2', None)),
+  Scenario('study progress', 'GET', '/api/dashboard/study_progress',
+           lambda rng, s: ('/api/dashboard/study_progress', None)),
+  Scenario('root words', 'GET', '/api/roots/<root>/words',
+           lambda rng, s: (f'/api/roots/{quote(rng.choice(s["roots"]))}/words', None)),
+  Scenario('root lookup', 'POST', '/api/roots/lookup',
+           lambda rng, s: ('/api/roots/lookup', {'roots': rng.sample(s['roots'], 10)})),
+  Scenario('add group words', 'POST', '/groups/<int:id>/words',
+           lambda rng, s: (f'/groups/{rng.choice(s["groups"])}/words', {'word_ids': rng.sample(s['words'], 100)})),
+  Scenario('remove group words', 'DELETE', '/groups/<int:id>/words',
+           lambda rng, s: (f'/groups/{rng.choice(s["groups"])}/words', {'word_ids': rng.sample(s['words'], 100)})),
+  Scenario('move group words', 'POST', '/groups/<int:id>/words/move',
+           lambda rng, s: (f'/groups/{rng.choice(s["groups"])}/words/move',
+                           {'word_ids': rng.sample(s['words'], 100), 'target_group_id': rng.choice(s['groups'])})),
+  # Each request folds away one of the scratch groups made for it in main()
+  Scenario('merge groups', 'POST', '/groups/<int:id>/merge',
+           lambda rng, s: (f'/groups/{next(s["scratch_groups"])}/merge', {'target_group_id': rng.choice(s['groups'])})),
+  Scenario('cache stats', 'GET', '/api/cache/stats',
+           lambda rng, s: ('/api/cache/stats', None)),
+  Scenario('metrics', 'GET', '/metrics',
+           lambda rng, s: ('/metrics', None)),
+  # Restores the benchmark dataset itself (TEMPLATE_DATABASE below), so the
+  # sampled ids stay valid for whatever runs after it
+  Scenario('full reset', 'POST', '/api/full_reset',
+           lambda rng, s: ('/api/full_reset', None)),
+)
+
+SAMPLE_SIZE = 1000
+
+def load_sample(path, seed=0):
+  """Ids and terms to build requests from, sampled from the database."""
+  connection = sqlite3.connect(path)
+  try:
+    def column(sql):
+      return [row[0] for row in connection.execute(sql, (SAMPLE_SIZE,))]
+    sample = {
+      'words': column('SELECT id FROM words ORDER BY random() LIMIT ?'),
+      'groups': column('SELECT id FROM groups ORDER BY random() LIMIT ?'),
+      'sessions': column('SELECT id FROM study_sessions ORDER BY random() LIMIT ?'),
+      'activities': column('SELECT id FROM study_activities LIMIT ?'),
+      'roots': column("SELECT DISTINCT replace(root, ' ', '') FROM words WHERE root != '' LIMIT ?"),
+      'terms': column('SELECT english FROM words ORDER BY random() LIMIT ?'),
+      'letters': column('SELECT DISTINCT letter FROM word_letters LIMIT ?'),
+      'transliterations': column("SELECT transliteration FROM words WHERE transliteration != '' ORDER BY random() LIMIT ?"),
+    }
+  finally:
+    connection.close()
+  sample['terms'] = [term.split()[-2 if len(term.split()) > 1 else 0] for term in sample['terms']]
+  return sample
+
+def scratch_groups(path, count, words_per_group=100, seed=0):
+  """Create `count` groups of random words for the merge scenario to
+  consume, returning an iterator over their ids."""
+  rng = random.Random(seed)
+  connection = sqlite3.connect(path)
+  try:
+    word_ids = [row[0] for row in connection.execute('SELECT id FROM words')]
+    group_ids = []
+    for i in range(count):
+      group_id = connection.execute('INSERT INTO groups (name) VALUES (?)', (f'bench scratch {i}',)).lastrowid
+      add_words(connection, group_id, rng.sample(word_ids, min(words_per_group, len(word_ids))))
+      group_ids.append(group_id)
+    connection.commit()
+  finally:
+    connection.close()
+  return iter(group_ids)
+
+def percentile(sorted_values, fraction):
+  return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def run_scenario(port, scenario, sample, clients, requests, seed=0):
+  """Send `requests` requests split over `clients` keep-alive connections.
+
+  Returns (latencies in seconds, errors, wall time).
+  """
+  latencies = []
+  errors = []
+  lock = threading.Lock()
+
+  def client(number, count):
+    rng = random.Random(f'{seed}-{scenario.name}-{number}')
+    connection = http.client.HTTPConnection('127.0.0.1', port)
+    mine = []
+    failed = 0
+    try:
+      for _ in range(count):
+        path, body = scenario.request(rng, sample)
+        headers = {}
+        if body is not None:
+          body = json.dumps(body)
+          headers['Content-Type'] = 'application/json'
+        start = time.perf_counter()
+        try:
+          connection.request(scenario.method, path, body=body, headers=headers)
+          response = connection.getresponse()
+          response.read()
+        except (OSError, http.client.HTTPException):
+          failed += 1
+          connection.close()
+          continue
+        mine.append(time.perf_counter() - start)
+        if response.status >= 400:
+          failed += 1
+    finally:
+      connection.close()
+    with lock:
+      latencies.extend(mine)
+      errors.append(failed)
+
+  threads = [
+    threading.Thread(target=client, args=(i, requests // clients + (i < requests % clients)))
+    for i in range(clients)
+  ]
+  start = time.perf_counter()
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+  return latencies, sum(errors), time.perf_counter() - start
+
+def summarize(latencies, errors, elapsed):
+  ordered = sorted(latencies) or [0.0]
+  return {
+    'requests': len(latencies),
+    'errors': errors,
+    'throughput': round(len(latencies) / elapsed, 1),
+    'mean_ms': round(statistics.fmean(ordered) * 1000, 3),
+    'p50_ms': round(percentile(ordered, 0.50) * 1000, 3),
+    'p95_ms': round(percentile(ordered, 0.95) * 1000, 3),
+    'p99_ms': round(percentile(ordered, 0.99) * 1000, 3),
+  }
+
+def compare(results, baseline, tolerance):
+  """Endpoints whose p95 or throughput regressed past the tolerance, as
+  {name: [reasons]}."""
+  regressions = {}
+  for name, current in results['endpoints'].items():
+    before = baseline.get('endpoints', {}).get(name)
+    if before is None:
+      continue
+    reasons = []
+    if current['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+      reasons.append(f"p95 {before['p95_ms']:.2f} -> {current['p95_ms']:.2f} ms")
+    if current['throughput'] < before['throughput'] * (1 - tolerance):
+      reasons.append(f"throughput {before['throughput']:.0f} -> {current['throughput']:.0f} req/s")
+    if current['errors'] > before['errors']:
+      reasons.append(f"errors {before['errors']} -> {current['errors']}")
+    if reasons:
+      regressions[name] = reasons
+  return regressions
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument('database', help='database to benchmark, e.g. built by bench.dataset')
+  parser.add_argument('--clients', type=int, default=8, help='concurrent connections')
+  parser.add_argument('--requests', type=int, default=1000, help='requests per endpoint')
+  parser.add_argument('--warmup', type=int, default=50, help='untimed requests per endpoint first')
+  parser.add_argument('--only', action='append', help='run only this endpoint (repeatable)')
+  parser.add_argument('--no-cache', action='store_true', help='disable the response cache')
+  parser.add_argument('--no-metrics', action='store_true', help='disable request and SQL metrics')
+  parser.add_argument('--output', help='write the results as JSON here')
+  parser.add_argument('--baseline', help='results JSON to compare against')
+  parser.add_argument('--tolerance', type=float, default=0.2, help='allowed fraction worse than the baseline')
+  parser.add_argument('--seed', type=int, default=0)
+  args = parser.parse_args()
+
+  scenarios = [scenario for scenario in SCENARIOS if not args.only or scenario.name in args.only]
+  workdir = tempfile.mkdtemp()
+  try:
+    path = os.path.join(workdir, 'bench.db')
+    source = sqlite3.connect(args.database)
+    target = sqlite3.connect(path)
+    source.backup(target)
+    source.close()
+    target.close()
+    sample = load_sample(path, args.seed)
+    if any(scenario.name == 'merge groups' for scenario in scenarios):
+      sample['scratch_groups'] = scratch_groups(path, args.requests + args.warmup, seed=args.seed)
+
+    config = {'DATABASE': path, 'TEMPLATE_DATABASE': os.path.abspath(args.database), 'CORS_ORIGINS': ['*']}
+    if args.no_cache:
+      config['RESPONSE_CACHE_MAX_BYTES'] = 0
+    if args.no_metrics:
+      config['METRICS_ENABLED'] = False
+    app = create_app(config)
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)  # no line per request
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    results = {
+      'meta': {
+        'database': os.path.abspath(args.database),
+        'clients': args.clients,
+        'requests': args.requests,
+        'response_cache': not args.no_cache,
+        'metrics': not args.no_metrics,
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+      },
+      'endpoints': {},
+    }
+    print(f'{"endpoint":<18} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"errors":>6}')
+    try:
+      for scenario in scenarios:
+        if args.warmup:
+          run_scenario(server.server_port, scenario, sample, args.clients, args.warmup, seed=f'warmup{args.seed}')
+        latencies, errors, elapsed = run_scenario(
+          server.server_port, scenario, sample, args.clients, args.requests, seed=args.seed)
+        summary = results['endpoints'][scenario.name] = summarize(latencies, errors, elapsed)
+        print(f'{scenario.name:<18} {summary["throughput"]:8.0f} {summary["p50_ms"]:8.2f} '
+              f'{summary["p95_ms"]:8.2f} {summary["p99_ms"]:8.2f} {summary["errors"]:6d}')
+    finally:
+      app.dashboard_publisher.stop()
+      server.shutdown()
+      app.review_writer.stop()
+      app.db.dispose()
+
+    if args.output:
+      with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(results, file, indent=2)
+        file.write('\n')
+
+    if args.baseline:
+      with open(args.baseline, 'r', encoding='utf-8') as file:
+        regressions = compare(results, json.load(file), args.tolerance)
+      for name, reasons in regressions.items():
+        print(f'REGRESSION {name}: {", ".join(reasons)}')
+      if regressions:
+        raise SystemExit(1)
+      print(f'No endpoint regressed more than {args.tolerance:.0%} against {args.baseline}.')
+  finally:
+    shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+  main()
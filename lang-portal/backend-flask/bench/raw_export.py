@@ -0,0 +1,91 @@
+"""Time to first byte, total time and peak memory of /groups/<id>/words/raw
+against building the same list in memory and jsonify()-ing it.
+
+    python -m bench.raw_export --words 20000
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from flask import jsonify
+
+from app import create_app
+from bench.import_words import empty_database, synthetic_word
+from lib.importer import import_words
+
+def build_database(path, count):
+  rng = random.Random(1)
+  db = empty_database(path)
+  with db.write() as connection:
+    import_words(connection, (synthetic_word(rng, i) for i in range(count)), 'Synthetic')
+  db.dispose()
+
+def add_materialized_route(app):
+  # What the endpoint would look like written like the others: fetchall()
+  # into a list of dicts, then jsonify()
+  @app.route('/bench/groups/<int:id>/words/raw')
+  def materialized(id):
+    cursor = app.db.cursor()
+    cursor.execute('''
+      SELECT w.*, COALESCE(wr.correct_count, 0) as correct_count, COALESCE(wr.wrong_count, 0) as wrong_count
+      FROM word_groups wg
+      JOIN words w ON w.id = wg.word_id
+      LEFT JOIN word_reviews wr ON w.id = wr.word_id
+      WHERE wg.group_id = ?
+      ORDER BY wg.word_id
+    ''', (id,))
+    return jsonify([{
+      'id': word['id'], 'english': word['english'], 'arabic': word['arabic'], 'root': word['root'],
+      'transliteration': word['transliteration'], 'correct_count': word['correct_count'],
+      'wrong_count': word['wrong_count'], 'parts': json.loads(word['parts']) if word['parts'] else {}
+    } for word in cursor.fetchall()])
+
+def measure(client, name, url, headers=None, trace_memory=False):
+  # tracemalloc slows Python code down several times, so it is opt-in
+  if trace_memory:
+    tracemalloc.start()
+  start = time.perf_counter()
+  response = client.get(url, headers=headers or {}, buffered=False)
+  chunks = iter(response.response)
+  size = len(next(chunks))
+  first_byte = time.perf_counter() - start
+  for chunk in chunks:
+    size += len(chunk)
+  total = time.perf_counter() - start
+  response.close()
+  line = f'{name:<22} first byte {first_byte * 1000:8.1f} ms   total {total * 1000:8.1f} ms   {size / 2**20:6.1f} MB'
+  if trace_memory:
+    line += f'   peak {tracemalloc.get_traced_memory()[1] / 2**20:6.1f} MB'
+    tracemalloc.stop()
+  print(line)
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument('--words', type=int, default=20000)
+  parser.add_argument('--trace-memory', action='store_true', help='also report peak Python memory')
+  args = parser.parse_args()
+
+  workdir = tempfile.mkdtemp()
+  try:
+    path = os.path.join(workdir, 'words.db')
+    build_database(path, args.words)
+    app = create_app({'TESTING': True, 'CORS_ORIGINS': ['*'], 'DATABASE': path})
+    add_materialized_route(app)
+    client = app.test_client()
+    client.get('/groups/1/words/raw').close()  # warm up
+    print(f'{args.words} words in the group')
+    measure(client, 'fetchall + jsonify', '/bench/groups/1/words/raw', trace_memory=args.trace_memory)
+    measure(client, 'streaming json', '/groups/1/words/raw', trace_memory=args.trace_memory)
+    measure(client, 'streaming ndjson', '/groups/1/words/raw?format=ndjson', trace_memory=args.trace_memory)
+    measure(client, 'streaming json + gzip', '/groups/1/words/raw', {'Accept-Encoding': 'gzip'}, args.trace_memory)
+    app.db.dispose()
+  finally:
+    shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,68 @@
+"""Compare requests/sec of the cached read endpoints with the cache off, on,
+and with conditional GETs answered by 304.
+
+    python -m bench.response_cache --threads 8 --requests 4000
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from bench.db_pool import ENDPOINTS, build_database
+from app import create_app
+
+ENDPOINTS = [url for url in ENDPOINTS if not url.endswith('/words')] + ['/api/words?page=2']
+
+def run(app, threads, requests, conditional):
+  per_thread = requests // threads
+
+  def worker():
+    client = app.test_client()
+    etags = {}
+    for i in range(per_thread):
+      url = ENDPOINTS[i % len(ENDPOINTS)]
+      headers = {'If-None-Match': etags[url]} if conditional and url in etags else {}
+      response = client.get(url, headers=headers)
+      assert response.status_code in (200, 304), response.status_code
+      if 'ETag' in response.headers:
+        etags[url] = response.headers['ETag']
+
+  workers = [threading.Thread(target=worker) for _ in range(threads)]
+  start = time.perf_counter()
+  for worker_thread in workers:
+    worker_thread.start()
+  for worker_thread in workers:
+    worker_thread.join()
+  return per_thread * threads / (time.perf_counter() - start)
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument('--threads', type=int, default=8)
+  parser.add_argument('--requests', type=int, default=4000)
+  args = parser.parse_args()
+
+  workdir = tempfile.mkdtemp()
+  try:
+    path = os.path.join(workdir, 'words.db')
+    build_database(path)
+    config = {'TESTING': True, 'CORS_ORIGINS': ['*'], 'DATABASE': path}
+    results = {}
+    for name, max_bytes, conditional in (
+      ('no cache', 0, False),
+      ('cache', 16 * 1024 * 1024, False),
+      ('cache + If-None-Match', 16 * 1024 * 1024, True),
+    ):
+      app = create_app({**config, 'RESPONSE_CACHE_MAX_BYTES': max_bytes})
+      run(app, args.threads, len(ENDPOINTS) * args.threads, conditional)  # warm up
+      results[name] = run(app, args.threads, args.requests, conditional)
+      app.db.dispose()
+      print(f'{name:<22} {results[name]:8.0f} req/s')
+    print(f'speedup                {results["cache"] / results["no cache"]:8.2f}x cached, '
+          f'{results["cache + If-None-Match"] / results["no cache"]:.2f}x with 304s')
+  finally:
+    shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,93 @@
+"""Compare review ingestion with a transaction per request against group commit.
+
+    python -m bench.review_ingest --threads 8 --requests 2000 --batch 50
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+
+from app import create_app
+from lib.db import Db
+from lib.reviews import write_reviews
+
+class DirectWriter:
+  """Each request takes the writer lock and commits its own transaction."""
+  def __init__(self, db):
+    self.db = db
+
+  def submit(self, session_id, events):
+    with self.db.write() as connection:
+      return write_reviews(connection, session_id, events)
+
+  def stop(self):
+    pass
+
+def build_database(path):
+  Db(path).init()
+  connection = sqlite3.connect(path)
+  connection.execute('''
+    INSERT INTO study_sessions (word_id, group_id, activity_id, correct) VALUES (1, 1, 1, 1)
+  ''')
+  connection.commit()
+  word_ids = [row[0] for row in connection.execute('SELECT id FROM words')]
+  connection.close()
+  return word_ids
+
+def run(app, threads, requests, batch, word_ids):
+  per_thread = requests // threads
+
+  def worker():
+    client = app.test_client()
+    for _ in range(per_thread):
+      reviews = [
+        {'word_id': random.choice(word_ids), 'correct': random.random() < 0.8}
+        for _ in range(batch)
+      ]
+      response = client.post('/study-sessions/1/reviews', json=reviews)
+      assert response.status_code == 201, response.get_json()
+
+  workers = [threading.Thread(target=worker) for _ in range(threads)]
+  start = time.perf_counter()
+  for worker_thread in workers:
+    worker_thread.start()
+  for worker_thread in workers:
+    worker_thread.join()
+  return per_thread * threads / (time.perf_counter() - start)
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument('--threads', type=int, default=8)
+  parser.add_argument('--requests', type=int, default=2000)
+  parser.add_argument('--batch', type=int, default=50, help='reviews per request')
+  parser.add_argument('--synchronous', default='NORMAL', help='PRAGMA synchronous for the writer')
+  args = parser.parse_args()
+
+  workdir = tempfile.mkdtemp()
+  try:
+    config = {'TESTING': True, 'CORS_ORIGINS': ['*']}
+    results = {}
+    for name in ('transaction per request', 'group commit'):
+      path = os.path.join(workdir, name.replace(' ', '_') + '.db')
+      word_ids = build_database(path)
+      app = create_app({**config, 'DATABASE': path})
+      app.db.acquire_writer().execute(f'PRAGMA synchronous = {args.synchronous}')
+      app.db.release_writer()
+      if name == 'transaction per request':
+        app.review_writer = DirectWriter(app.db)
+      run(app, args.threads, args.threads, args.batch, word_ids)  # warm up
+      results[name] = run(app, args.threads, args.requests, args.batch, word_ids)
+      app.review_writer.stop()
+      app.db.dispose()
+      print(f'{name:<24} {results[name]:8.0f} req/s {results[name] * args.batch:10.0f} reviews/s')
+    print(f'speedup                  {results["group commit"] / results["transaction per request"]:8.2f}x')
+  finally:
+    shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+  main()
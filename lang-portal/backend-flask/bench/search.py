@@ -0,0 +1,99 @@
+"""Search latency over a synthetic vocabulary: FTS5 against LIKE scans.
+
+    python -m bench.search --words 100000
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+from app import create_app
+from bench.import_words import SYLLABLES, empty_database, synthetic_word
+from lib.importer import import_words
+from lib.search import normalize_arabic
+
+def english_word(rng):
+  return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+def build_database(path, count, seed=1):
+  rng = random.Random(seed)
+  records = []
+  for i in range(count):
+    record = synthetic_word(rng, i)
+    record['english'] = f'to {english_word(rng)} {english_word(rng)}'
+    records.append(record)
+  db = empty_database(path)
+  with db.write() as connection:
+    import_words(connection, iter(records), 'Synthetic')
+  db.dispose()
+  return records
+
+def queries(records, rng, count):
+  # A mix of what a search box sees: whole words, prefixes and roots
+  for _ in range(count):
+    record = rng.choice(records)
+    arabic = normalize_arabic(record['arabic'])
+    yield rng.choice([
+      ('arabic', arabic),
+      ('arabic prefix', arabic[:2]),
+      ('english prefix', record['english'].split()[1][:4]),
+      ('transliteration', record['transliteration']),
+      ('root', record['root']),
+    ])
+
+def like_search(connection, q, limit=20):
+  # What a search without an index would do: scan and filter every row
+  pattern = f'%{q}%'
+  return connection.execute('''
+    SELECT id FROM words
+    WHERE english LIKE ? OR arabic LIKE ? OR transliteration LIKE ? OR root LIKE ?
+    LIMIT ?
+  ''', (pattern, pattern, pattern, pattern, limit)).fetchall()
+
+def report(name, timings):
+  timings = sorted(timings)
+  p95 = timings[int(len(timings) * 0.95) - 1]
+  print(f'{name:<36} p50 {statistics.median(timings) * 1000:7.2f} ms   p95 {p95 * 1000:7.2f} ms')
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument('--words', type=int, default=100000)
+  parser.add_argument('--queries', type=int, default=500)
+  args = parser.parse_args()
+
+  workdir = tempfile.mkdtemp()
+  try:
+    path = os.path.join(workdir, 'words.db')
+    records = build_database(path, args.words)
+    print(f'{args.words} synthetic words, {os.path.getsize(path) / 2**20:.1f} MB database')
+
+    app = create_app({'TESTING': True, 'CORS_ORIGINS': ['*'], 'DATABASE': path})
+    client = app.test_client()
+    rng = random.Random(2)
+    by_kind = {}
+    for kind, q in queries(records, rng, args.queries):
+      start = time.perf_counter()
+      response = client.get('/api/words/search', query_string={'q': q})
+      by_kind.setdefault(kind, []).append(time.perf_counter() - start)
+      assert response.status_code == 200 and response.get_json()['words'], (kind, q)
+    for kind, timings in by_kind.items():
+      report(f'/api/words/search {kind}', timings)
+    report('/api/words/search all', [t for timings in by_kind.values() for t in timings])
+
+    connection = app.db.acquire_reader()
+    timings = []
+    for kind, q in queries(records, random.Random(2), min(args.queries, 100)):
+      start = time.perf_counter()
+      like_search(connection, q)
+      timings.append(time.perf_counter() - start)
+    app.db.release_reader(connection)
+    report('LIKE scan (SQL only)', timings)
+    app.db.dispose()
+  finally:
+    shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,97 @@
+"""Serialization share of the 50-row /api/words page: json.loads() of parts
+plus Flask's default encoder, against RawJSON pass-through plus orjson.
+
+    python -m bench.serialization --iterations 2000
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from bench.import_words import empty_database, synthetic_word
+from lib.importer import import_words
+from lib.serialization import JSONProvider, raw_parts, orjson
+
+QUERY = '''
+  SELECT w.id, w.english, w.arabic, w.root, w.transliteration, w.parts,
+      COALESCE(r.correct_count, 0) AS correct_count,
+      COALESCE(r.wrong_count, 0) AS wrong_count
+  FROM words w
+  LEFT JOIN word_reviews r ON w.id = r.word_id
+  ORDER BY w.english asc, w.id asc
+  LIMIT 51 OFFSET 0
+'''
+
+def page(words, parts):
+  # The body get_words builds, with `parts` turning the stored text into a value
+  return {
+    'words': [{
+      'id': word['id'],
+      'english': word['english'],
+      'arabic': word['arabic'],
+      'root': word['root'],
+      'transliteration': word['transliteration'],
+      'parts': parts(word['parts']),
+      'correct_count': word['correct_count'],
+      'wrong_count': word['wrong_count']
+    } for word in words[:50]],
+    'total_pages': 2000,
+    'current_page': 1,
+    'total_words': 100000
+  }
+
+def timed(function, iterations):
+  start = time.perf_counter()
+  for _ in range(iterations):
+    function()
+  return (time.perf_counter() - start) / iterations
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument('--iterations', type=int, default=2000)
+  parser.add_argument('--words', type=int, default=5000)
+  args = parser.parse_args()
+
+  workdir = tempfile.mkdtemp()
+  try:
+    rng = random.Random(1)
+    db = empty_database(os.path.join(workdir, 'words.db'))
+    with db.write() as connection:
+      import_words(connection, (synthetic_word(rng, i) for i in range(args.words)), 'Synthetic')
+    connection = db.acquire_reader()
+    words = connection.execute(QUERY).fetchall()
+    query = timed(lambda: connection.execute(QUERY).fetchall(), args.iterations)
+    db.release_reader(connection)
+    db.dispose()
+
+    legacy = Flask(__name__)
+    legacy.json = DefaultJSONProvider(legacy)
+    fast = Flask(__name__)
+    fast.json = JSONProvider(fast)
+    loads = lambda parts: json.loads(parts) if parts else {}
+
+    cases = (
+      ('json.loads + jsonify', legacy, loads),
+      ('RawJSON + ' + ('orjson' if orjson else 'json'), fast, raw_parts),
+    )
+    print(f'query + fetchall          {query * 1e6:8.1f} us')
+    results = {}
+    for name, app, parts in cases:
+      with app.app_context():
+        body = app.json.response(page(words, parts)).get_data()
+        results[name] = timed(lambda: app.json.response(page(words, parts)).get_data(), args.iterations)
+      share = results[name] / (results[name] + query)
+      print(f'{name:<24} {results[name] * 1e6:8.1f} us   {len(body) / 1024:5.1f} KB   {share:5.1%} of query + serialize')
+    before, after = results.values()
+    print(f'speedup                  {before / after:8.2f}x')
+  finally:
+    shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,132 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from functools import wraps
+
+from flask import Response, make_response, request
+
+# In-process cache of rendered GET responses. Entries are keyed by path and
+# query args and remember the table_versions (see migration 0006) of the
+# tables they were built from; an entry is served only while those versions
+# are unchanged. Responses carry a strong ETag, and a matching If-None-Match
+# is answered with 304 from memory. With learner shards (lib/shards.py) the
+# entries and versions are kept per learner.
+
+MAX_BYTES = 16 * 1024 * 1024
+# How often versions are re-read when this process has not written, to pick
+# up writes from other processes (invoke import-words and the like)
+VERSION_TTL = 1.0
+
+Entry = namedtuple('Entry', 'stamp etag body mimetype')
+
+class ResponseCache:
+  def __init__(self, db, max_bytes=MAX_BYTES, version_ttl=VERSION_TTL):
+    self.db = db
+    self.max_bytes = max_bytes
+    self.version_ttl = version_ttl
+    self.size = 0
+    self.hits = 0
+    self.misses = 0
+    self.not_modified = 0
+    self.evictions = 0
+    self._entries = OrderedDict()
+    self._lock = threading.Lock()
+    # {learner: (versions, write_count, loaded_at)}; None is the shared database
+    self._versions = {}
+
+  def versions(self, database=None):
+    """Current {table: version}, re-read only after a write or the TTL."""
+    database = database or self.db
+    learner = getattr(database, 'learner', None)
+    versions, loaded_write_count, loaded_at = self._versions.get(learner, (None, None, 0.0))
+    write_count = database.write_count
+    now = time.monotonic()
+    if (versions is None or write_count != loaded_write_count
+        or now - loaded_at >= self.version_ttl):
+      connection = database.acquire_reader()
+      try:
+        rows = connection.execute('SELECT table_name, version FROM table_versions').fetchall()
+      finally:
+        database.release_reader(connection)
+      versions = {row['table_name']: row['version'] for row in rows}
+      self._versions[learner] = (versions, write_count, now)
+    return versions
+
+  def cached(self, *tables):
+    """Cache a GET view whose response depends only on `tables`."""
+    def decorator(view):
+      @wraps(view)
+      def wrapper(*args, **kwargs):
+        if self.max_bytes <= 0:
+          return view(*args, **kwargs)
+        database = self.db.route()
+        try:
+          versions = self.versions(database)
+        except sqlite3.OperationalError:
+          # Database not migrated yet: nothing to key entries on
+          return view(*args, **kwargs)
+
+        stamp = tuple(versions.get(table) for table in tables)
+        key = (getattr(database, 'learner', None), request.path, tuple(sorted(request.args.items(multi=True))))
+        entry = self.lookup(key, stamp)
+        if entry is None:
+          response = make_response(view(*args, **kwargs))
+          if response.status_code != 200 or response.is_streamed:
+            return response
+          body = response.get_data()
+          entry = Entry(stamp, hashlib.blake2b(body, digest_size=16).hexdigest(), body, response.mimetype)
+          self.store(key, entry)
+
+        response = Response(entry.body, mimetype=entry.mimetype)
+        response.set_etag(entry.etag)
+        response.make_conditional(request)
+        if response.status_code == 304:
+          with self._lock:
+            self.not_modified += 1
+        return response
+      return wrapper
+    return decorator
+
+  def lookup(self, key, stamp):
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry is not None and entry.stamp == stamp:
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+      self.misses += 1
+      return None
+
+  def store(self, key, entry):
+    if len(entry.body) > self.max_bytes:
+      return
+    with self._lock:
+      old = self._entries.pop(key, None)
+      if old is not None:
+        self.size -= len(old.body)
+      self._entries[key] = entry
+      self.size += len(entry.body)
+      # Evict least recently used entries until we are back under the cap
+      while self.size > self.max_bytes:
+        _, evicted = self._entries.popitem(last=False)
+        self.size -= len(evicted.body)
+        self.evictions += 1
+
+  def clear(self):
+    with self._lock:
+      self._entries.clear()
+      self.size = 0
+
+  def stats(self):
+    with self._lock:
+      return {
+        'hits': self.hits,
+        'misses': self.misses,
+        'not_modified': self.not_modified,
+        'evictions': self.evictions,
+        'entries': len(self._entries),
+        'bytes': self.size,
+        'max_bytes': self.max_bytes,
+      }
@@ -1,163 +1,217 @@
+import queue
 import sqlite3
-import json
-from flask import g
+import threading
+from contextlib import contextmanager
+from flask import current_app, g, has_request_context, request
+
+from lib.metrics import InstrumentedConnection
+from lib.migrations import migrate
+from lib.template import clone, ensure_template
+
+# Applied to every connection when it is opened. WAL lets the pooled readers
+# keep serving while the writer commits instead of queueing behind the
+# rollback journal.
+PRAGMAS = (
+  'PRAGMA journal_mode = WAL',
+  'PRAGMA synchronous = NORMAL',
+  'PRAGMA cache_size = -16000',    # 16MB page cache per connection
+  'PRAGMA mmap_size = 134217728',  # 128MB
+  'PRAGMA temp_store = MEMORY',
+)
+
+# Requests with these methods are served from the read-only pool, as are
+# requests for views marked read_only()
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+def read_only(view):
+  """Mark a view that never writes, e.g. a lookup taking its input as a
+  POST body, so it is served from the read-only pool whatever its method."""
+  view.read_only = True
+  return view
+
+def is_read_only_request():
+  if request.method in READ_METHODS:
+    return True
+  return getattr(current_app.view_functions.get(request.endpoint), 'read_only', False)
 
 class Db:
-  def __init__(self, database='words.db'):
+  def __init__(self, database='words.db', pool_size=8, busy_timeout=5000, statement_cache=256):
     self.database = database
-    self.connection = None
+    self.pool_size = pool_size
+    self.busy_timeout = busy_timeout
+    self.statement_cache = statement_cache
+    self._readers = queue.LifoQueue()
+    self._readers_open = 0
+    self._pool_lock = threading.Lock()
+    self._writer = None
+    self._writer_lock = threading.RLock()
+    # Per-learner databases (lib/shards.py), when the app is configured for them
+    self.shards = None
+    # Bumped whenever the writer is handed back, so in-process caches know
+    # the data may have changed without asking the database
+    self.write_count = 0
+
+  def connect(self, readonly=False):
+    """Open a new connection with the tuned pragmas applied."""
+    connection = sqlite3.connect(
+      self.database,
+      timeout=self.busy_timeout / 1000,
+      cached_statements=self.statement_cache,
+      uri=self.database.startswith('file:'),
+      check_same_thread=False,  # pooled connections move between request threads
+      factory=InstrumentedConnection  # reports to /metrics while serving a request
+    )
+    connection.row_factory = sqlite3.Row  # Return rows as dictionaries
+    connection.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout)}')
+    for pragma in PRAGMAS:
+      connection.execute(pragma)
+    if readonly:
+      connection.execute('PRAGMA query_only = ON')
+    return connection
+
+  def acquire_reader(self):
+    try:
+      return self._readers.get_nowait()
+    except queue.Empty:
+      pass
+
+    # Open a new reader while we are below the pool size, otherwise wait
+    # for one to be handed back
+    with self._pool_lock:
+      can_open = self._readers_open < self.pool_size
+      if can_open:
+        self._readers_open += 1
+    if can_open:
+      try:
+        return self.connect(readonly=True)
+      except Exception:
+        with self._pool_lock:
+          self._readers_open -= 1
+        raise
+
+    try:
+      return self._readers.get(timeout=self.busy_timeout / 1000)
+    except queue.Empty:
+      raise sqlite3.OperationalError('Timed out waiting for a pooled connection')
+
+  def release_reader(self, connection):
+    if connection.in_transaction:
+      connection.rollback()
+    self._readers.put(connection)
+
+  def acquire_writer(self):
+    # The writer is shared by every thread, so callers hold the lock until
+    # release_writer(); the lock is reentrant for nested use in one thread.
+    self._writer_lock.acquire()
+    try:
+      if self._writer is None:
+        self._writer = self.connect()
+    except Exception:
+      self._writer_lock.release()
+      raise
+    return self._writer
+
+  def release_writer(self):
+    # Anything left uncommitted is discarded, as closing the connection did
+    if self._writer is not None and self._writer.in_transaction:
+      self._writer.rollback()
+    self.write_count += 1
+    self._writer_lock.release()
+
+  @contextmanager
+  def write(self):
+    """Borrow the writer outside of a request, committing on success."""
+    connection = self.acquire_writer()
+    try:
+      yield connection
+      connection.commit()
+    finally:
+      self.release_writer()
+
+  def route(self):
+    """The database serving the current request: the learner's shard when
+    the request names a learner and shards are configured, else this one."""
+    if self.shards is not None and has_request_context():
+      return self.shards.for_request(request) or self
+    return self
 
   def get(self):
-    if 'db' not in g:
-      g.db = sqlite3.connect(self.database)
-      g.db.row_factory = sqlite3.Row  # Return rows as dictionaries
+    current = request._get_current_object() if has_request_context() else None
+    if 'db' in g and g.get('db_request') is current:
+      return g.db
+    # A request that shares its app context with an earlier one (as the
+    # test client does) must not use that request's connection: it may be
+    # a reader, or another learner's. It is handed back before routing,
+    # which may sync a learner's shard through its own connections.
+    self.close()
+    readonly = current is not None and is_read_only_request()
+    owner = self.route()
+    if readonly:
+      g.db = owner.acquire_reader()
+    else:
+      g.db = owner.acquire_writer()
+    g.db_readonly = readonly
+    g.db_owner = owner
+    g.db_request = current
     return g.db
 
   def commit(self):
     self.get().commit()
 
+  def rollback(self):
+    self.get().rollback()
+
   def cursor(self):
     # Ensure the connection is valid before getting a cursor
     connection = self.get()
     return connection.cursor()
 
   def close(self):
+    # Hand the request's connection back to the pool instead of closing it
     db = g.pop('db', None)
+    readonly = g.pop('db_readonly', False)
+    owner = g.pop('db_owner', self)
+    g.pop('db_request', None)
     if db is not None:
-      db.close()
+      if readonly:
+        owner.release_reader(db)
+      else:
+        owner.release_writer()
+
+  def close_idle_readers(self):
+    while True:
+      try:
+        self._readers.get_nowait().close()
+      except queue.Empty:
+        break
+      with self._pool_lock:
+        self._readers_open -= 1
+
+  def dispose(self):
+    """Close every idle pooled connection and the writer."""
+    self.close_idle_readers()
+    with self._writer_lock:
+      if self._writer is not None:
+        self._writer.close()
+        self._writer = None
+    if self.shards is not None:
+      self.shards.close()
 
   # Function to load SQL from a file
   def sql(self, filepath):
     with open('sql/' + filepath, 'r') as file:
       return file.read()
 
-  # Function to load the words from a JSON file
-  def load_json(self, filepath):
-    with open(filepath, 'r', encoding='utf-8') as file:
-      return json.load(file)
-
-  def setup_tables(self, cursor):
-    """Set up all database tables from SQL files."""
-    table_files = [
-        'create_table_words.sql',
-        'create_table_word_reviews.sql',
-        'create_table_word_review_items.sql',
-        'create_table_groups.sql',
-        'create_table_word_groups.sql',
-        'create_table_study_activities.sql',
-        'create_table_study_sessions.sql'
-    ]
-    
-    for sql_file in table_files:
-        try:
-            # Execute the SQL from each file
-            cursor.execute(self.sql(f'setup/{sql_file}'))
-            self.get().commit()
-            print(f"Successfully created table from {sql_file}")
-        except Exception as e:
-            print(f"Error creating table from {sql_file}: {str(e)}")
-            # Depending on your error handling strategy, you might want to:
-            # - raise the exception
-            # - log it to a file
-            # - continue with the next file
-            raise  # This will stop execution if any table fails to create
-
-  def import_study_activities_json(self,cursor,data_json_path):
-    study_actvities = self.load_json(data_json_path)
-    for activity in study_actvities:
-      cursor.execute('''
-      INSERT INTO study_activities (name,url,preview_url) VALUES (?,?,?)
-      ''', (activity['name'],activity['url'],activity['preview_url'],))
-    self.get().commit()
-
-  def import_word_json(self,cursor,group_name,data_json_path,words_key='verbs'):
-    # Insert a new group
-    cursor.execute('''
-      INSERT INTO groups (name) VALUES (?)
-    ''', (group_name,))
-    self.get().commit()
-
-    # Get the ID of the group
-    cursor.execute('SELECT id FROM groups WHERE name = ?', (group_name,))
-    group_id = cursor.fetchone()[0]
-
-    # Load and parse JSON file - now handling the nested structure
-    json_data = self.load_json(data_json_path)
-    # Extract the words array from the JSON object using the provided key
-    words = json_data.get(words_key, [])
-
-    for word in words:
-        # Get the parts array - could be named either 'parts' or 'letters'
-        parts = word.get('parts', []) if 'parts' in word else word.get('letters', [])
-        
-        # Insert the word into the words table
-        cursor.execute('''
-            INSERT INTO words (english, arabic, root, transliteration, parts, parts_of_speech) 
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (
-            word['english'], 
-            word['arabic'], 
-            word['root'],
-            word['transliteration'],
-            json.dumps(parts),  # Convert the parts array to JSON string
-            ""
-        ))
-        
-        # Get the last inserted word's ID
-        word_id = cursor.lastrowid
-
-        # Insert the word-group relationship into word_groups table
-        cursor.execute('''
-            INSERT INTO word_groups (word_id, group_id) VALUES (?, ?)
-        ''', (word_id, group_id))
-    self.get().commit()
-
-    # Update the words_count in the groups table
-    cursor.execute('''
-      UPDATE groups
-      SET words_count = (
-        SELECT COUNT(*) FROM word_groups WHERE group_id = ?
-      )
-      WHERE id = ?
-    ''', (group_id, group_id))
-
-    self.get().commit()
+  def migrate(self):
+    """Apply pending migrations from sql/migrations through the writer."""
+    with self.write() as connection:
+      return migrate(connection)
 
-    print(f"Successfully added {len(words)} words to the '{group_name}' group.")
-    
-  # Initialize the database with sample data
-  def init(self, app):
-    with app.app_context():
-      # Drop existing tables (if they exist) before creating new ones
-      cursor = self.cursor()
-      cursor.execute("DROP TABLE IF EXISTS words")
-      cursor.execute("DROP TABLE IF EXISTS word_reviews")
-      cursor.execute("DROP TABLE IF EXISTS word_review_items")
-      cursor.execute("DROP TABLE IF EXISTS groups")
-      cursor.execute("DROP TABLE IF EXISTS word_groups")
-      cursor.execute("DROP TABLE IF EXISTS study_activities")
-      cursor.execute("DROP TABLE IF EXISTS study_sessions")
-      self.get().commit()
-
-      cursor = self.cursor()
-      self.setup_tables(cursor)
-      self.import_word_json(
-        cursor=cursor,
-        group_name='Core Verbs',
-        data_json_path='seed/data_verbs.json',
-        words_key='verbs'
-      )
-      self.import_word_json(
-        cursor=cursor,
-        group_name='Core Adjectives',
-        data_json_path='seed/data_adjectives.json',
-        words_key='adjectives'
-      )
-
-      self.import_study_activities_json(
-        cursor=cursor,
-        data_json_path='seed/study_activities.json'
-      )
+  def init(self, template=None):
+    """Replace the whole database with a copy of the seeded template
+    (see lib/template.py), built first if the schema or seeds changed."""
+    with self.write() as connection:
+      clone(template or ensure_template(), connection)
 
 # Create an instance of the Db class
 db = Db()
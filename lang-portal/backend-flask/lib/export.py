@@ -0,0 +1,152 @@
+import datetime
+import json
+import os
+
+try:
+  import pyarrow as pa
+  import pyarrow.compute as pc
+  import pyarrow.parquet as pq
+except ImportError:  # optional: only the history export needs it
+  pa = None
+
+# Incremental export of the review history to Parquet for analytics. Each
+# run reads the rows added since the last run's watermark (the highest id
+# exported; ids are AUTOINCREMENT and SQLite commits one writer at a time,
+# so rows only ever appear above it) in keyset batches, each its own short
+# read, and writes them as immutable files partitioned by day:
+#
+#   <directory>/word_review_items/date=2025-01-31/part-000000000001-000000050000.parquet
+#
+# manifest.json lists every file with its row count and id range, and holds
+# the watermarks. It is replaced atomically after each batch, so an
+# interrupted run picks up where it stopped and readers never see a file
+# the manifest does not vouch for. Rows are exported as they were inserted;
+# later updates (a group merge moving sessions) are not re-exported.
+#
+# With per-learner databases (lib/shards.py) each shard numbers its rows
+# on its own, so every learner has its own watermark under the table's
+# `learners` in the manifest, and their files carry the learner id in the
+# name and in a learner_id column (null for rows of the shared database):
+#
+#   <directory>/word_review_items/date=2025-01-31/part-alice-000000000001-000000000042.parquet
+
+BATCH_SIZE = 50000
+MANIFEST = 'manifest.json'
+
+# Exported tables: their columns with Arrow types, and the column whose day
+# partitions them
+EXPORTS = {
+  'word_review_items': {
+    'columns': (('id', 'int64'), ('word_id', 'int64'), ('study_session_id', 'int64'),
+                ('correct', 'bool'), ('created_at', 'timestamp')),
+    'partition_by': 'created_at',
+  },
+  'study_sessions': {
+    'columns': (('id', 'int64'), ('word_id', 'int64'), ('group_id', 'int64'), ('activity_id', 'int64'),
+                ('correct', 'bool'), ('timestamp', 'timestamp')),
+    'partition_by': 'timestamp',
+  },
+}
+
+def require_pyarrow():
+  if pa is None:
+    raise RuntimeError('Exporting to Parquet needs pyarrow: pip install pyarrow')
+
+def arrow_type(kind):
+  return {'int64': pa.int64(), 'bool': pa.bool_(), 'timestamp': pa.timestamp('s')}[kind]
+
+def to_array(values, kind):
+  """A column of SQLite values as an Arrow array of `kind`."""
+  if kind == 'bool':
+    # BOOLEAN columns hold 0/1
+    return pc.not_equal(pa.array(values, pa.int64()), 0)
+  if kind == 'timestamp':
+    # CURRENT_TIMESTAMP text; anything unparseable becomes null
+    return pc.strptime(pa.array(values, pa.string()), format='%Y-%m-%d %H:%M:%S', unit='s', error_is_null=True)
+  return pa.array(values, arrow_type(kind))
+
+def load_manifest(directory):
+  path = os.path.join(directory, MANIFEST)
+  if not os.path.exists(path):
+    return {'tables': {}}
+  with open(path, 'r', encoding='utf-8') as file:
+    return json.load(file)
+
+def save_manifest(directory, manifest):
+  manifest['updated_at'] = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds')
+  path = os.path.join(directory, MANIFEST)
+  with open(path + '.tmp', 'w', encoding='utf-8') as file:
+    json.dump(manifest, file, indent=2)
+    file.write('\n')
+  os.replace(path + '.tmp', path)
+
+def write_file(table, path):
+  os.makedirs(os.path.dirname(path), exist_ok=True)
+  pq.write_table(table, path + '.tmp')
+  os.replace(path + '.tmp', path)
+
+def export_table(connection, name, directory, manifest, batch_size=BATCH_SIZE, learner=None):
+  """Export `name`'s rows above its watermark, or above `learner`'s when
+  `connection` is that learner's shard. Returns the number exported."""
+  spec = EXPORTS[name]
+  names = [column for column, _ in spec['columns']]
+  schema = pa.schema([(column, arrow_type(kind)) for column, kind in spec['columns']] + [('learner_id', pa.string())])
+  table_state = manifest['tables'].setdefault(name, {'watermark': 0, 'rows': 0, 'files': []})
+  if learner is None:
+    state = table_state
+  else:
+    state = table_state.setdefault('learners', {}).setdefault(learner, {'watermark': 0, 'rows': 0})
+
+  # Plain tuples: building a sqlite3.Row per value costs more than the read
+  cursor = connection.cursor()
+  cursor.row_factory = None
+  exported = 0
+  while True:
+    rows = cursor.execute(f'''
+      SELECT {', '.join(names)}
+      FROM {name}
+      WHERE id > ?
+      ORDER BY id
+      LIMIT ?
+    ''', (state['watermark'], batch_size)).fetchall()
+    if not rows:
+      return exported
+
+    batch = pa.Table.from_arrays(
+      [to_array(values, kind) for values, (_, kind) in zip(zip(*rows), spec['columns'])]
+      + [pa.nulls(len(rows), pa.string()) if learner is None else pa.array([learner] * len(rows), pa.string())],
+      schema=schema)
+    days = pc.cast(batch.column(spec['partition_by']), pa.date32())
+    for day in sorted(pc.unique(days).to_pylist(), key=lambda day: (day is None, day)):
+      part = batch.filter(pc.is_null(days) if day is None else pc.equal(days, pa.scalar(day, pa.date32())))
+      ids = part.column('id')
+      low, high = pc.min(ids).as_py(), pc.max(ids).as_py()
+      day = 'unknown' if day is None else day.isoformat()
+      prefix = 'part' if learner is None else f'part-{learner}'
+      relative = f'{name}/date={day}/{prefix}-{low:012d}-{high:012d}.parquet'
+      write_file(part, os.path.join(directory, relative))
+      entry = {'path': relative, 'date': day, 'rows': part.num_rows, 'min_id': low, 'max_id': high}
+      if learner is not None:
+        entry['learner'] = learner
+      table_state['files'].append(entry)
+
+    state['watermark'] = rows[-1][0]
+    state['rows'] += len(rows)
+    if learner is not None:
+      table_state['rows'] += len(rows)
+    exported += len(rows)
+    save_manifest(directory, manifest)
+
+def export_history(connection, directory, tables=tuple(EXPORTS), batch_size=BATCH_SIZE, learners=()):
+  """Export every table's new rows into `directory`, from the shared
+  database and then from each (learner, connection) in `learners`.
+  Returns {table: rows}."""
+  require_pyarrow()
+  os.makedirs(directory, exist_ok=True)
+  manifest = load_manifest(directory)
+  exported = {name: export_table(connection, name, directory, manifest, batch_size) for name in tables}
+  for learner, shard in learners:
+    for name in tables:
+      exported[name] += export_table(shard, name, directory, manifest, batch_size, learner=learner)
+  save_manifest(directory, manifest)
+  return exported
@@ -0,0 +1,115 @@
+import json
+
+# Typo-tolerant lookup over words.transliteration and words.english using
+# the word_trigrams index from sql/migrations/0014_create_word_trigrams.sql.
+# Candidates come from trigram overlap and are re-ranked by edit distance:
+#
+#   - One edit changes at most three of a text's trigrams, so a word within
+#     `max_distance` edits shares at least n - 3 * max_distance of the
+#     query's n trigrams.
+#   - When n > 3 * max_distance that is at least one, so the word contains
+#     one of the query's 3 * max_distance + 1 rarest trigrams. Only those
+#     posting lists are read, so common trigrams such as "  t" never are.
+#     Shorter queries could match words sharing no trigram with them at
+#     all; their max_distance is lowered until the bound holds
+#     (reachable_distance()).
+#   - The best-overlapping candidates are then checked with a bounded
+#     Levenshtein distance against the whole text and each of its words.
+
+MAX_QUERY_LENGTH = 64
+MAX_DISTANCE = 3
+CANDIDATES = 100  # candidates re-ranked per lookup
+
+# SQLite's lower() only folds ASCII, so the index does the same
+_ascii_lower = str.maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')
+
+def normalize(text):
+  return (text or '').strip(' ').translate(_ascii_lower)
+
+def trigrams(text):
+  """The distinct trigrams word_trigrams stores for `text`."""
+  padded = '  ' + normalize(text).replace(' ', '  ') + ' '
+  grams = (padded[i:i + 3] for i in range(len(padded) - 2))
+  return list(dict.fromkeys(gram for gram in grams if gram.strip(' ')))
+
+def default_distance(query):
+  """Edits tolerated by default: one up to seven characters, then one more
+  per four characters."""
+  return min(MAX_DISTANCE, 1 + max(0, len(query) - 4) // 4)
+
+def reachable_distance(query, max_distance):
+  """The largest distance up to max_distance that candidates() can find
+  every match for: the query needs more than three trigrams per edit."""
+  return max(0, min(max_distance, (len(trigrams(query)) - 1) // 3))
+
+def bounded_levenshtein(a, b, limit):
+  """Edit distance between a and b, or limit + 1 once it must exceed limit."""
+  if abs(len(a) - len(b)) > limit:
+    return limit + 1
+  if len(a) > len(b):
+    a, b = b, a
+  previous = list(range(len(b) + 1))
+  for i, char in enumerate(a, 1):
+    # Only cells within `limit` of the diagonal can stay under the limit
+    low, high = max(1, i - limit), min(len(b), i + limit)
+    current = [limit + 1] * (len(b) + 1)
+    current[low - 1] = i if low == 1 else limit + 1
+    for j in range(low, high + 1):
+      current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != b[j - 1]))
+    if min(current[low - 1:high + 1]) > limit:
+      return limit + 1
+    previous = current
+  return min(previous[len(b)], limit + 1)
+
+def distance(query, text, limit):
+  """Distance from the query to the text or to its closest word."""
+  text = normalize(text)
+  best = bounded_levenshtein(query, text, limit)
+  for word in text.split(' '):
+    if best == 0:
+      break
+    if word and word != text and abs(len(word) - len(query)) < best:
+      best = min(best, bounded_levenshtein(query, word, best - 1 if best <= limit else limit))
+  return best
+
+def candidates(cursor, query, max_distance, limit=CANDIDATES):
+  """Rows of (id, english, transliteration, shared trigrams) for the words
+  that can be within max_distance of the query, best overlap first.
+  max_distance must be reachable (reachable_distance())."""
+  grams = trigrams(query)
+  cursor.execute('''
+    SELECT q.value AS trigram, COALESCE(c.words, 0) AS words
+    FROM json_each(?) q
+    LEFT JOIN word_trigram_counts c ON c.trigram = q.value
+  ''', (json.dumps(grams),))
+  rarest = [row['trigram'] for row in sorted(cursor.fetchall(), key=lambda row: row['words'])]
+  rarest = rarest[:3 * max_distance + 1]
+  cursor.execute('''
+    SELECT w.id, w.english, w.transliteration, c.shared
+    FROM (
+      SELECT word_id, COUNT(*) AS shared
+      FROM word_trigrams
+      WHERE trigram IN (SELECT value FROM json_each(?))
+      GROUP BY word_id
+      ORDER BY shared DESC, word_id
+      LIMIT ?
+    ) c
+    JOIN words w ON w.id = c.word_id
+    ORDER BY c.shared DESC, w.id
+  ''', (json.dumps(rarest), limit))
+  return cursor.fetchall()
+
+def rank(query, words, max_distance):
+  """The candidates within max_distance of the query, closest first, each
+  as (distance, field, word id)."""
+  ranked = []
+  for word in words:
+    best = None
+    for field in ('transliteration', 'english'):
+      edits = distance(query, word[field], max_distance)
+      if edits <= max_distance and (best is None or edits < best[0]):
+        best = (edits, field)
+    if best is not None:
+      ranked.append((best[0], len(word[best[1]] or ''), word['id'], best[1]))
+  ranked.sort()
+  return [(edits, field, word_id) for edits, length, word_id, field in ranked]
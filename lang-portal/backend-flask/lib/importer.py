@@ -0,0 +1,198 @@
+import csv
+import json
+import os
+
+from lib.neighbors import refresh as refresh_neighbors
+from lib.pagination import row_count
+
+# Streaming bulk import of vocabulary. Records are read one at a time from
+# JSON, JSONL or CSV input and written in executemany() batches inside a
+# single transaction, upserting on (arabic, english).
+
+CHUNK_SIZE = 64 * 1024
+
+# Reused for every row; json.dumps() builds a new encoder per call
+encode_parts = json.JSONEncoder(ensure_ascii=False).encode
+
+class JsonArrayReader:
+  """Yield the elements of a JSON array without loading the whole document.
+
+  With `key` the array is looked up under that top-level key, which is how
+  the seed files are laid out ({"verbs": [...]}); without it the document
+  itself must be the array.
+  """
+  def __init__(self, file, key=None, chunk_size=CHUNK_SIZE):
+    self.file = file
+    self.key = key
+    self.chunk_size = chunk_size
+    self.decoder = json.JSONDecoder()
+    self.buffer = ''
+    self.pos = 0
+    self.eof = False
+
+  def fill(self):
+    chunk = self.file.read(self.chunk_size)
+    if not chunk:
+      self.eof = True
+    # Drop what has been consumed so the buffer stays about one chunk long
+    self.buffer = self.buffer[self.pos:] + chunk
+    self.pos = 0
+    return bool(chunk)
+
+  def peek(self):
+    while True:
+      while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+        self.pos += 1
+      if self.pos < len(self.buffer):
+        return self.buffer[self.pos]
+      if not self.fill():
+        raise ValueError('Unexpected end of JSON input')
+
+  def expect(self, char):
+    if self.peek() != char:
+      raise ValueError(f'Expected {char!r} at offset {self.pos} of the buffered JSON')
+    self.pos += 1
+
+  def value(self):
+    self.peek()
+    while True:
+      try:
+        value, end = self.decoder.raw_decode(self.buffer, self.pos)
+        # A value that runs to the end of the buffer may continue in the
+        # next chunk (e.g. a number), so only trust it once more has arrived
+        if end < len(self.buffer) or self.eof:
+          self.pos = end
+          return value
+      except json.JSONDecodeError:
+        if self.eof:
+          raise
+      self.fill()
+
+  def find_array(self):
+    if self.key is None:
+      self.expect('[')
+      return
+    self.expect('{')
+    while self.peek() != '}':
+      name = self.value()
+      self.expect(':')
+      if name == self.key:
+        self.expect('[')
+        return
+      self.value()  # skip the value of any other key
+      if self.peek() == ',':
+        self.pos += 1
+    raise KeyError(self.key)
+
+  def __iter__(self):
+    self.find_array()
+    if self.peek() == ']':
+      return
+    while True:
+      yield self.value()
+      separator = self.peek()
+      self.pos += 1
+      if separator == ']':
+        return
+      if separator != ',':
+        raise ValueError(f'Expected "," or "]" in JSON array, found {separator!r}')
+
+def read_records(path, words_key=None, format=None):
+  """Yield word records from a JSON, JSONL/NDJSON or CSV file."""
+  if format is None:
+    extension = os.path.splitext(path)[1].lower()
+    format = {'.jsonl': 'jsonl', '.ndjson': 'jsonl', '.csv': 'csv'}.get(extension, 'json')
+
+  with open(path, 'r', encoding='utf-8', newline='') as file:
+    if format == 'json':
+      yield from JsonArrayReader(file, key=words_key)
+    elif format == 'jsonl':
+      for line in file:
+        if line.strip():
+          yield json.loads(line)
+    elif format == 'csv':
+      yield from csv.DictReader(file)
+    else:
+      raise ValueError(f'Unknown import format: {format}')
+
+def word_row(record):
+  # Get the parts array - could be named either 'parts' or 'letters'
+  parts = record.get('parts') if 'parts' in record else record.get('letters')
+  if isinstance(parts, str):
+    parts = json.loads(parts) if parts.strip() else []
+  return (
+    record['english'],
+    record['arabic'],
+    record.get('root') or '',
+    record.get('transliteration') or '',
+    encode_parts(parts or []),
+    record.get('parts_of_speech') or ''
+  )
+
+def group_id_for(connection, group_name):
+  row = connection.execute('SELECT id FROM groups WHERE name = ? ORDER BY id LIMIT 1', (group_name,)).fetchone()
+  if row:
+    return row[0]
+  return connection.execute('INSERT INTO groups (name) VALUES (?)', (group_name,)).lastrowid
+
+def import_words(connection, records, group_name, batch_size=1000):
+  """Upsert `records` into words and add them to the named group.
+
+  Everything runs in one transaction. Each batch is one executemany() into
+  words plus one set-based insert into word_groups, and the group's
+  words_count is bumped by the number of memberships the batch added.
+  The quiz distractor lists of the imported words and their neighbors are
+  rebuilt once all batches are in. Returns a dict with the number of
+  records read, new words and new memberships.
+  """
+  stats = {'records': 0, 'words_added': 0, 'memberships_added': 0}
+  word_ids = []
+
+  def flush(batch):
+    connection.executemany('''
+      INSERT INTO words (english, arabic, root, transliteration, parts, parts_of_speech)
+      VALUES (?, ?, ?, ?, ?, ?)
+      ON CONFLICT (arabic, english) DO UPDATE SET
+        root = excluded.root,
+        transliteration = excluded.transliteration,
+        parts = excluded.parts
+    ''', batch)
+    connection.executemany('INSERT INTO import_batch (arabic, english) VALUES (?, ?)',
+                           [(row[1], row[0]) for row in batch])
+    added = connection.execute('''
+      INSERT OR IGNORE INTO word_groups (word_id, group_id)
+      SELECT DISTINCT w.id, ?
+      FROM import_batch b
+      JOIN words w ON w.arabic = b.arabic AND w.english = b.english
+    ''', (group_id,)).rowcount
+    connection.execute('UPDATE groups SET words_count = words_count + ? WHERE id = ?', (added, group_id))
+    word_ids.extend(row[0] for row in connection.execute('''
+      SELECT w.id FROM import_batch b
+      JOIN words w ON w.arabic = b.arabic AND w.english = b.english
+    '''))
+    connection.execute('DELETE FROM import_batch')
+    stats['records'] += len(batch)
+    stats['memberships_added'] += added
+
+  connection.execute('CREATE TEMP TABLE IF NOT EXISTS import_batch (arabic TEXT NOT NULL, english TEXT NOT NULL)')
+  words_before = row_count(connection.cursor(), 'words')
+  try:
+    if not connection.in_transaction:
+      connection.execute('BEGIN IMMEDIATE')
+    group_id = group_id_for(connection, group_name)
+    batch = []
+    for record in records:
+      batch.append(word_row(record))
+      if len(batch) >= batch_size:
+        flush(batch)
+        batch = []
+    if batch:
+      flush(batch)
+    refresh_neighbors(connection, word_ids)
+    stats['words_added'] = row_count(connection.cursor(), 'words') - words_before
+    connection.commit()
+  except Exception:
+    connection.rollback()
+    raise
+
+  return stats
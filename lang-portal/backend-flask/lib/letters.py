@@ -0,0 +1,36 @@
+# Letter lookups against the word_letters index from
+# sql/migrations/0013_create_word_letters.sql. A letter given with harakat
+# (كَ) matches that exact combination; a bare letter (ك) matches it however
+# it is voweled.
+
+MAX_LETTERS = 10  # per include or exclude list
+
+TATWEEL = 'ـ'
+
+def normalize_letter(letter):
+  """The form word_letters stores: surrounding space and tatweel dropped."""
+  return letter.strip().replace(TATWEEL, '')
+
+def parse_letters(text):
+  """'ك,تَ' -> ['ك', 'تَ'], duplicates dropped. Raises ValueError."""
+  letters = [normalize_letter(part) for part in (text or '').split(',')]
+  letters = list(dict.fromkeys(letter for letter in letters if letter))
+  if len(letters) > MAX_LETTERS:
+    raise ValueError(f'At most {MAX_LETTERS} letters per list')
+  return letters
+
+def letters_condition(include, exclude, alias='d'):
+  """WHERE clause and parameters for `word_letters {alias}` rows of the
+  words containing every letter in `include` and none in `exclude`.
+
+  The first included letter drives: its word ids are walked in order off
+  the primary key and each is probed for the other letters, so the first
+  page is found without building the whole intersection.
+  """
+  if not include:
+    raise ValueError('include must name at least one letter')
+  probe = f'SELECT 1 FROM word_letters WHERE letter = ? AND word_id = {alias}.word_id'
+  conditions = [f'{alias}.letter = ?']
+  conditions += [f'EXISTS ({probe})'] * (len(include) - 1)
+  conditions += [f'NOT EXISTS ({probe})'] * len(exclude)
+  return ' AND '.join(conditions), [*include, *exclude]
@@ -0,0 +1,87 @@
+import json
+
+# Set-based changes to group membership. Each operation is a handful of
+# INSERT ... SELECT / DELETE statements over the whole set of words, run in
+# the caller's transaction, with groups.words_count adjusted by the rows the
+# statements actually touched rather than recounted. The word ids travel as
+# one JSON array parameter and are expanded by json_each.
+
+MAX_WORD_IDS = 100000
+
+def parse_word_ids(payload):
+  """The word_ids list of a request body. Raises ValueError on anything else."""
+  word_ids = payload.get('word_ids') if isinstance(payload, dict) else None
+  if not isinstance(word_ids, list) or not word_ids:
+    raise ValueError('Expected a non-empty list of word_ids')
+  if len(word_ids) > MAX_WORD_IDS:
+    raise ValueError(f'At most {MAX_WORD_IDS} word_ids per request')
+  # bool is an int subclass, so rule it out explicitly
+  if any(not isinstance(word_id, int) or isinstance(word_id, bool) for word_id in word_ids):
+    raise ValueError('word_ids must be integers')
+  return word_ids
+
+def adjust_words_count(connection, group_id, delta):
+  if delta:
+    connection.execute('UPDATE groups SET words_count = words_count + ? WHERE id = ?', (delta, group_id))
+
+def add_words(connection, group_id, word_ids):
+  """Add the words to the group; unknown ids and existing members are
+  skipped. Returns the number of memberships added."""
+  added = connection.execute('''
+    INSERT OR IGNORE INTO word_groups (word_id, group_id)
+    SELECT id, ? FROM words WHERE id IN (SELECT value FROM json_each(?))
+  ''', (group_id, json.dumps(word_ids))).rowcount
+  adjust_words_count(connection, group_id, added)
+  return added
+
+def remove_words(connection, group_id, word_ids):
+  """Take the words out of the group. Returns the number removed."""
+  removed = connection.execute('''
+    DELETE FROM word_groups
+    WHERE group_id = ? AND word_id IN (SELECT value FROM json_each(?))
+  ''', (group_id, json.dumps(word_ids))).rowcount
+  adjust_words_count(connection, group_id, -removed)
+  return removed
+
+def move_words(connection, source_id, target_id, word_ids):
+  """Move those of the words that are in the source group to the target.
+
+  Returns (moved, added): words taken out of the source, and how many of
+  them were not in the target already.
+  """
+  word_ids = json.dumps(word_ids)
+  added = connection.execute('''
+    INSERT OR IGNORE INTO word_groups (word_id, group_id)
+    SELECT word_id, ? FROM word_groups
+    WHERE group_id = ? AND word_id IN (SELECT value FROM json_each(?))
+  ''', (target_id, source_id, word_ids)).rowcount
+  moved = connection.execute('''
+    DELETE FROM word_groups
+    WHERE group_id = ? AND word_id IN (SELECT value FROM json_each(?))
+  ''', (source_id, word_ids)).rowcount
+  adjust_words_count(connection, target_id, added)
+  adjust_words_count(connection, source_id, -moved)
+  return moved, added
+
+def merge_groups(connection, source_id, target_id):
+  """Fold the source group into the target: its words and study sessions
+  move over and the source group is deleted.
+
+  Returns (added, sessions): memberships the target gained and sessions
+  moved.
+  """
+  added = connection.execute('''
+    INSERT OR IGNORE INTO word_groups (word_id, group_id)
+    SELECT word_id, ? FROM word_groups WHERE group_id = ?
+  ''', (target_id, source_id)).rowcount
+  connection.execute('DELETE FROM word_groups WHERE group_id = ?', (source_id,))
+  # Triggers carry the session counters and summaries over (migration 0012)
+  sessions = connection.execute('UPDATE study_sessions SET group_id = ? WHERE group_id = ?',
+                                (target_id, source_id)).rowcount
+  connection.execute('DELETE FROM groups WHERE id = ?', (source_id,))
+  adjust_words_count(connection, target_id, added)
+  # Learner shards re-point their own sessions from this (lib/shards.py)
+  connection.execute('UPDATE group_merges SET target_id = ? WHERE target_id = ?', (target_id, source_id))
+  connection.execute('INSERT OR REPLACE INTO group_merges (source_id, target_id) VALUES (?, ?)',
+                     (source_id, target_id))
+  return added, sessions
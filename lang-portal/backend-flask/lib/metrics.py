@@ -0,0 +1,233 @@
+import bisect
+import sqlite3
+import threading
+import time
+
+# Request and SQL instrumentation, exported in the Prometheus text format at
+# /metrics. Every pooled connection is an InstrumentedConnection; while a
+# request is being served its thread has a RequestStats that the connection
+# reports into:
+#   - the cursor counts the statements it executes (each parameter set of
+#     an executemany() is one);
+#   - the progress handler counts virtual machine steps, a measure of work
+#     that does not depend on how busy the machine is, trigger bodies
+#     included;
+#   - the cursor times execute() and the fetches that follow, and keeps the
+#     statements slower than the threshold with the shape of their bound
+#     parameters (never the values) for the slow query log.
+# Outside a request (review writer thread, tasks) the hooks do nothing.
+
+PROGRESS_STEPS = 1000  # VM instructions between progress handler calls
+SLOW_QUERY_SECONDS = 0.1
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+_local = threading.local()
+
+class RequestStats:
+  __slots__ = ('statements', 'sql_seconds', 'steps', 'slow', 'last', 'slow_seconds')
+
+  def __init__(self, slow_seconds=SLOW_QUERY_SECONDS):
+    self.statements = 0
+    self.sql_seconds = 0.0
+    self.steps = 0
+    self.slow = []     # entries like `last`, for statements over the threshold
+    self.last = None   # [seconds, sql, parameters, many] of the latest execute
+    self.slow_seconds = slow_seconds
+
+  def record(self, seconds, sql, parameters, many=False):
+    self.statements += len(parameters) if many else 1
+    self.sql_seconds += seconds
+    self.last = [seconds, sql, parameters, many]
+    if seconds >= self.slow_seconds:
+      self.slow.append(self.last)
+
+  def fetched(self, seconds):
+    # Rows after the first are produced by the fetches, so charge them to
+    # the statement that is being read
+    self.sql_seconds += seconds
+    last = self.last
+    if last is not None:
+      was_slow = last[0] >= self.slow_seconds
+      last[0] += seconds
+      if not was_slow and last[0] >= self.slow_seconds:
+        self.slow.append(last)
+
+def start_request(slow_seconds=SLOW_QUERY_SECONDS):
+  _local.stats = RequestStats(slow_seconds)
+  return _local.stats
+
+def finish_request():
+  stats = getattr(_local, 'stats', None)
+  _local.stats = None
+  return stats
+
+def parameter_shape(parameters, many=False):
+  """Describe bound parameters by type only, e.g. (int, str) or {q: str}."""
+  if many:
+    parameters = list(parameters)
+    first = parameter_shape(parameters[0]) if parameters else '()'
+    return f'{len(parameters)} x {first}'
+  if isinstance(parameters, dict):
+    return '{' + ', '.join(f'{name}: {type(value).__name__}' for name, value in parameters.items()) + '}'
+  return '(' + ', '.join(type(value).__name__ for value in parameters) + ')'
+
+def _progress():
+  stats = getattr(_local, 'stats', None)
+  if stats is not None:
+    stats.steps += PROGRESS_STEPS
+  return 0  # never interrupt
+
+class InstrumentedCursor(sqlite3.Cursor):
+  def execute(self, sql, parameters=()):
+    stats = getattr(_local, 'stats', None)
+    if stats is None:
+      return super().execute(sql, parameters)
+    start = time.perf_counter()
+    try:
+      return super().execute(sql, parameters)
+    finally:
+      stats.record(time.perf_counter() - start, sql, parameters)
+
+  def executemany(self, sql, seq_of_parameters):
+    stats = getattr(_local, 'stats', None)
+    if stats is None:
+      return super().executemany(sql, seq_of_parameters)
+    seq_of_parameters = list(seq_of_parameters)
+    start = time.perf_counter()
+    try:
+      return super().executemany(sql, seq_of_parameters)
+    finally:
+      stats.record(time.perf_counter() - start, sql, seq_of_parameters, many=True)
+
+  def fetchone(self):
+    return self._timed_fetch(super().fetchone)
+
+  def fetchmany(self, *args, **kwargs):
+    return self._timed_fetch(super().fetchmany, *args, **kwargs)
+
+  def fetchall(self):
+    return self._timed_fetch(super().fetchall)
+
+  def _timed_fetch(self, fetch, *args, **kwargs):
+    stats = getattr(_local, 'stats', None)
+    if stats is None:
+      return fetch(*args, **kwargs)
+    start = time.perf_counter()
+    try:
+      return fetch(*args, **kwargs)
+    finally:
+      stats.fetched(time.perf_counter() - start)
+
+class InstrumentedConnection(sqlite3.Connection):
+  def __init__(self, *args, **kwargs):
+    super().__init__(*args, **kwargs)
+    # Not a trace callback: sqlite3 expands the bound parameters into the
+    # statement text for every trace event, trigger statements included,
+    # which costs more than the statements themselves once a large
+    # parameter fires many triggers
+    self.set_progress_handler(_progress, PROGRESS_STEPS)
+
+  def cursor(self, factory=InstrumentedCursor):
+    return super().cursor(factory)
+
+  def execute(self, sql, parameters=()):
+    return self.cursor().execute(sql, parameters)
+
+  def executemany(self, sql, seq_of_parameters):
+    return self.cursor().executemany(sql, seq_of_parameters)
+
+class Histogram:
+  def __init__(self, name, help, labelnames, buckets):
+    self.name = name
+    self.help = help
+    self.labelnames = labelnames
+    self.buckets = buckets
+    self._series = {}  # labels -> [per-bucket counts..., +Inf count, sum]
+    self._lock = threading.Lock()
+
+  def observe(self, labels, value):
+    index = bisect.bisect_left(self.buckets, value)
+    with self._lock:
+      series = self._series.get(labels)
+      if series is None:
+        series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+      series[index] += 1
+      series[-1] += value
+
+  def render(self):
+    lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+    with self._lock:
+      series = sorted(self._series.items())
+    for labels, counts in series:
+      label_text = ','.join(f'{name}="{escape(value)}"' for name, value in zip(self.labelnames, labels))
+      prefix = label_text + ',' if label_text else ''
+      cumulative = 0
+      for bound, count in zip(self.buckets, counts):
+        cumulative += count
+        lines.append(f'{self.name}_bucket{{{prefix}le="{bound:g}"}} {cumulative}')
+      cumulative += counts[len(self.buckets)]
+      lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {cumulative}')
+      lines.append(f'{self.name}_sum{{{label_text}}} {counts[-1]:.6f}')
+      lines.append(f'{self.name}_count{{{label_text}}} {cumulative}')
+    return lines
+
+class Counter:
+  def __init__(self, name, help, labelnames):
+    self.name = name
+    self.help = help
+    self.labelnames = labelnames
+    self._values = {}
+    self._lock = threading.Lock()
+
+  def inc(self, labels, amount=1):
+    with self._lock:
+      self._values[labels] = self._values.get(labels, 0) + amount
+
+  def render(self):
+    lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+    with self._lock:
+      values = sorted(self._values.items())
+    for labels, value in values:
+      label_text = ','.join(f'{name}="{escape(value)}"' for name, value in zip(self.labelnames, labels))
+      lines.append(f'{self.name}{{{label_text}}} {value}')
+    return lines
+
+def escape(value):
+  return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+class Metrics:
+  """The app's request metrics. Series are labelled by URL rule rather than
+  path, so there is one per route however many ids are requested."""
+  def __init__(self):
+    self.request_seconds = Histogram(
+      'http_request_duration_seconds', 'Time to produce a response (streamed bodies excluded)',
+      ('method', 'route', 'status'), LATENCY_BUCKETS)
+    self.sql_statements = Histogram(
+      'http_request_sql_statements', 'SQL statements executed per request',
+      ('route',), COUNT_BUCKETS)
+    self.sql_seconds = Histogram(
+      'http_request_sql_seconds', 'Time per request spent executing SQL and fetching rows',
+      ('route',), LATENCY_BUCKETS)
+    self.vm_steps = Counter(
+      'sqlite_vm_steps_total', 'SQLite virtual machine steps, in units of %d' % PROGRESS_STEPS, ('route',))
+    self.slow_queries = Counter(
+      'sqlite_slow_queries_total', 'Statements slower than the slow query threshold', ('route',))
+
+  def observe(self, method, route, status, seconds, stats):
+    self.request_seconds.observe((method, route, str(status)), seconds)
+    if stats is not None:
+      self.sql_statements.observe((route,), stats.statements)
+      self.sql_seconds.observe((route,), stats.sql_seconds)
+      if stats.steps:
+        self.vm_steps.inc((route,), stats.steps)
+      if stats.slow:
+        self.slow_queries.inc((route,), len(stats.slow))
+
+  def render(self, extra=()):
+    lines = []
+    for metric in (self.request_seconds, self.sql_statements, self.sql_seconds, self.vm_steps, self.slow_queries):
+      lines.extend(metric.render())
+    lines.extend(extra)
+    return '\n'.join(lines) + '\n'
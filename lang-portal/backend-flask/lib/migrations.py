@@ -0,0 +1,70 @@
+import hashlib
+import os
+import re
+
+# Migrations are numbered SQL files applied in order on top of sql/setup,
+# e.g. sql/migrations/0001_create_row_counts.sql
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sql', 'migrations')
+MIGRATION_FILE = re.compile(r'^(\d{4})_(\w+)\.sql$')
+
+class MigrationError(Exception):
+  pass
+
+def load_migrations(directory=MIGRATIONS_DIR):
+  """Return (version, name, sql, checksum) for each migration file, in order."""
+  migrations = []
+  for filename in sorted(os.listdir(directory)):
+    match = MIGRATION_FILE.match(filename)
+    if not match:
+      continue
+    with open(os.path.join(directory, filename), 'r', encoding='utf-8') as file:
+      sql = file.read()
+    # Checksum the statements, not the line endings they were checked out with
+    checksum = hashlib.sha256(sql.replace('\r\n', '\n').encode('utf-8')).hexdigest()
+    migrations.append((int(match.group(1)), match.group(2), sql, checksum))
+  return migrations
+
+def applied_migrations(connection):
+  connection.execute('''
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+      version INTEGER PRIMARY KEY,
+      name TEXT NOT NULL,
+      checksum TEXT NOT NULL,
+      applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+  ''')
+  connection.commit()
+  rows = connection.execute('SELECT version, name, checksum FROM schema_migrations').fetchall()
+  return {row[0]: (row[1], row[2]) for row in rows}
+
+def migrate(connection, directory=MIGRATIONS_DIR, log=print):
+  """Apply every pending migration, each in its own transaction.
+
+  Already applied migrations are verified against their recorded checksum
+  so an edited migration fails loudly instead of silently diverging.
+  Returns the versions that were applied.
+  """
+  applied = applied_migrations(connection)
+  newly_applied = []
+  for version, name, sql, checksum in load_migrations(directory):
+    if version in applied:
+      if applied[version][1] != checksum:
+        raise MigrationError(f"Migration {version:04d}_{name} was changed after it was applied")
+      continue
+
+    try:
+      # executescript() does no transaction handling of its own, so the
+      # migration and its bookkeeping row commit or roll back together
+      connection.executescript(f'BEGIN;\n{sql}\n;')
+      connection.execute('''
+        INSERT INTO schema_migrations (version, name, checksum) VALUES (?, ?, ?)
+      ''', (version, name, checksum))
+      connection.commit()
+    except Exception as e:
+      if connection.in_transaction:
+        connection.rollback()
+      raise MigrationError(f"Migration {version:04d}_{name} failed: {str(e)}") from e
+
+    log(f"Applied migration {version:04d}_{name}")
+    newly_applied.append(version)
+  return newly_applied
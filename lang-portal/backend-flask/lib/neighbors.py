@@ -0,0 +1,47 @@
+import json
+
+# Upkeep of the distractor index from
+# sql/migrations/0015_create_word_neighbors.sql. Candidates come from the
+# word_neighbor_candidates view; a word's list is rebuilt whenever it, or a
+# word next to it in one of its buckets, is imported or created. In-place
+# edits of a word's Arabic or root are handled by a trigger (0019, now 0021).
+
+REFRESH_CHUNK = 500  # word ids per statement
+
+def refresh(connection, word_ids):
+  """Rebuild the neighbor lists of `word_ids`, of their candidates, whose
+  nearest words may now include them, and of the words that listed them,
+  which an upsert may have moved out of reach. Runs inside the caller's
+  transaction. Returns the number of lists rebuilt."""
+  word_ids = list(dict.fromkeys(word_ids))
+  rebuilt = 0
+  for start in range(0, len(word_ids), REFRESH_CHUNK):
+    ids = json.dumps(word_ids[start:start + REFRESH_CHUNK])
+    connection.execute('''
+      CREATE TEMP TABLE IF NOT EXISTS neighbor_refresh (word_id INTEGER PRIMARY KEY)
+    ''')
+    connection.execute('''
+      INSERT OR IGNORE INTO neighbor_refresh (word_id)
+      SELECT value FROM json_each(?)
+      UNION
+      SELECT neighbor_id FROM word_neighbor_candidates WHERE word_id IN (SELECT value FROM json_each(?))
+      UNION
+      SELECT word_id FROM word_neighbors WHERE neighbor_id IN (SELECT value FROM json_each(?))
+    ''', (ids, ids, ids))
+    connection.execute('''
+      DELETE FROM word_neighbors WHERE word_id IN (SELECT word_id FROM neighbor_refresh)
+    ''')
+    # A pair listed under several tiers keeps the best; LIMIT -1 stops the
+    # subquery from being merged into the GROUP BY, which would compute
+    # every word's candidates (see migration 0021)
+    connection.execute('''
+      INSERT INTO word_neighbors (word_id, neighbor_id, tier)
+      SELECT word_id, neighbor_id, MAX(tier) FROM (
+        SELECT word_id, neighbor_id, tier FROM word_neighbor_candidates
+        WHERE word_id IN (SELECT word_id FROM neighbor_refresh)
+        LIMIT -1
+      )
+      GROUP BY word_id, neighbor_id
+    ''')
+    rebuilt += connection.execute('DELETE FROM neighbor_refresh').rowcount
+  return rebuilt
@@ -0,0 +1,46 @@
+import base64
+import json
+
+# Opaque cursors for keyset pagination: the sort value and id of the last row
+# on a page, so the next page can seek past it instead of OFFSET-skipping.
+
+def encode_cursor(sort_value, row_id):
+  raw = json.dumps([sort_value, row_id], ensure_ascii=False, separators=(',', ':'))
+  return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+  try:
+    padded = cursor + '=' * (-len(cursor) % 4)
+    sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded).decode('utf-8'))
+  except Exception:
+    raise ValueError('Invalid cursor')
+  if not isinstance(row_id, int):
+    raise ValueError('Invalid cursor')
+  return sort_value, row_id
+
+def seek(sort_expr, id_expr, order, cursor):
+  """Return the WHERE condition and parameters that continue after `cursor`.
+
+  Rows must be ordered by `sort_expr {order}, id_expr {order}` for the seek
+  to line up with the page boundary. An empty cursor starts at the top.
+  """
+  if not cursor:
+    return '1', []
+  sort_value, row_id = decode_cursor(cursor)
+  operator = '>' if order == 'asc' else '<'
+  return f'({sort_expr}, {id_expr}) {operator} (?, ?)', [sort_value, row_id]
+
+def next_cursor(rows, limit, sort_key, id_key='id'):
+  """Cursor for the page after `rows`, which were fetched with LIMIT limit + 1."""
+  if len(rows) <= limit:
+    return None
+  last = rows[limit - 1]
+  return encode_cursor(last[sort_key], last[id_key])
+
+def row_count(cursor, table_name, group_id=0):
+  """Read a trigger-maintained row count instead of running COUNT(*)."""
+  cursor.execute('''
+    SELECT count FROM row_counts WHERE table_name = ? AND group_id = ?
+  ''', (table_name, group_id))
+  row = cursor.fetchone()
+  return row[0] if row else 0
@@ -0,0 +1,223 @@
+import itertools
+import queue
+import threading
+
+from lib.serialization import encode
+
+# Live dashboard updates. Writers call notify() once their change is
+# committed; a background thread recomputes the state once for everyone
+# watching that database and hands each subscriber only what changed, so
+# any number of open dashboards cost one computation per write instead of
+# one set of queries per client per poll. Writes that arrive while a
+# computation runs are folded into the next one.
+#
+# Review ingestion notifies the learner it wrote for. New words and group
+# merges change the shared vocabulary every learner's state reads, so they
+# call notify_all(). Adding, removing or moving a group's words changes no
+# dashboard payload and notifies nobody.
+#
+# State is {event name: payload}. The first event of each name a
+# subscriber receives is the full payload; after that, dict payloads are
+# sent as shallow patches holding just the keys whose value changed.
+
+MAX_QUEUED_EVENTS = 100  # per subscriber, before it is resynced from scratch
+KEEPALIVE_SECONDS = 15   # idle time between SSE comments that keep proxies from timing out
+
+def patch(old, new):
+  """What to send when a payload changed from `old` to `new`: the changed
+  keys of a dict, anything else whole."""
+  if isinstance(old, dict) and isinstance(new, dict):
+    return {key: value for key, value in new.items() if key not in old or old[key] != value}
+  return new
+
+def sse(event_id, name, payload):
+  return f'id: {event_id}\nevent: {name}\ndata: {encode(payload)}\n\n'
+
+class Subscription:
+  def __init__(self, learner, max_queued=MAX_QUEUED_EVENTS):
+    self.learner = learner
+    self._queue = queue.Queue(max_queued)
+    self._lock = threading.Lock()
+
+  def push(self, events, state):
+    with self._lock:
+      try:
+        for event in events:
+          self._queue.put_nowait(event)
+      except queue.Full:
+        # Too far behind for patches to be useful: start it over from the
+        # full state
+        self._drain()
+        for event in state:
+          self._queue.put_nowait(event)
+
+  def close(self):
+    with self._lock:
+      try:
+        self._queue.put_nowait(None)
+      except queue.Full:
+        self._drain()
+        self._queue.put_nowait(None)
+
+  def _drain(self):
+    while True:
+      try:
+        self._queue.get_nowait()
+      except queue.Empty:
+        return
+
+  def events(self, keepalive=KEEPALIVE_SECONDS):
+    """SSE text for each queued event, a comment when idle for `keepalive`
+    seconds, until the publisher closes."""
+    while True:
+      try:
+        event = self._queue.get(timeout=keepalive)
+      except queue.Empty:
+        yield ': keepalive\n\n'
+        continue
+      if event is None:
+        return
+      yield sse(*event)
+
+class Publisher:
+  """Recomputes `compute(cursor)` after writes and fans the changes out.
+
+  `resolve(learner)` returns the database a learner's state is read from
+  (None being the shared database), as Db.route() would for a request.
+  """
+  def __init__(self, resolve, compute, max_queued=MAX_QUEUED_EVENTS):
+    self.resolve = resolve
+    self.compute = compute
+    self.max_queued = max_queued
+    self.computations = 0
+    self._ids = itertools.count(1)
+    self._lock = threading.Lock()
+    self._pending = threading.Condition(self._lock)
+    self._dirty = set()
+    self._subscribers = {}  # {learner: set of Subscription}
+    self._states = {}       # {learner: last computed state}
+    self._thread = None
+    self._stopping = False
+
+  def subscribe(self, learner=None):
+    """A new Subscription, primed with the full current state."""
+    subscription = Subscription(learner, self.max_queued)
+    with self._lock:
+      # Registered before anything is computed, so a write committing from
+      # here on marks the learner dirty rather than going unseen
+      self._subscribers.setdefault(learner, set()).add(subscription)
+      state = self._states.get(learner)
+      if state is not None:
+        # Pushed under the lock: the thread's next patches are against this
+        subscription.push(self._full(state), ())
+        return subscription
+    try:
+      state = self._refresh(learner)
+    except Exception:
+      self.unsubscribe(subscription)
+      raise
+    with self._lock:
+      # Whatever was published while we were computing is newer; a write
+      # that landed meanwhile has the thread recompute against this state
+      state = self._states.setdefault(learner, state)
+      subscription.push(self._full(state), ())
+    return subscription
+
+  def unsubscribe(self, subscription):
+    with self._lock:
+      subscribers = self._subscribers.get(subscription.learner)
+      if subscribers is not None:
+        subscribers.discard(subscription)
+        if not subscribers:
+          del self._subscribers[subscription.learner]
+          # Nobody is watching, so stop keeping this state current
+          self._states.pop(subscription.learner, None)
+
+  def notify(self, learner=None):
+    """Called after a write to `learner`'s database has committed."""
+    with self._lock:
+      if learner not in self._subscribers:
+        self._states.pop(learner, None)
+        return
+      self._dirty.add(learner)
+      self._pending.notify()
+    self.start()
+
+  def notify_all(self):
+    """Called after a write to the shared vocabulary has committed."""
+    with self._lock:
+      if not self._subscribers:
+        return
+      self._dirty.update(self._subscribers)
+      self._pending.notify()
+    self.start()
+
+  def start(self):
+    with self._lock:
+      if self._thread is None or not self._thread.is_alive():
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name='dashboard-publisher', daemon=True)
+        self._thread.start()
+
+  def stop(self):
+    """Stop the thread and end every subscriber's stream."""
+    with self._lock:
+      thread = self._thread
+      self._stopping = True
+      self._pending.notify()
+      subscribers = [subscription for group in self._subscribers.values() for subscription in group]
+      self._subscribers.clear()
+      self._states.clear()
+      self._thread = None
+    if thread is not None:
+      thread.join()
+    for subscription in subscribers:
+      subscription.close()
+
+  def subscriber_count(self):
+    with self._lock:
+      return sum(len(group) for group in self._subscribers.values())
+
+  def _refresh(self, learner):
+    database = self.resolve(learner)
+    connection = database.acquire_reader()
+    try:
+      state = self.compute(connection.cursor())
+    finally:
+      database.release_reader(connection)
+    with self._lock:
+      self.computations += 1
+    return state
+
+  def _full(self, state):
+    return [(next(self._ids), name, payload) for name, payload in state.items()]
+
+  def _run(self):
+    while True:
+      with self._lock:
+        while not self._dirty and not self._stopping:
+          self._pending.wait()
+        if self._stopping:
+          return
+        dirty, self._dirty = self._dirty, set()
+
+      for learner in dirty:
+        try:
+          state = self._refresh(learner)
+        except Exception:
+          # Keep the old state; the next write tries again
+          continue
+        with self._lock:
+          old = self._states.get(learner, {})
+          subscribers = list(self._subscribers.get(learner, ()))
+          if not subscribers:
+            continue
+          self._states[learner] = state
+        events = [
+          (next(self._ids), name, patch(old[name], payload) if name in old else payload)
+          for name, payload in state.items() if name not in old or old[name] != payload
+        ]
+        if events:
+          full = self._full(state)
+          for subscription in subscribers:
+            subscription.push(events, full)
@@ -0,0 +1,101 @@
+import json
+
+from lib.word_details import fetch_words
+
+# Multiple-choice quizzes over a group. Questions are drawn with a handful
+# of random seeks into idx_word_groups_group_word and the wrong answers come
+# from the precomputed word_neighbors lists (lib/neighbors.py), so a quiz
+# costs the same few indexed reads however large the group is.
+
+MAX_QUESTIONS = 50
+MAX_CHOICES = 6
+SAMPLE_ROUNDS = 4  # rounds of random seeks before topping up in id order
+
+def sample_words(cursor, group_id, n, rng):
+  """Up to n distinct word ids from the group, in random order.
+
+  Each probe is a random id between the group's lowest and highest word id,
+  resolved to the first member at or after it. A word that follows a gap in
+  the ids is a little more likely to be drawn, which is fine for a quiz.
+  """
+  cursor.execute('''
+    SELECT (SELECT MIN(word_id) FROM word_groups WHERE group_id = ?) AS low,
+           (SELECT MAX(word_id) FROM word_groups WHERE group_id = ?) AS high,
+           (SELECT words_count FROM groups WHERE id = ?) AS words_count
+  ''', (group_id, group_id, group_id))
+  row = cursor.fetchone()
+  if row['low'] is None:
+    return []
+
+  picked = {}
+  if row['words_count'] is not None and row['words_count'] <= n:
+    cursor.execute('SELECT word_id FROM word_groups WHERE group_id = ?', (group_id,))
+    picked = dict.fromkeys(word_id for word_id, in cursor.fetchall())
+  for _ in range(SAMPLE_ROUNDS):
+    if len(picked) >= n:
+      break
+    probes = [rng.randint(row['low'], row['high']) for _ in range(2 * (n - len(picked)))]
+    cursor.execute('''
+      SELECT (SELECT word_id FROM word_groups
+              WHERE group_id = ? AND word_id >= p.value
+              ORDER BY word_id LIMIT 1) AS word_id
+      FROM json_each(?) p
+    ''', (group_id, json.dumps(probes)))
+    for word_id, in cursor.fetchall():
+      if len(picked) < n:
+        picked.setdefault(word_id)
+  if len(picked) < n:
+    cursor.execute('''
+      SELECT word_id FROM word_groups
+      WHERE group_id = ? AND word_id NOT IN (SELECT value FROM json_each(?))
+      ORDER BY word_id LIMIT ?
+    ''', (group_id, json.dumps(list(picked)), n - len(picked)))
+    picked.update(dict.fromkeys(word_id for word_id, in cursor.fetchall()))
+
+  word_ids = list(picked)
+  rng.shuffle(word_ids)
+  return word_ids
+
+def fetch_neighbors(cursor, ids):
+  """{word id: [(tier, neighbor id, english), ...]} from word_neighbors."""
+  cursor.execute('''
+    SELECT n.word_id, n.tier, w.id, w.english
+    FROM json_each(?) ids
+    JOIN word_neighbors n ON n.word_id = ids.value
+    JOIN words w ON w.id = n.neighbor_id
+  ''', (json.dumps(ids),))
+  neighbors = {}
+  for row in cursor.fetchall():
+    neighbors.setdefault(row['word_id'], []).append((row['tier'], row['id'], row['english']))
+  return neighbors
+
+def build_quiz(cursor, group_id, n, choices, rng):
+  """The questions of a quiz: each word with `choices` shuffled answers.
+
+  Wrong answers are the word's neighbors, best tier first and at random
+  within a tier, skipping any with the same English as another choice. A
+  word without enough of them borrows the other quiz words' answers.
+  """
+  words = fetch_words(cursor, sample_words(cursor, group_id, n, rng))
+  neighbors = fetch_neighbors(cursor, [word['id'] for word in words])
+
+  questions = []
+  for word in words:
+    ranked = sorted(neighbors.get(word['id'], []), key=lambda neighbor: (-neighbor[0], rng.random()))
+    spare = [(other['id'], other['english']) for other in words if other is not word]
+    rng.shuffle(spare)
+    options = [(word['id'], word['english'])]
+    seen = {word['english'].casefold()}
+    for word_id, english in [(neighbor_id, english) for _, neighbor_id, english in ranked] + spare:
+      if len(options) >= choices:
+        break
+      if english.casefold() not in seen:
+        seen.add(english.casefold())
+        options.append((word_id, english))
+    rng.shuffle(options)
+    questions.append({
+      'word': word,
+      'answer_id': word['id'],
+      'choices': [{'id': word_id, 'english': english} for word_id, english in options]
+    })
+  return questions
@@ -0,0 +1,189 @@
+import queue
+import threading
+from collections import Counter
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from lib.scheduler import apply_reviews
+
+# Review ingestion with group commit. Request threads hand their batch of
+# review events to a single background thread, which writes everything that
+# queued up while the previous transaction was committing in one
+# transaction. Under load many submissions share one commit instead of each
+# request waiting its turn for the writer lock.
+
+MAX_BATCH_EVENTS = 10000   # stop draining the queue past this many events
+SUBMIT_TIMEOUT = 10        # seconds a request waits for its batch to commit
+
+class SubmitTimeout(Exception):
+  """A batch waited past its timeout and was withdrawn unwritten."""
+
+def parse_events(payload):
+  """Turn a request body into [(word_id, correct), ...].
+
+  Accepts a list of events or {"reviews": [...]}, each event being
+  {"word_id": int, "correct": bool}. Raises ValueError on anything else.
+  """
+  if isinstance(payload, dict):
+    payload = payload.get('reviews')
+  if not isinstance(payload, list) or not payload:
+    raise ValueError('Expected a non-empty list of reviews')
+
+  events = []
+  for event in payload:
+    if not isinstance(event, dict):
+      raise ValueError('Each review must be an object')
+    word_id = event.get('word_id')
+    correct = event.get('correct')
+    # bool is an int subclass, so rule it out explicitly
+    if not isinstance(word_id, int) or isinstance(word_id, bool):
+      raise ValueError('word_id must be an integer')
+    if not isinstance(correct, bool):
+      raise ValueError('correct must be a boolean')
+    events.append((word_id, correct))
+  return events
+
+def write_reviews(connection, session_id, events):
+  """Append the events to word_review_items, bump word_reviews counters and
+  advance each word's spaced-repetition schedule.
+
+  Runs inside the caller's transaction. Returns the number of events written.
+  """
+  connection.executemany('''
+    INSERT INTO word_review_items (word_id, study_session_id, correct)
+    VALUES (?, ?, ?)
+  ''', [(word_id, session_id, correct) for word_id, correct in events])
+
+  # One upsert per distinct word rather than one per event
+  correct = Counter(word_id for word_id, is_correct in events if is_correct)
+  wrong = Counter(word_id for word_id, is_correct in events if not is_correct)
+  connection.executemany('''
+    INSERT INTO word_reviews (word_id, correct_count, wrong_count, last_reviewed)
+    VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT (word_id) DO UPDATE SET
+      correct_count = correct_count + excluded.correct_count,
+      wrong_count = wrong_count + excluded.wrong_count,
+      last_reviewed = excluded.last_reviewed
+  ''', [(word_id, correct[word_id], wrong[word_id]) for word_id in correct.keys() | wrong.keys()])
+  apply_reviews(connection, events)
+  return len(events)
+
+def claim(future):
+  """Mark a queued submission as being written, unless it was withdrawn."""
+  # Only the writer thread starts futures, so a running one is already ours
+  return future.running() or future.set_running_or_notify_cancel()
+
+class ReviewWriter:
+  """Background thread that commits queued review batches together."""
+  def __init__(self, db, max_batch_events=MAX_BATCH_EVENTS):
+    self.db = db
+    self.max_batch_events = max_batch_events
+    self._queue = queue.Queue()
+    self._thread = None
+    self._start_lock = threading.Lock()
+    self._closed = False
+
+  def submit(self, session_id, events, timeout=SUBMIT_TIMEOUT):
+    """Queue a batch and wait until it is committed.
+
+    Returns the number of events written; re-raises whatever made the
+    batch fail. Other batches in the same transaction are unaffected.
+    Raises SubmitTimeout if the batch was still queued after `timeout`
+    seconds; it is then withdrawn, so nothing was written.
+    """
+    future = Future()
+    item = (session_id, events, future)
+    with self._start_lock:
+      closed = self._closed
+      if not closed:
+        self._start()
+        self._queue.put(item)
+    if closed:
+      # No thread to hand it to: write it here, in a transaction of its own
+      self._commit([item])
+      return future.result()
+    try:
+      return future.result(timeout=timeout)
+    except FutureTimeout:
+      if future.cancel():
+        raise SubmitTimeout(f'Reviews were not written within {timeout} seconds')
+      # Already inside a transaction: wait for it rather than report a
+      # failure for a batch that is about to commit
+      return future.result()
+
+  def start(self):
+    with self._start_lock:
+      self._start()
+
+  def _start(self):
+    if self._thread is None or not self._thread.is_alive():
+      self._thread = threading.Thread(target=self._run, name='review-writer', daemon=True)
+      self._thread.start()
+
+  def stop(self):
+    """Finish the queued batches and stop the thread."""
+    with self._start_lock:
+      if self._thread is not None:
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+  def close(self):
+    """Stop for good without waiting: the thread exits once the queued
+    batches are written, and later submissions are written by the caller."""
+    with self._start_lock:
+      self._closed = True
+      if self._thread is not None:
+        self._queue.put(None)
+        self._thread = None
+
+  def _run(self):
+    while True:
+      batch = [self._queue.get()]
+      # Take whatever else queued up while we waited
+      size = len(batch[0][1]) if batch[0] else 0
+      while batch[-1] is not None and size < self.max_batch_events:
+        try:
+          item = self._queue.get_nowait()
+        except queue.Empty:
+          break
+        batch.append(item)
+        size += len(item[1]) if item else 0
+
+      stopping = batch[-1] is None
+      pending = [item for item in batch if item is not None]
+      if pending:
+        self._commit(pending)
+      if stopping:
+        return
+
+  def _commit(self, pending):
+    results = []
+    try:
+      with self.db.write() as connection:
+        if not connection.in_transaction:
+          connection.execute('BEGIN IMMEDIATE')
+        # Past this point a submission can no longer be withdrawn; skip the
+        # ones that timed out while we waited for the writer
+        pending = [item for item in pending if claim(item[2])]
+        # A savepoint per submission, so one bad batch only fails itself
+        for session_id, events, future in pending:
+          connection.execute('SAVEPOINT review_batch')
+          try:
+            results.append((future, write_reviews(connection, session_id, events), None))
+            connection.execute('RELEASE review_batch')
+          except Exception as e:
+            connection.execute('ROLLBACK TO review_batch')
+            connection.execute('RELEASE review_batch')
+            results.append((future, None, e))
+    except Exception as e:
+      # The commit itself failed: nothing was written
+      for _, _, future in pending:
+        if claim(future):
+          future.set_exception(e)
+      return
+
+    for future, written, error in results:
+      if error is None:
+        future.set_result(written)
+      else:
+        future.set_exception(error)
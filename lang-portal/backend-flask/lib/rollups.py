@@ -0,0 +1,122 @@
+# Rebuild and verification of the rollups that triggers maintain
+# incrementally: the dashboard rollups from
+# sql/migrations/0005_create_dashboard_rollups.sql and the session summaries
+# from 0007_create_study_session_summaries.sql.
+
+# Each rollup with the query that computes it from raw history
+ROLLUPS = {
+  'word_review_stats': (
+    'SELECT word_id, attempts, correct, mastered FROM word_review_stats',
+    '''
+      SELECT word_id, COUNT(*), SUM(correct != 0),
+             COUNT(*) >= 5 AND SUM(correct != 0) * 1.0 / COUNT(*) >= 0.8
+      FROM word_review_items
+      GROUP BY word_id
+    '''
+  ),
+  'daily_activity': (
+    'SELECT day, sessions_count, reviews_count, correct_count, streak FROM daily_activity',
+    '''
+      SELECT day, sessions_count, reviews_count, correct_count,
+             CASE WHEN sessions_count > 0
+               THEN ROW_NUMBER() OVER (PARTITION BY sessions_count > 0, island ORDER BY day)
+               ELSE 0 END
+      FROM (
+        SELECT *,
+               -- consecutive days with sessions share julianday(day) - rank
+               julianday(day) - ROW_NUMBER() OVER (PARTITION BY sessions_count > 0 ORDER BY day) AS island
+        FROM (
+          SELECT day, SUM(sessions_count) AS sessions_count, SUM(reviews_count) AS reviews_count,
+                 SUM(correct_count) AS correct_count
+          FROM (
+            SELECT date(timestamp) AS day, 1 AS sessions_count, 0 AS reviews_count, 0 AS correct_count
+            FROM study_sessions
+            UNION ALL
+            SELECT date(created_at), 0, 1, correct != 0 FROM word_review_items
+          )
+          GROUP BY day
+        )
+      )
+      ORDER BY day
+    '''
+  ),
+  'group_activity': (
+    'SELECT day, group_id, sessions_count FROM group_activity',
+    '''
+      SELECT date(timestamp), group_id, COUNT(*)
+      FROM study_sessions
+      GROUP BY date(timestamp), group_id
+    '''
+  ),
+  'study_totals': (
+    'SELECT name, value FROM study_totals',
+    '''
+      SELECT 'reviews', COUNT(*) FROM word_review_items
+      UNION ALL SELECT 'correct_reviews', COALESCE(SUM(correct != 0), 0) FROM word_review_items
+      UNION ALL SELECT 'words_studied', COUNT(DISTINCT word_id) FROM word_review_items
+      UNION ALL
+      SELECT 'mastered_words', COUNT(*) FROM (
+        SELECT word_id FROM word_review_items
+        GROUP BY word_id
+        HAVING COUNT(*) >= 5 AND SUM(correct != 0) * 1.0 / COUNT(*) >= 0.8
+      )
+    '''
+  ),
+  'study_session_summaries': (
+    '''
+      SELECT study_session_id, group_id, activity_id, start_time, last_activity_time,
+             end_time, review_count, correct_count
+      FROM study_session_summaries
+    ''',
+    '''
+      SELECT s.id, s.group_id, s.activity_id, s.timestamp, r.last_activity_time,
+             COALESCE(r.last_activity_time, datetime(s.timestamp, '+30 minutes')),
+             COALESCE(r.review_count, 0), COALESCE(r.correct_count, 0)
+      FROM study_sessions s
+      LEFT JOIN (
+        SELECT study_session_id, MAX(created_at) AS last_activity_time,
+               COUNT(*) AS review_count, SUM(correct != 0) AS correct_count
+        FROM word_review_items
+        GROUP BY study_session_id
+      ) r ON r.study_session_id = s.id
+    '''
+  ),
+}
+
+# Rows whose counts dropped back to zero after deletes are equivalent to
+# missing rows, so they are left out of the comparison
+LIVE_ROWS = {
+  'daily_activity': 'sessions_count + reviews_count > 0',
+  'group_activity': 'sessions_count > 0',
+}
+
+def verify(connection):
+  """Compare every rollup with a recount from history.
+
+  Returns {rollup: number of rows that differ}, empty when all match.
+  """
+  mismatches = {}
+  for name, (stored, expected) in ROLLUPS.items():
+    stored = f"SELECT * FROM ({stored}) WHERE {LIVE_ROWS.get(name, '1')}"
+    count = connection.execute(f'''
+      SELECT (SELECT COUNT(*) FROM (SELECT * FROM ({stored}) EXCEPT SELECT * FROM ({expected})))
+           + (SELECT COUNT(*) FROM (SELECT * FROM ({expected}) EXCEPT SELECT * FROM ({stored})))
+    ''').fetchone()[0]
+    if count:
+      mismatches[name] = count
+  return mismatches
+
+def rebuild(connection):
+  """Recompute every rollup from raw history in one transaction."""
+  try:
+    if not connection.in_transaction:
+      connection.execute('BEGIN IMMEDIATE')
+    for name, (stored, expected) in ROLLUPS.items():
+      # The stored query names the columns the rollup query produces
+      columns = [column[0] for column in connection.execute(f'SELECT * FROM ({stored}) LIMIT 0').description]
+      connection.execute(f'DELETE FROM {name}')
+      connection.execute(f'INSERT INTO {name} ({", ".join(columns)}) {expected}')
+    connection.commit()
+  except Exception:
+    connection.rollback()
+    raise
@@ -0,0 +1,164 @@
+import json
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+# SM-2 spaced-repetition scheduling over binary (correct/wrong) reviews.
+# State lives in word_schedule (sql/migrations/0010_create_word_schedule.sql)
+# and is advanced as reviews are ingested; replay() rebuilds it from
+# word_review_items.
+#
+# Activities report many results per word per sitting (the Typing Tutor
+# posts one per keystroke), so a correct answer only advances a word that
+# is due; correct answers before then leave it where it is. A wrong answer
+# always sends the word back to the start, due again after RELEARN_DELAY.
+
+CORRECT_GRADE = 4   # SM-2 grades run 0-5; 3 and up is a pass
+WRONG_GRADE = 1
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+RELEARN_DELAY = timedelta(minutes=10)
+MAX_NEXT_WORDS = 100
+
+# SQLite's CURRENT_TIMESTAMP format, so stored times compare as text
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+Schedule = namedtuple('Schedule', 'repetitions interval_days ease due last_reviewed')
+
+NEW = Schedule(0, 0.0, DEFAULT_EASE, None, None)
+
+def now():
+  return datetime.now(timezone.utc).strftime(TIME_FORMAT)
+
+def review(state, correct, reviewed_at):
+  """The state after one review at reviewed_at (TIME_FORMAT text)."""
+  if correct and state.due is not None and reviewed_at < state.due:
+    return state._replace(last_reviewed=reviewed_at)
+
+  grade = CORRECT_GRADE if correct else WRONG_GRADE
+  ease = max(MIN_EASE, state.ease + 0.1 - (5 - grade) * (0.08 + (5 - grade) * 0.02))
+  if correct:
+    if state.repetitions == 0:
+      interval = 1.0
+    elif state.repetitions == 1:
+      interval = 6.0
+    else:
+      interval = round(state.interval_days * state.ease, 2)
+    repetitions = state.repetitions + 1
+    delay = timedelta(days=interval)
+  else:
+    interval = 0.0
+    repetitions = 0
+    delay = RELEARN_DELAY
+
+  due = (datetime.strptime(reviewed_at, TIME_FORMAT) + delay).strftime(TIME_FORMAT)
+  return Schedule(repetitions, interval, ease, due, reviewed_at)
+
+def save(connection, states):
+  connection.executemany('''
+    INSERT INTO word_schedule (word_id, repetitions, interval_days, ease, due, last_reviewed)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT (word_id) DO UPDATE SET
+      repetitions = excluded.repetitions,
+      interval_days = excluded.interval_days,
+      ease = excluded.ease,
+      due = excluded.due,
+      last_reviewed = excluded.last_reviewed
+  ''', [(word_id, *state) for word_id, state in states.items()])
+
+def apply_reviews(connection, events, reviewed_at=None):
+  """Advance word_schedule for [(word_id, correct), ...] in order.
+
+  Runs inside the caller's transaction.
+  """
+  reviewed_at = reviewed_at or now()
+  word_ids = list(dict.fromkeys(word_id for word_id, _ in events))
+  states = {word_id: NEW for word_id in word_ids}
+  for row in connection.execute('''
+    SELECT word_id, repetitions, interval_days, ease, due, last_reviewed
+    FROM word_schedule
+    WHERE word_id IN (SELECT value FROM json_each(?))
+  ''', (json.dumps(word_ids),)):
+    states[row[0]] = Schedule(*row[1:])
+
+  for word_id, correct in events:
+    states[word_id] = review(states[word_id], correct, reviewed_at)
+  save(connection, states)
+
+def next_words(connection, n, group_id=None, at=None):
+  """The n words to study next as [(word_id, due, status), ...].
+
+  Words that are due come first, most overdue first; then words never
+  reviewed; then the ones coming due soonest. Each part is one range scan
+  of the due index, for the group when group_id is given.
+  """
+  at = at or now()
+  if group_id is None:
+    table, scope, params = 'word_schedule', '1', ()
+  else:
+    table, scope, params = 'group_word_schedule', 'group_id = ?', (group_id,)
+
+  picked = []
+  for status, condition, order, bounds in (
+    ('due', 'due <= ?', 'due', (at,)),
+    ('new', 'due IS NULL', 'word_id', ()),
+    ('upcoming', 'due > ?', 'due', (at,)),
+  ):
+    if len(picked) >= n:
+      break
+    rows = connection.execute(f'''
+      SELECT word_id, due FROM {table}
+      WHERE {scope} AND {condition}
+      ORDER BY {order}, word_id
+      LIMIT ?
+    ''', (*params, *bounds, n - len(picked))).fetchall()
+    picked.extend((row[0], row[1], status) for row in rows)
+  return picked
+
+def replay(connection, batch_size=1000):
+  """Rebuild word_schedule, and group_word_schedule from it, from every
+  review in word_review_items.
+
+  Returns the number of reviews replayed.
+  """
+  try:
+    if not connection.in_transaction:
+      connection.execute('BEGIN IMMEDIATE')
+    # Emptied first so the due triggers have no group rows to chase while
+    # the schedule is rewritten; they are copied over once at the end
+    connection.execute('DELETE FROM group_word_schedule')
+    connection.execute('DELETE FROM word_schedule')
+    connection.execute('INSERT INTO word_schedule (word_id) SELECT id FROM words')
+
+    cursor = connection.execute('''
+      SELECT word_id, correct, created_at FROM word_review_items
+      ORDER BY word_id, created_at, id
+    ''')
+    states = {}
+    replayed = 0
+    word_id, state = None, None
+    for row_word_id, correct, created_at in cursor:
+      if row_word_id != word_id:
+        if word_id is not None:
+          states[word_id] = state
+        word_id, state = row_word_id, NEW
+      # created_at may have been written in ISO format by other clients
+      reviewed_at = datetime.fromisoformat(created_at).strftime(TIME_FORMAT)
+      state = review(state, correct, reviewed_at)
+      replayed += 1
+      if len(states) >= batch_size:
+        save(connection, states)
+        states = {}
+    if word_id is not None:
+      states[word_id] = state
+    save(connection, states)
+    connection.execute('''
+      INSERT INTO group_word_schedule (group_id, word_id, due)
+      SELECT wg.group_id, wg.word_id, s.due
+      FROM word_groups wg
+      JOIN word_schedule s ON s.word_id = wg.word_id
+    ''')
+    connection.commit()
+    return replayed
+  except Exception:
+    connection.rollback()
+    raise
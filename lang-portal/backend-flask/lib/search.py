@@ -0,0 +1,52 @@
+import re
+
+# Full-text search over words through the words_fts table from
+# sql/migrations/0008_create_words_fts.sql. Arabic text is indexed in a
+# normalized form, and queries are normalized the same way before matching.
+
+# Must match the replace() chain in the words_search_source view
+ARABIC_NORMALIZATION = {
+  # Tashkeel (fathatan through sukun), superscript alef and tatweel are dropped
+  **{chr(code): '' for code in range(0x064B, 0x0653)},
+  '\u0670': '',
+  '\u0640': '',
+  # Hamza and alef variants fold to their bare letters
+  '\u0623': '\u0627',  # alef with hamza above -> alef
+  '\u0625': '\u0627',  # alef with hamza below -> alef
+  '\u0622': '\u0627',  # alef with madda -> alef
+  '\u0671': '\u0627',  # alef wasla -> alef
+  '\u0624': '\u0648',  # waw with hamza -> waw
+  '\u0626': '\u064A',  # yeh with hamza -> yeh
+  '\u0649': '\u064A',  # alef maksura -> yeh
+  '\u0629': '\u0647',  # teh marbuta -> heh
+}
+
+_normalization = str.maketrans(ARABIC_NORMALIZATION)
+
+# Terms are runs of letters and digits; everything else separates them
+TERM = re.compile(r'\w+')
+
+def normalize_arabic(text):
+  return text.translate(_normalization) if text else text
+
+def normalize_root(root):
+  """The key a root is stored under in word_roots: folded, without spaces."""
+  return normalize_arabic(root or '').replace(' ', '')
+
+def match_query(q):
+  """Build an FTS5 MATCH expression from user input.
+
+  Every term must match, the last one as a prefix so results show up while
+  the user is still typing. Returns None when q has no searchable terms.
+  """
+  terms = TERM.findall(normalize_arabic(q or ''))
+  if not terms:
+    return None
+  # Roots are shown with spaces between their letters ("ك ت ب") but
+  # indexed without them
+  if len(terms) > 1 and all(len(term) == 1 for term in terms):
+    terms = [''.join(terms)]
+  # Quoting each term keeps FTS5 syntax (AND, NEAR, column:...) out of user input
+  quoted = [f'"{term}"' for term in terms]
+  quoted[-1] += '*'
+  return ' '.join(quoted)
@@ -0,0 +1,83 @@
+import json
+import secrets
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+  import orjson
+except ImportError:  # optional: fall back to the standard library encoder
+  orjson = None
+
+# JSON encoding for every response. Values that are already JSON text in the
+# database (words.parts) are wrapped in RawJSON and spliced into the output
+# as-is rather than decoded only to be encoded again. orjson is used when it
+# is installed.
+
+if orjson is not None:
+  def encode(obj):
+    """Compact JSON text for plain values (no RawJSON)."""
+    return orjson.dumps(obj).decode('utf-8')
+else:
+  encode = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+
+class RawJSON:
+  """A fragment of already-serialized JSON to embed without re-encoding."""
+  __slots__ = ('json',)
+
+  def __init__(self, json):
+    self.json = json
+
+def raw_parts(parts):
+  """words.parts as a RawJSON fragment; empty parts become {} as before."""
+  return RawJSON(parts or '{}')
+
+# orjson 3.9+ can embed fragments itself
+FRAGMENT = getattr(orjson, 'Fragment', None)
+
+class JSONProvider(DefaultJSONProvider):
+  sort_keys = False
+
+  def dumps(self, obj, **kwargs):
+    if kwargs or orjson is None:
+      # indent/separators from Flask, or no orjson: the standard encoder
+      return self._splice(lambda default: json.dumps(
+        obj, default=default, ensure_ascii=False, sort_keys=self.sort_keys, **kwargs), native=False)
+    return self._splice(lambda default: orjson.dumps(
+      obj, default=default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8'))
+
+  def response(self, *args, **kwargs):
+    obj = self._prepare_response_obj(args, kwargs)
+    if orjson is None or self._app.debug or self.compact is False:
+      return super().response(obj)
+    body = self._splice(lambda default: orjson.dumps(
+      obj, default=default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE).decode('utf-8'))
+    return self._app.response_class(body, mimetype=self.mimetype)
+
+  def _splice(self, encode, native=True):
+    # Without native fragments each RawJSON is encoded as the same
+    # placeholder string, carrying a per-call nonce so no user string can
+    # match it. Encoders emit them in order, so splitting the output on the
+    # placeholder and interleaving the fragments puts each one back.
+    fragments = []
+    marker = None
+
+    def default(value):
+      nonlocal marker
+      if isinstance(value, RawJSON):
+        if native and FRAGMENT is not None:
+          return FRAGMENT(value.json)
+        if marker is None:
+          marker = f'\x00{secrets.token_hex(8)}\x00'
+        fragments.append(value.json)
+        return marker
+      return DefaultJSONProvider.default(value)
+
+    text = encode(default)
+    if not fragments:
+      return text
+    pieces = text.split('"' + marker.replace('\x00', '\\u0000') + '"')
+    spliced = [pieces[0]]
+    for fragment, piece in zip(fragments, pieces[1:]):
+      spliced.append(fragment)
+      spliced.append(piece)
+    return ''.join(spliced)
@@ -0,0 +1,286 @@
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from urllib.parse import quote
+
+from lib.db import Db
+from lib.migrations import MigrationError
+from lib.reviews import ReviewWriter
+from lib.template import create_schema
+
+# Per-learner databases. The vocabulary (words, groups and what is derived
+# from them) stays in the shared database; each learner's study history
+# (sessions, reviews and their rollups) lives in its own SQLite file under
+# LEARNER_DB_DIR, so learners never wait on each other's writes.
+#
+# A learner's connections open their shard as `main` and attach the shared
+# database as `vocabulary`. Shards have no vocabulary tables of their own,
+# so unqualified names like `words` resolve to the attached database and the
+# existing queries run unchanged. The shard's triggers only ever touch the
+# shard: SQLite binds a trigger's table names to its own schema. The shared
+# database is attached read-only, which also keeps BEGIN IMMEDIATE in a shard
+# from taking its write lock; vocabulary changes go through requests that
+# name no learner.
+
+LEARNER_HEADER = 'X-Learner-Id'
+LEARNER_ID = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+MAX_OPEN_SHARDS = 64
+SHARD_POOL_SIZE = 2
+
+# Tables and views that belong to the shared database only
+VOCABULARY_TABLES = (
+  'words', 'groups', 'word_groups', 'study_activities', 'word_roots', 'words_fts', 'word_letters',
+  'word_trigrams', 'word_trigram_counts', 'trigram_positions', 'word_shapes', 'word_neighbors',
+  'group_merges',
+)
+VOCABULARY_VIEWS = (
+  'words_search_source', 'word_letters_source', 'word_trigrams_source', 'word_shapes_source',
+  'word_neighbor_candidates',
+)
+
+# Vocabulary tables whose changes the shard's own rows follow; their
+# table_versions tell a shard when it has to resync
+SYNCED_TABLES = ('words', 'word_groups', 'group_merges')
+
+# Bookkeeping tables that hold rows for both sides. Learner connections see
+# them through TEMP views (searched before main) merging the vocabulary rows
+# from the shared database with the learner's own.
+SPLIT_TABLES = ('row_counts', 'table_versions')
+
+def learner_id(request):
+  """The learner a request is for, or None. Raises ValueError if malformed."""
+  learner = request.headers.get(LEARNER_HEADER) or request.args.get('learner_id')
+  if learner is None:
+    return None
+  if not LEARNER_ID.match(learner):
+    raise ValueError('learner id must be 1-64 letters, digits, "-" or "_"')
+  return learner
+
+def learner_files(directory):
+  """(learner, path) of every shard file in `directory`, by learner id."""
+  learners = []
+  for name in sorted(os.listdir(directory)):
+    match = re.fullmatch(r'learner_(.+)\.db', name)
+    if match and LEARNER_ID.match(match.group(1)):
+      learners.append((match.group(1), os.path.join(directory, name)))
+  return learners
+
+def build_template():
+  """An in-memory database with the learner-side schema: everything the
+  migrations build, minus the vocabulary."""
+  connection = sqlite3.connect(':memory:')
+  create_schema(connection)
+
+  placeholders = ', '.join('?' * len(VOCABULARY_TABLES))
+  for view in VOCABULARY_VIEWS:
+    connection.execute(f'DROP VIEW IF EXISTS {view}')
+  for table in VOCABULARY_TABLES:
+    connection.execute(f'DROP TABLE IF EXISTS {table}')
+  for table in SPLIT_TABLES:
+    connection.execute(f'DELETE FROM {table} WHERE table_name IN ({placeholders})', VOCABULARY_TABLES)
+  connection.commit()
+  return connection
+
+def schema_version(connection):
+  return connection.execute('SELECT MAX(version) FROM schema_migrations').fetchone()[0]
+
+def vocabulary_stamp(connection):
+  """The shared database's versions of SYNCED_TABLES."""
+  placeholders = ', '.join('?' * len(SYNCED_TABLES))
+  return tuple(connection.execute(f'''
+    SELECT version FROM vocabulary.table_versions WHERE table_name IN ({placeholders}) ORDER BY table_name
+  ''', SYNCED_TABLES).fetchall())
+
+def sync_vocabulary(connection):
+  """Bring the shard's per-word schedule rows in line with the vocabulary,
+  and move its study sessions out of groups that were merged away.
+
+  In the shared database triggers on words and word_groups, and
+  merge_groups() itself, do this; they cannot reach across databases, so
+  shards catch up when they are handed out after the vocabulary changed
+  (LearnerDb.sync()).
+  """
+  connection.executescript('''
+    BEGIN;
+    INSERT OR IGNORE INTO word_schedule (word_id) SELECT id FROM vocabulary.words;
+    DELETE FROM word_schedule WHERE word_id NOT IN (SELECT id FROM vocabulary.words);
+    INSERT OR IGNORE INTO group_word_schedule (group_id, word_id, due)
+    SELECT wg.group_id, wg.word_id, s.due
+    FROM vocabulary.word_groups wg
+    JOIN word_schedule s ON s.word_id = wg.word_id;
+    DELETE FROM group_word_schedule WHERE NOT EXISTS (
+      SELECT 1 FROM vocabulary.word_groups wg
+      WHERE wg.group_id = group_word_schedule.group_id AND wg.word_id = group_word_schedule.word_id
+    );
+    -- The group_id triggers (migration 0012) move the counters along
+    UPDATE study_sessions
+    SET group_id = (SELECT target_id FROM vocabulary.group_merges WHERE source_id = study_sessions.group_id)
+    WHERE group_id IN (SELECT source_id FROM vocabulary.group_merges);
+    COMMIT;
+  ''')
+
+class LearnerDb(Db):
+  """One learner's shard, with the shared database attached."""
+  def __init__(self, learner, database, vocabulary, **kwargs):
+    super().__init__(database, **kwargs)
+    self.learner = learner
+    self.vocabulary = vocabulary
+    self.review_writer = ReviewWriter(self)
+    # vocabulary_stamp() as of the last sync_vocabulary()
+    self.synced = None
+    self.closed = False
+    self._writer_depth = 0
+
+  def connect(self, readonly=False):
+    connection = super().connect()
+    connection.execute('ATTACH DATABASE ? AS vocabulary', (f'file:{quote(os.path.abspath(self.vocabulary))}?mode=ro',))
+    placeholders = ', '.join(f"'{table}'" for table in VOCABULARY_TABLES)
+    for table in SPLIT_TABLES:
+      connection.execute(f'''
+        CREATE TEMP VIEW {table} AS
+        SELECT * FROM vocabulary.{table} WHERE table_name IN ({placeholders})
+        UNION ALL
+        SELECT * FROM main.{table} WHERE table_name NOT IN ({placeholders})
+      ''')
+    if readonly:
+      connection.execute('PRAGMA query_only = ON')
+    return connection
+
+  def sync(self):
+    """Resync the schedule rows if words or group membership changed since
+    the last sync. A read of two rows when nothing did."""
+    connection = self.acquire_reader()
+    try:
+      stamp = vocabulary_stamp(connection)
+    finally:
+      self.release_reader(connection)
+    if stamp == self.synced:
+      return
+    with self.write() as connection:
+      # Read before syncing: a change landing in between leaves the stamp
+      # behind, so the next call syncs again rather than missing it
+      stamp = vocabulary_stamp(connection)
+      if stamp != self.synced:
+        sync_vocabulary(connection)
+        self.synced = stamp
+
+  # Once evicted, a shard's connections are closed as they are handed back
+  # rather than pooled: requests that got the shard before its eviction
+  # finish with it, and nothing is left open behind them.
+
+  def release_reader(self, connection):
+    with self._pool_lock:
+      if not self.closed:
+        super().release_reader(connection)
+        return
+      self._readers_open -= 1
+    connection.close()
+
+  def acquire_writer(self):
+    connection = super().acquire_writer()
+    self._writer_depth += 1
+    return connection
+
+  def release_writer(self):
+    # Only the thread holding the writer lock gets here
+    self._writer_depth -= 1
+    if self.closed and self._writer_depth == 0 and self._writer is not None:
+      self._writer.close()
+      self._writer = None
+    super().release_writer()
+
+  def dispose(self):
+    with self._pool_lock:
+      self.closed = True
+    # Queued review batches are still written, without waiting for them here
+    self.review_writer.close()
+    self.close_idle_readers()
+    # A writer in use is closed by its release_writer()
+    if self._writer_lock.acquire(blocking=False):
+      try:
+        # The lock is reentrant: this thread may be the one using it
+        if self._writer is not None and self._writer_depth == 0:
+          self._writer.close()
+          self._writer = None
+      finally:
+        self._writer_lock.release()
+
+class LearnerShards:
+  """Opens learner shards on demand, keeping the most recently used
+  `capacity` of them (and their connection pools) open."""
+  def __init__(self, vocabulary, directory, capacity=MAX_OPEN_SHARDS, pool_size=SHARD_POOL_SIZE):
+    self.vocabulary = vocabulary
+    self.directory = directory
+    self.capacity = capacity
+    self.pool_size = pool_size
+    self.opened = 0
+    self.evictions = 0
+    self._shards = OrderedDict()
+    self._lock = threading.Lock()
+    self._template = None
+    os.makedirs(directory, exist_ok=True)
+
+  def path(self, learner):
+    return os.path.join(self.directory, f'learner_{learner}.db')
+
+  def for_request(self, request):
+    learner = learner_id(request)
+    return None if learner is None else self.get(learner)
+
+  def get(self, learner):
+    """The learner's LearnerDb, creating the shard file on first use."""
+    evicted = []
+    with self._lock:
+      shard = self._shards.get(learner)
+      if shard is not None:
+        self._shards.move_to_end(learner)
+      else:
+        shard = self.open(learner)
+        self._shards[learner] = shard
+        self.opened += 1
+        while len(self._shards) > self.capacity:
+          evicted.append(self._shards.popitem(last=False)[1])
+          self.evictions += 1
+    # Requests already holding an evicted shard's connections keep them
+    # until they are done, then they are closed too
+    for old in evicted:
+      old.dispose()
+    shard.sync()
+    return shard
+
+  def open(self, learner):
+    if self._template is None:
+      self._template = build_template()
+    path = self.path(learner)
+    if not os.path.exists(path):
+      connection = sqlite3.connect(path)
+      try:
+        self._template.backup(connection)
+      finally:
+        connection.close()
+
+    shard = LearnerDb(learner, path, self.vocabulary, pool_size=self.pool_size)
+    with shard.write() as connection:
+      if schema_version(connection) != schema_version(self._template):
+        raise MigrationError(f"Learner shard {path} does not match the current migrations")
+    return shard
+
+  def close(self):
+    with self._lock:
+      shards = list(self._shards.values())
+      self._shards.clear()
+    for shard in shards:
+      shard.dispose()
+
+  def reset(self):
+    """Close every shard and delete the learner databases."""
+    self.close()
+    for name in os.listdir(self.directory):
+      if re.fullmatch(r'learner_.+\.db(-wal|-shm)?', name):
+        os.remove(os.path.join(self.directory, name))
+
+  def stats(self):
+    with self._lock:
+      return {'open': len(self._shards), 'opened': self.opened, 'evictions': self.evictions}
@@ -0,0 +1,53 @@
+import zlib
+
+from lib.serialization import encode
+
+# Generators for streaming large result sets straight from a cursor, so a
+# response starts as soon as the first rows are read and memory stays flat
+# however many rows there are.
+
+FETCH_SIZE = 500          # rows per fetchmany()
+CHUNK_BYTES = 64 * 1024   # buffer this much output before yielding it
+
+def rows(cursor, fetch_size=FETCH_SIZE):
+  while True:
+    batch = cursor.fetchmany(fetch_size)
+    if not batch:
+      return
+    yield from batch
+
+def buffered(pieces, chunk_bytes=CHUNK_BYTES):
+  """Join small string pieces into chunks of about chunk_bytes of UTF-8."""
+  buffer = []
+  size = 0
+  for piece in pieces:
+    buffer.append(piece)
+    size += len(piece)
+    if size >= chunk_bytes:
+      yield ''.join(buffer).encode('utf-8')
+      buffer = []
+      size = 0
+  if buffer:
+    yield ''.join(buffer).encode('utf-8')
+
+def ndjson(documents):
+  """One JSON document per line."""
+  for document in documents:
+    yield document + '\n'
+
+def json_array(documents):
+  """The documents as one JSON array, written out as they arrive."""
+  yield '['
+  for i, document in enumerate(documents):
+    yield (',\n' if i else '\n') + document
+  yield '\n]\n'
+
+def gzipped(chunks, level=6):
+  """Gzip a byte stream, flushing after every chunk so the client can start
+  decompressing before the stream ends."""
+  compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip container
+  for chunk in chunks:
+    data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    if data:
+      yield data
+  yield compressor.flush()
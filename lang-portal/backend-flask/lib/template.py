@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+
+from lib.importer import import_words, read_records
+from lib.migrations import MIGRATIONS_DIR, load_migrations, migrate
+
+# A seeded database built once and cloned wherever a fresh database is
+# needed (invoke init-db, POST /api/full_reset), instead of replaying the
+# setup SQL, the migrations and the seed importers each time. Templates are
+# named by a fingerprint of everything that goes into them, so editing a
+# migration or a seed file builds a new one on next use.
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SETUP_DIR = os.path.join(BACKEND_DIR, 'sql', 'setup')
+TEMPLATE_DIR = os.path.join(BACKEND_DIR, 'build')
+SEED_DIR = os.path.join(BACKEND_DIR, 'seed')
+
+# (group, file, key of the words array)
+SEED_WORDS = (
+  ('Core Verbs', 'data_verbs.json', 'verbs'),
+  ('Core Adjectives', 'data_adjectives.json', 'adjectives'),
+)
+SEED_ACTIVITIES = 'study_activities.json'
+
+# The base schema under sql/setup, in dependency order
+SETUP_FILES = (
+  'create_table_words.sql',
+  'create_table_word_reviews.sql',
+  'create_table_word_review_items.sql',
+  'create_table_groups.sql',
+  'create_table_word_groups.sql',
+  'create_table_study_activities.sql',
+  'create_table_study_sessions.sql',
+)
+
+def create_schema(connection):
+  """The setup tables plus every migration, on an empty database."""
+  for sql_file in SETUP_FILES:
+    with open(os.path.join(SETUP_DIR, sql_file), 'r', encoding='utf-8') as file:
+      connection.executescript(file.read())
+  migrate(connection, log=lambda message: None)
+
+def seed(connection, seed_dir=SEED_DIR):
+  """Import the seed groups and study activities."""
+  for group_name, filename, words_key in SEED_WORDS:
+    import_words(connection, read_records(os.path.join(seed_dir, filename), words_key=words_key), group_name)
+  with open(os.path.join(seed_dir, SEED_ACTIVITIES), 'r', encoding='utf-8') as file:
+    activities = json.load(file)
+  connection.executemany('INSERT INTO study_activities (name, url, preview_url) VALUES (?, ?, ?)', [
+    (activity['name'], activity['url'], activity['preview_url']) for activity in activities
+  ])
+  connection.commit()
+
+def fingerprint(seed_dir=SEED_DIR):
+  """Hash of the setup SQL, the migrations and the seed data."""
+  digest = hashlib.sha256()
+  for sql_file in SETUP_FILES:
+    with open(os.path.join(SETUP_DIR, sql_file), 'rb') as file:
+      digest.update(file.read().replace(b'\r\n', b'\n'))
+  for version, name, sql, checksum in load_migrations(MIGRATIONS_DIR):
+    digest.update(checksum.encode('ascii'))
+  for filename in sorted(os.listdir(seed_dir)):
+    with open(os.path.join(seed_dir, filename), 'rb') as file:
+      digest.update(filename.encode('utf-8') + file.read().replace(b'\r\n', b'\n'))
+  return digest.hexdigest()[:16]
+
+def build(path, populate):
+  """Write a compact, single-file database to `path` via populate(connection)."""
+  connection = sqlite3.connect(path)
+  try:
+    populate(connection)
+    connection.commit()
+    connection.execute('VACUUM')
+  finally:
+    connection.close()
+
+def ensure_template(directory=TEMPLATE_DIR, seed_dir=SEED_DIR):
+  """Path of the seeded template for the current schema, building it if needed."""
+  path = os.path.join(directory, f'words-{fingerprint(seed_dir)}.db')
+  if not os.path.exists(path):
+    os.makedirs(directory, exist_ok=True)
+    # Build beside the final name and rename, so a concurrent reader never
+    # sees a half-built template
+    fd, partial = tempfile.mkstemp(dir=directory, suffix='.partial')
+    os.close(fd)
+    try:
+      build(partial, lambda connection: (create_schema(connection), seed(connection, seed_dir)))
+      os.replace(partial, path)
+    finally:
+      if os.path.exists(partial):
+        os.remove(partial)
+  return path
+
+def clone(template, target):
+  """Overwrite `target` (a path or an open connection) with the template
+  using the online backup API. `template` may be a path or a file: URI."""
+  source = sqlite3.connect(template, uri=template.startswith('file:'))
+  try:
+    if isinstance(target, sqlite3.Connection):
+      source.backup(target)
+      return
+    destination = sqlite3.connect(target)
+    try:
+      source.backup(destination)
+    finally:
+      destination.close()
+  finally:
+    source.close()
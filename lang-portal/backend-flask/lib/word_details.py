@@ -0,0 +1,116 @@
+import json
+
+from lib.serialization import raw_parts
+
+# Batched lookups behind GET /api/words?ids= and the include= expansions.
+# However many words are asked for, each piece (the words themselves, their
+# groups, their recent reviews) is one query: the ids are bound as a single
+# JSON array and expanded by json_each, so the statement count is fixed
+# instead of growing with the page.
+
+MAX_IDS = 500
+RECENT_REVIEWS = 10  # review items returned per word with include=reviews
+INCLUDES = ('groups', 'reviews')
+
+def parse_ids(text):
+  """'1,2,3' -> [1, 2, 3], duplicates dropped. Raises ValueError."""
+  ids = []
+  for part in text.split(','):
+    part = part.strip()
+    if not part:
+      continue
+    if not part.isdigit():
+      raise ValueError('ids must be a comma-separated list of integers')
+    ids.append(int(part))
+  ids = list(dict.fromkeys(ids))
+  if not ids:
+    raise ValueError('ids must name at least one word')
+  if len(ids) > MAX_IDS:
+    raise ValueError(f'At most {MAX_IDS} ids per request')
+  return ids
+
+def parse_include(text):
+  """'groups,reviews' -> ['groups', 'reviews']. Raises ValueError."""
+  include = [part.strip() for part in (text or '').split(',') if part.strip()]
+  unknown = [part for part in include if part not in INCLUDES]
+  if unknown:
+    raise ValueError(f"Unknown include: {', '.join(unknown)} (expected {', '.join(INCLUDES)})")
+  return list(dict.fromkeys(include))
+
+def word_data(word):
+  return {
+    'id': word['id'],
+    'english': word['english'],
+    'arabic': word['arabic'],
+    'root': word['root'],
+    'transliteration': word['transliteration'],
+    'parts': raw_parts(word['parts']),
+    'correct_count': word['correct_count'],
+    'wrong_count': word['wrong_count']
+  }
+
+def fetch_words(cursor, ids):
+  """The words with these ids, in the order asked for; unknown ids are skipped."""
+  cursor.execute('''
+    SELECT w.id, w.english, w.arabic, w.root, w.transliteration, w.parts,
+           COALESCE(r.correct_count, 0) AS correct_count,
+           COALESCE(r.wrong_count, 0) AS wrong_count
+    FROM json_each(?) ids
+    JOIN words w ON w.id = ids.value
+    LEFT JOIN word_reviews r ON r.word_id = w.id
+    ORDER BY ids.key
+  ''', (json.dumps(ids),))
+  return [word_data(word) for word in cursor.fetchall()]
+
+def fetch_groups(cursor, ids):
+  """{word id: [{id, name}, ...]} for the words' groups."""
+  cursor.execute('''
+    SELECT wg.word_id, g.id, g.name
+    FROM json_each(?) ids
+    JOIN word_groups wg ON wg.word_id = ids.value
+    JOIN groups g ON g.id = wg.group_id
+    ORDER BY wg.word_id, g.name, g.id
+  ''', (json.dumps(ids),))
+  groups = {}
+  for row in cursor.fetchall():
+    groups.setdefault(row['word_id'], []).append({'id': row['id'], 'name': row['name']})
+  return groups
+
+def fetch_reviews(cursor, ids, limit=RECENT_REVIEWS):
+  """{word id: [review item, ...]}, newest first, at most `limit` per word.
+
+  Each word's items are a bounded walk back along the word_id index, so a
+  long review history costs no more than a short one.
+  """
+  cursor.execute('''
+    SELECT i.word_id, i.id, i.study_session_id, i.correct, i.created_at
+    FROM json_each(?) ids
+    JOIN word_review_items i ON i.id IN (
+      SELECT id FROM word_review_items WHERE word_id = ids.value ORDER BY id DESC LIMIT ?
+    )
+    ORDER BY i.word_id, i.id DESC
+  ''', (json.dumps(ids), limit))
+  reviews = {}
+  for row in cursor.fetchall():
+    reviews.setdefault(row['word_id'], []).append({
+      'id': row['id'],
+      'study_session_id': row['study_session_id'],
+      'correct': bool(row['correct']),
+      'created_at': row['created_at']
+    })
+  return reviews
+
+def expand(cursor, words, include):
+  """Add the include= expansions to formatted words, one query per expansion."""
+  if not words:
+    return words
+  ids = [word['id'] for word in words]
+  if 'groups' in include:
+    groups = fetch_groups(cursor, ids)
+    for word in words:
+      word['groups'] = groups.get(word['id'], [])
+  if 'reviews' in include:
+    reviews = fetch_reviews(cursor, ids)
+    for word in words:
+      word['reviews'] = reviews.get(word['id'], [])
+  return words
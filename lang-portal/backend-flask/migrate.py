@@ -1,31 +1,21 @@
-import sqlite3
-import os
+import argparse
 
-def run_migrations():
-    # Connect to the database
-    db_path = os.path.join(os.path.dirname(__file__), 'word_bank.db')
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    
+from lib.db import Db
+from lib.migrations import MigrationError
+
+def run_migrations(database='words.db'):
     try:
-        # Get list of migration files
-        migrations_dir = os.path.join(os.path.dirname(__file__), 'sql', 'migrations')
-        migration_files = sorted([f for f in os.listdir(migrations_dir) if f.endswith('.sql')])
-        
-        # Run each migration
-        for migration_file in migration_files:
-            print(f"Running migration: {migration_file}")
-            with open(os.path.join(migrations_dir, migration_file)) as f:
-                migration_sql = f.read()
-                conn.executescript(migration_sql)
-                conn.commit()
-        
-        print("Migrations completed successfully")
-    except Exception as e:
+        applied = Db(database).migrate()
+        if applied:
+            print(f"Applied {len(applied)} migration(s) to {database}")
+        else:
+            print(f"{database} is up to date")
+    except MigrationError as e:
         print(f"Error running migrations: {str(e)}")
-        conn.rollback()
-    finally:
-        conn.close()
+        raise SystemExit(1)
 
 if __name__ == '__main__':
-    run_migrations()
+    parser = argparse.ArgumentParser(description='Apply pending sql/migrations to the database.')
+    parser.add_argument('--database', default='words.db')
+    args = parser.parse_args()
+    run_migrations(args.database)
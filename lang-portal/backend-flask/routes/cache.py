@@ -0,0 +1,8 @@
+from flask import jsonify
+from flask_cors import cross_origin
+
+def load(app):
+    @app.route('/api/cache/stats', methods=['GET'])
+    @cross_origin()
+    def get_cache_stats():
+        return jsonify(app.response_cache.stats())
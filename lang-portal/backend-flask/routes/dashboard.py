@@ -1,65 +1,127 @@
-from flask import jsonify
+from flask import Response, jsonify, request
 from flask_cors import cross_origin
-from datetime import datetime, timedelta
+
+from lib.pagination import row_count
+
+# Longest history the study progress heatmap returns
+MAX_PROGRESS_DAYS = 366
+# How long an EventSource waits before reconnecting to /api/dashboard/events
+RECONNECT_MILLISECONDS = 3000
+
+def streaks(cursor):
+    """(current, longest) streak of consecutive days with study sessions.
+
+    daily_activity.streak is kept up to date by triggers (see
+    sql/migrations/0011_add_daily_activity_streaks.sql), so both are
+    single index reads. The current streak ends today or yesterday.
+    """
+    cursor.execute('''
+        SELECT streak FROM daily_activity
+        WHERE day >= date('now', '-1 day') AND streak > 0
+        ORDER BY day DESC
+        LIMIT 1
+    ''')
+    row = cursor.fetchone()
+    cursor.execute('SELECT MAX(streak) AS longest FROM daily_activity')
+    return (row['streak'] if row else 0), (cursor.fetchone()['longest'] or 0)
+
+def recent_session(cursor):
+    """The most recent study session with its word, group and activity, or None."""
+    cursor.execute('''
+        SELECT 
+            ss.id,
+            ss.word_id,
+            w.english as word_english,
+            ss.group_id,
+            g.name as group_name,
+            ss.activity_id,
+            sa.name as activity_name,
+            ss.correct,
+            ss.timestamp,
+            wr.correct_count,
+            wr.wrong_count
+        FROM study_sessions ss
+        JOIN words w ON w.id = ss.word_id
+        JOIN groups g ON g.id = ss.group_id
+        JOIN study_activities sa ON ss.activity_id = sa.id
+        LEFT JOIN word_reviews wr ON w.id = wr.word_id
+        ORDER BY ss.timestamp DESC
+        LIMIT 1
+    ''')
+    
+    session = cursor.fetchone()
+    if not session:
+        return None
+    return {
+        'id': session['id'],
+        'word': {
+            'id': session['word_id'],
+            'english': session['word_english'],
+            'correct_count': session['correct_count'],
+            'wrong_count': session['wrong_count']
+        },
+        'group': {
+            'id': session['group_id'],
+            'name': session['group_name']
+        },
+        'activity': {
+            'id': session['activity_id'],
+            'name': session['activity_name']
+        },
+        'correct': bool(session['correct']),
+        'timestamp': session['timestamp']
+    }
+
+def study_stats(cursor):
+    """The totals /dashboard/stats reports."""
+    # Everything below reads rollups the write path keeps current
+    # (see sql/migrations/0005_create_dashboard_rollups.sql)
+    total_vocabulary = row_count(cursor, 'words')
+    total_sessions = row_count(cursor, 'study_sessions')
+
+    cursor.execute('SELECT name, value FROM study_totals')
+    totals = {row['name']: row['value'] for row in cursor.fetchall()}
+    total_words = totals.get('words_studied', 0)
+    mastered_words = totals.get('mastered_words', 0)
+    reviews = totals.get('reviews', 0)
+    success_rate = totals.get('correct_reviews', 0) / reviews if reviews else 0
+    
+    # Get number of groups with activity in the last 30 days
+    cursor.execute('''
+        SELECT COUNT(DISTINCT group_id) as active_groups
+        FROM group_activity
+        WHERE day >= date('now', '-30 days')
+    ''')
+    active_groups = cursor.fetchone()["active_groups"]
+    
+    current_streak, longest_streak = streaks(cursor)
+    
+    return {
+        "total_vocabulary": total_vocabulary,
+        "total_words_studied": total_words,
+        "mastered_words": mastered_words,
+        "success_rate": success_rate,
+        "total_sessions": total_sessions,
+        "active_groups": active_groups,
+        "current_streak": current_streak,
+        "longest_streak": longest_streak
+    }
+
+def dashboard_state(cursor):
+    """What /api/dashboard/events publishes: the two polled views in one."""
+    return {'stats': study_stats(cursor), 'session': recent_session(cursor)}
 
 def load(app):
     @app.route('/dashboard/recent-session', methods=['GET'])
     @cross_origin()
     def get_recent_session():
         try:
-            cursor = app.db.cursor()
-            
-            # Get the most recent study session with activity name and results
-            cursor.execute('''
-                SELECT 
-                    ss.id,
-                    ss.word_id,
-                    w.english as word_english,
-                    ss.group_id,
-                    g.name as group_name,
-                    ss.activity_id,
-                    sa.name as activity_name,
-                    ss.correct,
-                    ss.timestamp,
-                    wr.correct_count,
-                    wr.wrong_count
-                FROM study_sessions ss
-                JOIN words w ON w.id = ss.word_id
-                JOIN groups g ON g.id = ss.group_id
-                JOIN study_activities sa ON ss.activity_id = sa.id
-                LEFT JOIN word_reviews wr ON w.id = wr.word_id
-                ORDER BY ss.timestamp DESC
-                LIMIT 1
-            ''')
-            
-            session = cursor.fetchone()
-            
+            session = recent_session(app.db.cursor())
             if not session:
                 return jsonify({
                     'message': 'No study sessions found'
                 }), 404
-            
-            return jsonify({
-                'session': {
-                    'id': session['id'],
-                    'word': {
-                        'id': session['word_id'],
-                        'english': session['word_english'],
-                        'correct_count': session['correct_count'],
-                        'wrong_count': session['wrong_count']
-                    },
-                    'group': {
-                        'id': session['group_id'],
-                        'name': session['group_name']
-                    },
-                    'activity': {
-                        'id': session['activity_id'],
-                        'name': session['activity_name']
-                    },
-                    'correct': bool(session['correct']),
-                    'timestamp': session['timestamp']
-                }
-            })
+            return jsonify({'session': session})
             
         except Exception as e:
             app.logger.error(f"Error in get_recent_session: {str(e)}")
@@ -69,93 +131,91 @@ def load(app):
     @cross_origin()
     def get_study_stats():
         try:
+            return jsonify(study_stats(app.db.cursor()))
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    @app.route('/api/dashboard/events', methods=['GET'])
+    @cross_origin()
+    def get_dashboard_events():
+        # Server-Sent Events: a "stats" and a "session" event with the full
+        # state on connect, then patches as writes come in (lib/publisher.py).
+        # EventSource cannot set headers, so a learner is named with
+        # ?learner_id=. ?max_events= ends the stream after that many events.
+        try:
+            max_events = request.args.get('max_events', type=int)
+            if max_events is not None and max_events < 1:
+                return jsonify({"error": "max_events must be a positive integer"}), 400
+
+            database = app.db.route()
+            subscription = app.dashboard_publisher.subscribe(getattr(database, 'learner', None))
+        except Exception as e:
+            app.logger.error(f"Error in get_dashboard_events: {str(e)}")
+            return jsonify({"error": str(e)}), 500
+
+        keepalive = app.config['DASHBOARD_KEEPALIVE_SECONDS']
+
+        def stream():
+            # The stream holds no database connection, only its queue
+            try:
+                yield f'retry: {RECONNECT_MILLISECONDS}\n\n'
+                sent = 0
+                for event in subscription.events(keepalive):
+                    yield event
+                    if not event.startswith(':'):
+                        sent += 1
+                        if sent == max_events:
+                            return
+            finally:
+                app.dashboard_publisher.unsubscribe(subscription)
+
+        return Response(stream(), mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # don't let nginx hold events back
+        })
+
+    @app.route('/api/dashboard/study_progress', methods=['GET'])
+    @cross_origin()
+    def get_study_progress():
+        try:
+            days = request.args.get('days', 365, type=int)
+            if not 1 <= days <= MAX_PROGRESS_DAYS:
+                return jsonify({"error": f"days must be between 1 and {MAX_PROGRESS_DAYS}"}), 400
+
             cursor = app.db.cursor()
-            
-            # Get total vocabulary count
-            cursor.execute('SELECT COUNT(*) as total_vocabulary FROM words')
-            total_vocabulary = cursor.fetchone()["total_vocabulary"]
+            cursor.execute("SELECT date('now') AS today, date('now', ?) AS first_day", (f'-{days - 1} days',))
+            row = cursor.fetchone()
+            today, first_day = row['today'], row['first_day']
 
-            # Get total unique words studied
+            # One range read of the calendar; days without activity are left
+            # out for the client to fill in
             cursor.execute('''
-                SELECT COUNT(DISTINCT word_id) as total_words
-                FROM word_review_items wri
-                JOIN study_sessions ss ON wri.study_session_id = ss.id
-            ''')
-            total_words = cursor.fetchone()["total_words"]
-            
-            # Get mastered words (words with >80% success rate and at least 5 attempts)
-            cursor.execute('''
-                WITH word_stats AS (
-                    SELECT 
-                        word_id,
-                        COUNT(*) as total_attempts,
-                        SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END) * 1.0 / COUNT(*) as success_rate
-                    FROM word_review_items wri
-                    JOIN study_sessions ss ON wri.study_session_id = ss.id
-                    GROUP BY word_id
-                    HAVING total_attempts >= 5
-                )
-                SELECT COUNT(*) as mastered_words
-                FROM word_stats
-                WHERE success_rate >= 0.8
-            ''')
-            mastered_words = cursor.fetchone()["mastered_words"]
-            
-            # Get overall success rate
-            cursor.execute('''
-                SELECT 
-                    SUM(CASE WHEN correct = 1 THEN 1 ELSE 0 END) * 1.0 / COUNT(*) as success_rate
-                FROM word_review_items wri
-                JOIN study_sessions ss ON wri.study_session_id = ss.id
-            ''')
-            success_rate = cursor.fetchone()["success_rate"] or 0
-            
-            # Get total number of study sessions
-            cursor.execute('SELECT COUNT(*) as total_sessions FROM study_sessions')
-            total_sessions = cursor.fetchone()["total_sessions"]
-            
-            # Get number of groups with activity in the last 30 days
-            cursor.execute('''
-                SELECT COUNT(DISTINCT group_id) as active_groups
-                FROM study_sessions
-                WHERE created_at >= date('now', '-30 days')
-            ''')
-            active_groups = cursor.fetchone()["active_groups"]
-            
-            # Calculate current streak (consecutive days with at least one study session)
-            cursor.execute('''
-                WITH daily_sessions AS (
-                    SELECT 
-                        date(created_at) as study_date,
-                        COUNT(*) as session_count
-                    FROM study_sessions
-                    GROUP BY date(created_at)
-                ),
-                streak_calc AS (
-                    SELECT 
-                        study_date,
-                        julianday(study_date) - julianday(lag(study_date, 1) over (order by study_date)) as days_diff
-                    FROM daily_sessions
-                )
-                SELECT COUNT(*) as streak
-                FROM (
-                    SELECT study_date
-                    FROM streak_calc
-                    WHERE days_diff = 1 OR days_diff IS NULL
-                    ORDER BY study_date DESC
-                )
-            ''')
-            current_streak = cursor.fetchone()["streak"]
-            
+                SELECT day, sessions_count, reviews_count, correct_count
+                FROM daily_activity
+                WHERE day BETWEEN ? AND ? AND sessions_count + reviews_count > 0
+                ORDER BY day
+            ''', (first_day, today))
+            calendar = [{
+                "date": row['day'],
+                "sessions": row['sessions_count'],
+                "reviews": row['reviews_count'],
+                "correct": row['correct_count']
+            } for row in cursor.fetchall()]
+
+            cursor.execute("SELECT value FROM study_totals WHERE name = 'words_studied'")
+            words_studied = cursor.fetchone()
+            current_streak, longest_streak = streaks(cursor)
+
             return jsonify({
-                "total_vocabulary": total_vocabulary,
-                "total_words_studied": total_words,
-                "mastered_words": mastered_words,
-                "success_rate": success_rate,
-                "total_sessions": total_sessions,
-                "active_groups": active_groups,
-                "current_streak": current_streak
+                "total_words_studied": words_studied['value'] if words_studied else 0,
+                "total_available_words": row_count(cursor, 'words'),
+                "current_streak": current_streak,
+                "longest_streak": longest_streak,
+                "from": first_day,
+                "to": today,
+                "days": calendar
             })
-            
+
         except Exception as e:
+            app.logger.error(f"Error in get_study_progress: {str(e)}")
             return jsonify({"error": str(e)}), 500
@@ -1,10 +1,17 @@
-from flask import request, jsonify, g
+from flask import request, jsonify, g, Response
 from flask_cors import cross_origin
 import json
+import random
+
+from lib.membership import parse_word_ids, add_words, remove_words, move_words, merge_groups
+from lib.pagination import seek, next_cursor, row_count
+from lib.quiz import build_quiz, MAX_QUESTIONS, MAX_CHOICES
+from lib.streaming import rows, encode, buffered, ndjson, json_array, gzipped
 
 def load(app):
   @app.route('/groups', methods=['GET'])
   @cross_origin()
+  @app.response_cache.cached('groups')
   def get_groups():
     try:
       cursor = app.db.cursor()
@@ -25,24 +32,33 @@ def load(app):
       if order not in ['asc', 'desc']:
         order = 'asc'
 
+      # Opt-in keyset pagination: seek past the cursor instead of OFFSET
+      page_cursor = request.args.get('cursor')
+      try:
+        seek_condition, seek_params = seek(sort_by, 'id', order, page_cursor)
+      except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+      if page_cursor is not None:
+        offset = 0
+
       # Query to fetch groups with sorting and the cached word count
       cursor.execute(f'''
         SELECT id, name, words_count
         FROM groups
-        ORDER BY {sort_by} {order}
+        WHERE {seek_condition}
+        ORDER BY {sort_by} {order}, id {order}
         LIMIT ? OFFSET ?
-      ''', (groups_per_page, offset))
+      ''', (*seek_params, groups_per_page + 1, offset))
 
       groups = cursor.fetchall()
 
-      # Query the total number of groups
-      cursor.execute('SELECT COUNT(*) FROM groups')
-      total_groups = cursor.fetchone()[0]
+      # Total number of groups from the counter cache
+      total_groups = row_count(cursor, 'groups')
       total_pages = (total_groups + groups_per_page - 1) // groups_per_page
 
       # Format the response
       groups_data = []
-      for group in groups:
+      for group in groups[:groups_per_page]:
         groups_data.append({
           "id": group["id"],
           "group_name": group["name"],
@@ -50,16 +66,20 @@ def load(app):
         })
 
       # Return groups and pagination metadata
-      return jsonify({
+      response = {
         'groups': groups_data,
         'total_pages': total_pages,
         'current_page': page
-      })
+      }
+      if page_cursor is not None:
+        response['next_cursor'] = next_cursor(groups, groups_per_page, sort_by)
+      return jsonify(response)
     except Exception as e:
       return jsonify({"error": str(e)}), 500
 
   @app.route('/groups/<int:id>', methods=['GET'])
   @cross_origin()
+  @app.response_cache.cached('groups')
   def get_group(id):
     try:
       cursor = app.db.cursor()
@@ -99,14 +119,30 @@ def load(app):
       order = request.args.get('order', 'asc')
 
       # Validate sort parameters
-      valid_columns = ['english', 'arabic', 'root', 'correct_count', 'wrong_count']
-      if sort_by not in valid_columns:
+      sort_columns = {
+        'english': 'w.english',
+        'arabic': 'w.arabic',
+        'root': 'w.root',
+        'correct_count': 'COALESCE(wr.correct_count, 0)',
+        'wrong_count': 'COALESCE(wr.wrong_count, 0)'
+      }
+      if sort_by not in sort_columns:
         sort_by = 'english'
       if order not in ['asc', 'desc']:
         order = 'asc'
+      sort_column = sort_columns[sort_by]
+
+      # Opt-in keyset pagination: seek past the cursor instead of OFFSET
+      page_cursor = request.args.get('cursor')
+      try:
+        seek_condition, seek_params = seek(sort_column, 'w.id', order, page_cursor)
+      except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+      if page_cursor is not None:
+        offset = 0
 
       # First, check if the group exists
-      cursor.execute('SELECT name FROM groups WHERE id = ?', (id,))
+      cursor.execute('SELECT name, words_count FROM groups WHERE id = ?', (id,))
       group = cursor.fetchone()
       if not group:
         return jsonify({"error": "Group not found"}), 404
@@ -119,25 +155,20 @@ def load(app):
         FROM words w
         JOIN word_groups wg ON w.id = wg.word_id
         LEFT JOIN word_reviews wr ON w.id = wr.word_id
-        WHERE wg.group_id = ?
-        ORDER BY {sort_by} {order}
+        WHERE wg.group_id = ? AND {seek_condition}
+        ORDER BY {sort_column} {order}, w.id {order}
         LIMIT ? OFFSET ?
-      ''', (id, words_per_page, offset))
+      ''', (id, *seek_params, words_per_page + 1, offset))
       
       words = cursor.fetchall()
 
-      # Get total words count for pagination
-      cursor.execute('''
-        SELECT COUNT(*) 
-        FROM word_groups 
-        WHERE group_id = ?
-      ''', (id,))
-      total_words = cursor.fetchone()[0]
+      # Total words from the group's counter cache
+      total_words = group["words_count"] or 0
       total_pages = (total_words + words_per_page - 1) // words_per_page
 
       # Format the response
       words_data = []
-      for word in words:
+      for word in words[:words_per_page]:
         words_data.append({
           "id": word["id"],
           "english": word["english"],
@@ -147,15 +178,173 @@ def load(app):
           "wrong_count": word["wrong_count"]
         })
 
-      return jsonify({
+      response = {
         'words': words_data,
         'total_pages': total_pages,
         'current_page': page
+      }
+      if page_cursor is not None:
+        response['next_cursor'] = next_cursor(words, words_per_page, sort_by)
+      return jsonify(response)
+    except Exception as e:
+      return jsonify({"error": str(e)}), 500
+
+  def words_counts(connection, *ids):
+    """{group id: words_count} for those of the groups that exist."""
+    placeholders = ', '.join('?' * len(ids))
+    return {row['id']: row['words_count'] for row in connection.execute(
+      f'SELECT id, words_count FROM groups WHERE id IN ({placeholders})', ids)}
+
+  def target_group_id(payload, source_id):
+    target_id = payload.get('target_group_id') if isinstance(payload, dict) else None
+    if not isinstance(target_id, int) or isinstance(target_id, bool):
+      raise ValueError('target_group_id must be an integer')
+    if target_id == source_id:
+      raise ValueError('target_group_id must be a different group')
+    return target_id
+
+  @app.route('/groups/<int:id>/words', methods=['POST', 'DELETE'])
+  @cross_origin()
+  def change_group_words(id):
+    try:
+      try:
+        word_ids = parse_word_ids(request.get_json(silent=True))
+      except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+      # Groups are shared vocabulary, so this writes to the shared database
+      # even when the request names a learner
+      with app.db.write() as connection:
+        connection.execute('BEGIN IMMEDIATE')
+        if id not in words_counts(connection, id):
+          return jsonify({"error": "Group not found"}), 404
+        if request.method == 'POST':
+          result = {"added": add_words(connection, id, word_ids)}
+        else:
+          result = {"removed": remove_words(connection, id, word_ids)}
+        result["word_count"] = words_counts(connection, id)[id]
+      return jsonify({"group_id": id, **result})
+    except Exception as e:
+      return jsonify({"error": str(e)}), 500
+
+  @app.route('/groups/<int:id>/words/move', methods=['POST'])
+  @cross_origin()
+  def move_group_words(id):
+    try:
+      payload = request.get_json(silent=True)
+      try:
+        word_ids = parse_word_ids(payload)
+        target_id = target_group_id(payload, id)
+      except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+      with app.db.write() as connection:
+        connection.execute('BEGIN IMMEDIATE')
+        if len(words_counts(connection, id, target_id)) < 2:
+          return jsonify({"error": "Group not found"}), 404
+        moved, added = move_words(connection, id, target_id, word_ids)
+        counts = words_counts(connection, id, target_id)
+      return jsonify({
+        "group_id": id,
+        "target_group_id": target_id,
+        "moved": moved,
+        "added": added,
+        "word_count": counts[id],
+        "target_word_count": counts[target_id]
       })
     except Exception as e:
       return jsonify({"error": str(e)}), 500
 
-  # todo GET /groups/:id/words/raw
+  @app.route('/groups/<int:id>/merge', methods=['POST'])
+  @cross_origin()
+  def merge_group(id):
+    try:
+      try:
+        target_id = target_group_id(request.get_json(silent=True), id)
+      except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+      with app.db.write() as connection:
+        connection.execute('BEGIN IMMEDIATE')
+        if len(words_counts(connection, id, target_id)) < 2:
+          return jsonify({"error": "Group not found"}), 404
+        added, sessions = merge_groups(connection, id, target_id)
+        counts = words_counts(connection, target_id)
+      # Sessions changed group: the recent session and active groups
+      app.dashboard_publisher.notify_all()
+      return jsonify({
+        "merged_group_id": id,
+        "target_group_id": target_id,
+        "added": added,
+        "study_sessions_moved": sessions,
+        "target_word_count": counts[target_id]
+      })
+    except Exception as e:
+      return jsonify({"error": str(e)}), 500
+
+  @app.route('/groups/<int:id>/words/raw', methods=['GET'])
+  @cross_origin()
+  def get_group_words_raw(id):
+    try:
+      # ?format=ndjson (or Accept: application/x-ndjson) for one word per
+      # line, otherwise a JSON array
+      format = request.args.get('format')
+      if format is None:
+        format = 'ndjson' if request.accept_mimetypes.best == 'application/x-ndjson' else 'json'
+      if format not in ('json', 'ndjson'):
+        return jsonify({"error": "format must be json or ndjson"}), 400
+
+      # The generator below outlives this function, so it owns its
+      # connection instead of the request's
+      database = app.db.route()
+      connection = database.acquire_reader()
+      try:
+        group = connection.execute('SELECT 1 FROM groups WHERE id = ?', (id,)).fetchone()
+        if not group:
+          database.release_reader(connection)
+          return jsonify({"error": "Group not found"}), 404
+        cursor = connection.execute('''
+          SELECT w.id, w.english, w.arabic, w.root, w.transliteration, w.parts,
+                 COALESCE(wr.correct_count, 0) as correct_count,
+                 COALESCE(wr.wrong_count, 0) as wrong_count
+          FROM word_groups wg
+          JOIN words w ON w.id = wg.word_id
+          LEFT JOIN word_reviews wr ON w.id = wr.word_id
+          WHERE wg.group_id = ?
+          ORDER BY wg.word_id
+        ''', (id,))
+      except Exception:
+        database.release_reader(connection)
+        raise
+
+      def documents():
+        try:
+          for word in rows(cursor):
+            # parts is stored as JSON already, so splice it in as-is
+            document = encode({
+              "id": word["id"],
+              "english": word["english"],
+              "arabic": word["arabic"],
+              "root": word["root"],
+              "transliteration": word["transliteration"],
+              "correct_count": word["correct_count"],
+              "wrong_count": word["wrong_count"]
+            })
+            yield f'{document[:-1]},"parts":{word["parts"] or "{}"}}}'
+        finally:
+          database.release_reader(connection)
+
+      if format == 'ndjson':
+        body, mimetype = buffered(ndjson(documents())), 'application/x-ndjson'
+      else:
+        body, mimetype = buffered(json_array(documents())), 'application/json'
+      headers = {'Vary': 'Accept-Encoding'}
+      if 'gzip' in request.accept_encodings:
+        body = gzipped(body)
+        headers['Content-Encoding'] = 'gzip'
+      return Response(body, mimetype=mimetype, headers=headers)
+    except Exception as e:
+      return jsonify({"error": str(e)}), 500
 
   @app.route('/groups/<int:id>/study_sessions', methods=['GET'])
   @cross_origin()
@@ -169,81 +358,99 @@ def load(app):
       offset = (page - 1) * sessions_per_page
 
       # Get sorting parameters
-      sort_by = request.args.get('sort_by', 'created_at')
+      sort_by = request.args.get('sort_by', 'startTime')
       order = request.args.get('order', 'desc')  # Default to newest first
+      if order not in ['asc', 'desc']:
+        order = 'desc'
 
-      # Map frontend sort keys to database columns
+      # Map frontend sort keys to database expressions
       sort_mapping = {
-        'startTime': 'created_at',
-        'endTime': 'last_activity_time',
+        'startTime': 'ss.start_time',
+        'endTime': 'ss.end_time',
         'activityName': 'a.name',
         'groupName': 'g.name',
-        'reviewItemsCount': 'review_count'
+        'reviewItemsCount': 'ss.review_count'
       }
 
-      # Use mapped sort column or default to created_at
-      sort_column = sort_mapping.get(sort_by, 'created_at')
+      # Use mapped sort column or default to the start time
+      sort_column = sort_mapping.get(sort_by, 'ss.start_time')
 
-      # Get total count for pagination
-      cursor.execute('''
-        SELECT COUNT(*)
-        FROM study_sessions
-        WHERE group_id = ?
-      ''', (id,))
-      total_sessions = cursor.fetchone()[0]
+      # Opt-in keyset pagination: seek past the cursor instead of OFFSET
+      page_cursor = request.args.get('cursor')
+      try:
+        seek_condition, seek_params = seek(sort_column, 'ss.study_session_id', order, page_cursor)
+      except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+      if page_cursor is not None:
+        offset = 0
+
+      # Total sessions for this group from the counter cache
+      total_sessions = row_count(cursor, 'study_sessions', id)
       total_pages = (total_sessions + sessions_per_page - 1) // sessions_per_page
 
-      # Get study sessions for this group with dynamic calculations
+      # Get study sessions for this group from the maintained summaries
       cursor.execute(f'''
         SELECT 
-          s.id,
-          s.group_id,
-          s.study_activity_id,
-          s.created_at as start_time,
-          (
-            SELECT MAX(created_at)
-            FROM word_review_items
-            WHERE study_session_id = s.id
-          ) as last_activity_time,
+          ss.study_session_id as id,
+          ss.group_id,
+          ss.activity_id as study_activity_id,
+          ss.start_time,
+          ss.end_time,
           a.name as activity_name,
           g.name as group_name,
-          (
-            SELECT COUNT(*)
-            FROM word_review_items
-            WHERE study_session_id = s.id
-          ) as review_count
-        FROM study_sessions s
-        JOIN study_activities a ON s.study_activity_id = a.id
-        JOIN groups g ON s.group_id = g.id
-        WHERE s.group_id = ?
-        ORDER BY {sort_column} {order}
+          ss.review_count,
+          {sort_column} as sort_key
+        FROM study_session_summaries ss
+        JOIN study_activities a ON ss.activity_id = a.id
+        JOIN groups g ON ss.group_id = g.id
+        WHERE ss.group_id = ? AND {seek_condition}
+        ORDER BY {sort_column} {order}, ss.study_session_id {order}
         LIMIT ? OFFSET ?
-      ''', (id, sessions_per_page, offset))
+      ''', (id, *seek_params, sessions_per_page + 1, offset))
       
       sessions = cursor.fetchall()
-      sessions_data = []
-      
-      for session in sessions:
-        # If there's no last_activity_time, use start_time + 30 minutes
-        end_time = session["last_activity_time"]
-        if not end_time:
-            end_time = cursor.execute('SELECT datetime(?, "+30 minutes")', (session["start_time"],)).fetchone()[0]
-        
-        sessions_data.append({
-          "id": session["id"],
-          "group_id": session["group_id"],
-          "group_name": session["group_name"],
-          "study_activity_id": session["study_activity_id"],
-          "activity_name": session["activity_name"],
-          "start_time": session["start_time"],
-          "end_time": end_time,
-          "review_items_count": session["review_count"]
-        })
+      sessions_data = [{
+        "id": session["id"],
+        "group_id": session["group_id"],
+        "group_name": session["group_name"],
+        "study_activity_id": session["study_activity_id"],
+        "activity_name": session["activity_name"],
+        "start_time": session["start_time"],
+        "end_time": session["end_time"],
+        "review_items_count": session["review_count"]
+      } for session in sessions[:sessions_per_page]]
 
-      return jsonify({
+      response = {
         'study_sessions': sessions_data,
         'total_pages': total_pages,
         'current_page': page
-      })
+      }
+      if page_cursor is not None:
+        response['next_cursor'] = next_cursor(sessions, sessions_per_page, 'sort_key')
+      return jsonify(response)
     except Exception as e:
-      return jsonify({"error": str(e)}), 500
\ No newline at end of file
+      return jsonify({"error": str(e)}), 500
+
+  @app.route('/api/groups/<int:id>/quiz', methods=['GET'])
+  @cross_origin()
+  def get_group_quiz(id):
+    try:
+      n = request.args.get('n', 20, type=int)
+      if n is None or not 1 <= n <= MAX_QUESTIONS:
+        return jsonify({"error": f"n must be between 1 and {MAX_QUESTIONS}"}), 400
+      choices = request.args.get('choices', 4, type=int)
+      if choices is None or not 2 <= choices <= MAX_CHOICES:
+        return jsonify({"error": f"choices must be between 2 and {MAX_CHOICES}"}), 400
+      # A seed replays the same quiz; without one every request is new,
+      # which is also why this view is not cached
+      seed = request.args.get('seed', type=int)
+
+      cursor = app.db.cursor()
+      cursor.execute('SELECT 1 FROM groups WHERE id = ?', (id,))
+      if cursor.fetchone() is None:
+        return jsonify({"error": "Group not found"}), 404
+
+      questions = build_quiz(cursor, id, n, choices, random.Random(seed))
+      return jsonify({"group_id": id, "questions": questions})
+    except Exception as e:
+      return jsonify({"error": str(e)}), 500
@@ -0,0 +1,12 @@
+from flask import Response
+
+def load(app):
+    @app.route('/metrics', methods=['GET'])
+    def get_metrics():
+        # Response cache counters ride along as gauges
+        cache = app.response_cache.stats()
+        extra = []
+        for name in ('hits', 'misses', 'not_modified', 'evictions', 'entries', 'bytes'):
+            extra.append(f'# TYPE response_cache_{name} gauge')
+            extra.append(f'response_cache_{name} {cache[name]}')
+        return Response(app.metrics.render(extra), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,29 @@
+from flask import jsonify
+from flask_cors import cross_origin
+
+from lib.template import clone, ensure_template
+
+def load(app):
+    @app.route('/api/full_reset', methods=['POST'])
+    @cross_origin()
+    def full_reset():
+        try:
+            template = app.config['TEMPLATE_DATABASE'] or ensure_template()
+            # Let queued review batches land first; they are discarded with
+            # everything else
+            app.review_writer.stop()
+            # The writer lock keeps other writes out while the pages are
+            # copied; pooled readers see the new contents on their next query
+            with app.db.write() as connection:
+                clone(template, connection)
+            if app.db.shards is not None:
+                app.db.shards.reset()
+            app.response_cache.clear()
+            # Open dashboards reconnect and start over from the new state
+            app.dashboard_publisher.stop()
+            return jsonify({
+                "success": True,
+                "message": "System has been fully reset"
+            })
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
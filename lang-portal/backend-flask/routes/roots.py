@@ -0,0 +1,58 @@
+from flask import request, jsonify
+from flask_cors import cross_origin
+import json
+
+from lib.db import read_only
+from lib.search import normalize_root
+from lib.word_details import word_data
+
+# Most roots a single POST /api/roots/lookup may ask for
+MAX_LOOKUP_ROOTS = 100
+
+def load(app):
+    def families(cursor, roots):
+        # One query for every root: the keys go in as a JSON array and
+        # each is a primary key lookup into word_roots
+        keys = {root: normalize_root(root) for root in roots}
+        cursor.execute('''
+            SELECT r.root AS root_key, w.id, w.english, w.arabic, w.root, w.transliteration, w.parts,
+                COALESCE(wr.correct_count, 0) AS correct_count,
+                COALESCE(wr.wrong_count, 0) AS wrong_count
+            FROM json_each(?) k
+            JOIN word_roots r ON r.root = k.value
+            JOIN words w ON w.id = r.word_id
+            LEFT JOIN word_reviews wr ON wr.word_id = w.id
+            ORDER BY r.root, w.id
+        ''', (json.dumps(list(set(keys.values())), ensure_ascii=False),))
+        words = {}
+        for word in cursor.fetchall():
+            words.setdefault(word['root_key'], []).append(word_data(word))
+        return [{'root': root, 'words': words.get(key, [])} for root, key in keys.items()]
+
+    @app.route('/api/roots/<root>/words', methods=['GET'])
+    @cross_origin()
+    @app.response_cache.cached('words', 'word_reviews')
+    def get_root_words(root):
+        try:
+            family, = families(app.db.cursor(), [root])
+            return jsonify(family)
+        except Exception as e:
+            app.logger.error(f"Error in get_root_words: {str(e)}")
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/api/roots/lookup', methods=['POST'])
+    @cross_origin()
+    @read_only
+    def lookup_roots():
+        try:
+            data = request.get_json(silent=True) or {}
+            roots = data.get('roots')
+            if not isinstance(roots, list) or not all(isinstance(root, str) for root in roots):
+                return jsonify({'error': 'Expected {"roots": [...]} with a list of strings'}), 400
+            if len(roots) > MAX_LOOKUP_ROOTS:
+                return jsonify({'error': f'At most {MAX_LOOKUP_ROOTS} roots per lookup'}), 400
+
+            return jsonify({'families': families(app.db.cursor(), roots)})
+        except Exception as e:
+            app.logger.error(f"Error in lookup_roots: {str(e)}")
+            return jsonify({'error': str(e)}), 500
@@ -5,6 +5,7 @@ import math
 def load(app):
     @app.route('/study-activities', methods=['GET'])
     @cross_origin()
+    @app.response_cache.cached('study_activities')
     def get_study_activities():
         try:
             cursor = app.db.cursor()
@@ -23,6 +24,7 @@ def load(app):
 
     @app.route('/study-activities/<int:id>', methods=['GET'])
     @cross_origin()
+    @app.response_cache.cached('study_activities')
     def get_study_activity(id):
         try:
             cursor = app.db.cursor()
@@ -1,8 +1,14 @@
 from flask import request, jsonify, g
 from flask_cors import cross_origin
 from datetime import datetime
+import json
 import math
 
+from lib.pagination import seek, next_cursor, row_count
+from lib.reviews import SubmitTimeout, parse_events
+from lib.scheduler import next_words, MAX_NEXT_WORDS
+from lib.serialization import raw_parts
+
 def load(app):
     @app.route('/study-sessions', methods=['GET'])
     @cross_origin()
@@ -15,18 +21,20 @@ def load(app):
             per_page = request.args.get('per_page', 10, type=int)
             offset = (page - 1) * per_page
 
-            # Get total count
-            cursor.execute('''
-                SELECT COUNT(*) as count 
-                FROM study_sessions ss
-                JOIN groups g ON g.id = ss.group_id
-                JOIN study_activities sa ON sa.id = ss.activity_id
-                JOIN words w ON w.id = ss.word_id
-            ''')
-            total_count = cursor.fetchone()['count']
+            # Opt-in keyset pagination: seek past the cursor instead of OFFSET
+            page_cursor = request.args.get('cursor')
+            try:
+                seek_condition, seek_params = seek('ss.timestamp', 'ss.id', 'desc', page_cursor)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            if page_cursor is not None:
+                offset = 0
+
+            # Total sessions from the counter cache
+            total_count = row_count(cursor, 'study_sessions')
 
             # Get paginated sessions
-            cursor.execute('''
+            cursor.execute(f'''
                 SELECT 
                     ss.id,
                     ss.word_id,
@@ -36,18 +44,23 @@ def load(app):
                     ss.correct,
                     ss.timestamp,
                     g.name as group_name,
-                    sa.name as activity_name
+                    sa.name as activity_name,
+                    sm.end_time,
+                    sm.review_count,
+                    sm.correct_count
                 FROM study_sessions ss
                 JOIN groups g ON g.id = ss.group_id
                 JOIN study_activities sa ON sa.id = ss.activity_id
                 JOIN words w ON w.id = ss.word_id
-                ORDER BY ss.timestamp DESC
+                LEFT JOIN study_session_summaries sm ON sm.study_session_id = ss.id
+                WHERE {seek_condition}
+                ORDER BY ss.timestamp DESC, ss.id DESC
                 LIMIT ? OFFSET ?
-            ''', (per_page, offset))
+            ''', (*seek_params, per_page + 1, offset))
             
             sessions = cursor.fetchall()
             
-            return jsonify({
+            response = {
                 'sessions': [{
                     'id': session['id'],
                     'word_id': session['word_id'],
@@ -57,13 +70,113 @@ def load(app):
                     'correct': bool(session['correct']),
                     'timestamp': session['timestamp'],
                     'group_name': session['group_name'],
-                    'activity_name': session['activity_name']
-                } for session in sessions],
+                    'activity_name': session['activity_name'],
+                    'end_time': session['end_time'],
+                    'review_items_count': session['review_count'] or 0,
+                    'correct_count': session['correct_count'] or 0
+                } for session in sessions[:per_page]],
                 'total': total_count,
                 'page': page,
                 'per_page': per_page,
                 'total_pages': math.ceil(total_count / per_page)
-            })
+            }
+            if page_cursor is not None:
+                response['next_cursor'] = next_cursor(sessions, per_page, 'timestamp')
+            return jsonify(response)
         except Exception as e:
             app.logger.error(f"Error in get_study_sessions: {str(e)}")
-            return jsonify({'error': str(e)}), 500
\ No newline at end of file
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/api/study_sessions/next_words', methods=['GET'])
+    @cross_origin()
+    def get_next_words():
+        try:
+            n = request.args.get('n', 10, type=int)
+            if n is None or not 1 <= n <= MAX_NEXT_WORDS:
+                return jsonify({'error': f'n must be between 1 and {MAX_NEXT_WORDS}'}), 400
+            group_id = request.args.get('group_id', type=int)
+
+            cursor = app.db.cursor()
+            if group_id is not None:
+                cursor.execute('SELECT 1 FROM groups WHERE id = ?', (group_id,))
+                if cursor.fetchone() is None:
+                    return jsonify({'error': 'Group not found'}), 404
+
+            picked = next_words(cursor.connection, n, group_id)
+            cursor.execute('''
+                SELECT id, english, arabic, root, transliteration, parts
+                FROM words WHERE id IN (SELECT value FROM json_each(?))
+            ''', (json.dumps([word_id for word_id, _, _ in picked]),))
+            words = {word['id']: word for word in cursor.fetchall()}
+
+            return jsonify({'words': [{
+                'id': word_id,
+                'english': words[word_id]['english'],
+                'arabic': words[word_id]['arabic'],
+                'root': words[word_id]['root'],
+                'transliteration': words[word_id]['transliteration'],
+                'parts': raw_parts(words[word_id]['parts']),
+                'due': due,
+                'status': status
+            } for word_id, due, status in picked if word_id in words]})
+        except Exception as e:
+            app.logger.error(f"Error in get_next_words: {str(e)}")
+            return jsonify({'error': str(e)}), 500
+
+    def record_reviews(session_id, events):
+        # Validate from a pooled reader: a POST would otherwise hold the
+        # writer lock that the review writer needs
+        database = app.db.route()
+        connection = database.acquire_reader()
+        try:
+            session = connection.execute(
+                'SELECT 1 FROM study_sessions WHERE id = ?', (session_id,)
+            ).fetchone()
+            word_ids = sorted({word_id for word_id, _ in events})
+            known_words = connection.execute('''
+                SELECT COUNT(*) FROM words WHERE id IN (SELECT value FROM json_each(?))
+            ''', (json.dumps(word_ids),)).fetchone()[0]
+        finally:
+            database.release_reader(connection)
+
+        if session is None:
+            return jsonify({'error': 'Study session not found'}), 404
+        if known_words != len(word_ids):
+            return jsonify({'error': 'Unknown word_id in reviews'}), 400
+
+        # Each learner shard has its own writer thread
+        writer = app.review_writer if database is app.db else database.review_writer
+        try:
+            written = writer.submit(session_id, events)
+        except SubmitTimeout as e:
+            # Withdrawn before it was written, so the client can safely retry
+            return jsonify({'error': str(e)}), 503
+        app.dashboard_publisher.notify(getattr(database, 'learner', None))
+        return jsonify({'study_session_id': session_id, 'reviews_recorded': written}), 201
+
+    @app.route('/study-sessions/<int:id>/reviews', methods=['POST'])
+    @cross_origin()
+    def create_study_session_reviews(id):
+        try:
+            try:
+                events = parse_events(request.get_json(silent=True))
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            return record_reviews(id, events)
+        except Exception as e:
+            app.logger.error(f"Error in create_study_session_reviews: {str(e)}")
+            return jsonify({'error': str(e)}), 500
+
+    @app.route('/api/study_sessions/<int:id>/words/<int:word_id>/review', methods=['POST'])
+    @cross_origin()
+    def create_word_review(id, word_id):
+        try:
+            data = request.get_json(silent=True) or {}
+            try:
+                events = parse_events([{'word_id': word_id, 'correct': data.get('correct')}])
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            return record_reviews(id, events)
+        except Exception as e:
+            app.logger.error(f"Error in create_word_review: {str(e)}")
+            return jsonify({'error': str(e)}), 500
@@ -1,14 +1,37 @@
 from flask import request, jsonify, g
 from flask_cors import cross_origin
-import json
+
+from lib.fuzzy import MAX_DISTANCE, MAX_QUERY_LENGTH, candidates, default_distance, normalize, rank, reachable_distance
+from lib.letters import letters_condition, parse_letters
+from lib.neighbors import refresh as refresh_neighbors
+from lib.pagination import seek, next_cursor, row_count
+from lib.search import match_query
+from lib.serialization import raw_parts
+from lib.word_details import expand, fetch_words, parse_ids, parse_include, word_data
 
 def load(app):
-    # Endpoint: GET /api/words with pagination (50 words per page)
+    # Endpoint: GET /api/words with pagination (50 words per page), or
+    # ?ids=1,2,3 for just those words; ?include=groups,reviews expands either
     @app.route('/api/words', methods=['GET'])
     @cross_origin()
+    @app.response_cache.cached('words', 'word_reviews', 'word_review_items', 'groups', 'word_groups')
     def get_words():
         try:
+            try:
+                include = parse_include(request.args.get('include'))
+                ids = parse_ids(request.args['ids']) if 'ids' in request.args else None
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+
             cursor = app.db.cursor()
+            if ids is not None:
+                words = expand(cursor, fetch_words(cursor, ids), include)
+                found = {word['id'] for word in words}
+                return jsonify({
+                    'words': words,
+                    'missing': [word_id for word_id in ids if word_id not in found]
+                })
+
             cursor.execute('SELECT name FROM sqlite_master WHERE type="table" AND name="words"')
             if not cursor.fetchone():
                 return jsonify({'error': 'Words table not found'}), 500
@@ -25,11 +48,31 @@ def load(app):
             order = request.args.get('order', 'asc')  # Default to ascending order
 
             # Validate sort_by and order
-            valid_columns = ['english', 'arabic', 'root', 'correct_count', 'wrong_count']
-            if sort_by not in valid_columns:
+            sort_columns = {
+                'english': 'w.english',
+                'arabic': 'w.arabic',
+                'root': 'w.root',
+                'correct_count': 'COALESCE(r.correct_count, 0)',
+                'wrong_count': 'COALESCE(r.wrong_count, 0)'
+            }
+            if sort_by not in sort_columns:
                 sort_by = 'english'
             if order not in ['asc', 'desc']:
                 order = 'asc'
+            sort_column = sort_columns[sort_by]
+
+            # Opt-in keyset pagination: seek past the cursor instead of OFFSET.
+            # Only for the columns with a (sort key, id) index; the review
+            # counts come from a LEFT JOIN, so every page would sort every word
+            page_cursor = request.args.get('cursor')
+            if page_cursor is not None and sort_by not in ('english', 'arabic', 'root'):
+                return jsonify({'error': f'cursor pagination is not supported with sort_by={sort_by}'}), 400
+            try:
+                seek_condition, seek_params = seek(sort_column, 'w.id', order, page_cursor)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            if page_cursor is not None:
+                offset = 0
 
             # Query to fetch words with sorting
             cursor.execute(f'''
@@ -38,43 +81,176 @@ def load(app):
                     COALESCE(r.wrong_count, 0) AS wrong_count
                 FROM words w
                 LEFT JOIN word_reviews r ON w.id = r.word_id
-                ORDER BY {sort_by} {order}
+                WHERE {seek_condition}
+                ORDER BY {sort_column} {order}, w.id {order}
                 LIMIT ? OFFSET ?
-            ''', (words_per_page, offset))
+            ''', (*seek_params, words_per_page + 1, offset))
 
             words = cursor.fetchall()
 
-            # Query the total number of words
-            cursor.execute('SELECT COUNT(*) FROM words')
-            total_words = cursor.fetchone()[0]
+            # Total number of words from the counter cache
+            total_words = row_count(cursor, 'words')
             total_pages = (total_words + words_per_page - 1) // words_per_page
 
             # Format the response
             words_data = []
-            for word in words:
+            for word in words[:words_per_page]:
                 word_dict = {
                     'id': word['id'],
                     'english': word['english'],
                     'arabic': word['arabic'],
                     'root': word['root'],
                     'transliteration': word['transliteration'],
-                    'parts': json.loads(word['parts']) if word['parts'] else {},
+                    'parts': raw_parts(word['parts']),
                     'correct_count': word['correct_count'],
                     'wrong_count': word['wrong_count']
                 }
                 words_data.append(word_dict)
+            expand(cursor, words_data, include)
 
-            return jsonify({
+            response = {
                 'words': words_data,
                 'total_pages': total_pages,
                 'current_page': page,
                 'total_words': total_words
-            })
+            }
+            if page_cursor is not None:
+                response['next_cursor'] = next_cursor(words, words_per_page, sort_by)
+            return jsonify(response)
 
         except Exception as e:
             app.logger.error(f"Error in get_words: {str(e)}")
             return jsonify({'error': str(e)}), 500
 
+    # Endpoint: GET /api/words/search?q= full-text search, best matches first
+    @app.route('/api/words/search', methods=['GET'])
+    @cross_origin()
+    def search_words():
+        try:
+            match = match_query(request.args.get('q', ''))
+            if match is None:
+                return jsonify({'error': 'Missing search query: q'}), 400
+
+            page = max(1, request.args.get('page', 1, type=int))
+            limit = min(max(1, request.args.get('limit', 20, type=int)), 100)
+            group_id = request.args.get('group_id', type=int)
+
+            group_condition = '1'
+            params = [match]
+            if group_id is not None:
+                group_condition = 'w.id IN (SELECT word_id FROM word_groups WHERE group_id = ?)'
+                params.append(group_id)
+
+            cursor = app.db.cursor()
+            # bm25() weights: english, arabic, transliteration, root
+            cursor.execute(f'''
+                SELECT w.id, w.english, w.arabic, w.root, w.transliteration, w.parts,
+                    COALESCE(r.correct_count, 0) AS correct_count,
+                    COALESCE(r.wrong_count, 0) AS wrong_count
+                FROM words_fts
+                JOIN words w ON w.id = words_fts.rowid
+                LEFT JOIN word_reviews r ON r.word_id = w.id
+                WHERE words_fts MATCH ? AND {group_condition}
+                ORDER BY bm25(words_fts, 4.0, 4.0, 2.0, 1.0), w.id
+                LIMIT ? OFFSET ?
+            ''', (*params, limit + 1, (page - 1) * limit))
+            words = cursor.fetchall()
+
+            return jsonify({
+                'words': [{
+                    'id': word['id'],
+                    'english': word['english'],
+                    'arabic': word['arabic'],
+                    'root': word['root'],
+                    'transliteration': word['transliteration'],
+                    'parts': raw_parts(word['parts']),
+                    'correct_count': word['correct_count'],
+                    'wrong_count': word['wrong_count']
+                } for word in words[:limit]],
+                'current_page': page,
+                'has_more': len(words) > limit
+            })
+        except Exception as e:
+            app.logger.error(f"Error in search_words: {str(e)}")
+            return jsonify({'error': str(e)}), 500
+
+    # Endpoint: GET /api/words/fuzzy?q=ktaba typo-tolerant lookup by
+    # transliteration or English, closest first
+    @app.route('/api/words/fuzzy', methods=['GET'])
+    @cross_origin()
+    @app.response_cache.cached('words', 'word_reviews')
+    def fuzzy_words():
+        try:
+            query = normalize(request.args.get('q', ''))
+            if not query:
+                return jsonify({'error': 'Missing search query: q'}), 400
+            if len(query) > MAX_QUERY_LENGTH:
+                return jsonify({'error': f'q must be at most {MAX_QUERY_LENGTH} characters'}), 400
+            limit = min(max(1, request.args.get('limit', 10, type=int)), 50)
+            max_distance = request.args.get('max_distance', default_distance(query), type=int)
+            # Short queries get fewer edits: the index can only find words
+            # sharing a trigram with them
+            max_distance = reachable_distance(query, min(max_distance, MAX_DISTANCE))
+
+            cursor = app.db.cursor()
+            matches = rank(query, candidates(cursor, query, max_distance), max_distance)[:limit]
+            words = fetch_words(cursor, [word_id for edits, field, word_id in matches])
+
+            return jsonify({
+                'query': query,
+                'max_distance': max_distance,
+                'words': [{**word, 'distance': edits, 'matched': field}
+                          for (edits, field, word_id), word in zip(matches, words)]
+            })
+        except Exception as e:
+            app.logger.error(f"Error in fuzzy_words: {str(e)}")
+            return jsonify({'error': str(e)}), 500
+
+    # Endpoint: GET /api/words/by_letters?include=ك,ت&exclude=ب words for a
+    # Typing Tutor drill, answered from the word_letters index
+    @app.route('/api/words/by_letters', methods=['GET'])
+    @cross_origin()
+    @app.response_cache.cached('words', 'word_reviews', 'word_groups')
+    def get_words_by_letters():
+        try:
+            try:
+                letter_condition, params = letters_condition(parse_letters(request.args.get('include')),
+                                                             parse_letters(request.args.get('exclude')))
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+
+            page = max(1, request.args.get('page', 1, type=int))
+            limit = min(max(1, request.args.get('limit', 50, type=int)), 200)
+            group_id = request.args.get('group_id', type=int)
+
+            group_condition = '1'
+            if group_id is not None:
+                group_condition = 'w.id IN (SELECT word_id FROM word_groups WHERE group_id = ?)'
+                params.append(group_id)
+
+            cursor = app.db.cursor()
+            cursor.execute(f'''
+                SELECT w.id, w.english, w.arabic, w.root, w.transliteration, w.parts,
+                    COALESCE(r.correct_count, 0) AS correct_count,
+                    COALESCE(r.wrong_count, 0) AS wrong_count
+                FROM word_letters d
+                JOIN words w ON w.id = d.word_id
+                LEFT JOIN word_reviews r ON r.word_id = w.id
+                WHERE {letter_condition} AND {group_condition}
+                ORDER BY d.word_id
+                LIMIT ? OFFSET ?
+            ''', (*params, limit + 1, (page - 1) * limit))
+            words = cursor.fetchall()
+
+            return jsonify({
+                'words': [word_data(word) for word in words[:limit]],
+                'current_page': page,
+                'has_more': len(words) > limit
+            })
+        except Exception as e:
+            app.logger.error(f"Error in get_words_by_letters: {str(e)}")
+            return jsonify({'error': str(e)}), 500
+
     # Endpoint: POST /api/words to create a new word
     @app.route('/api/words', methods=['POST'])
     @cross_origin()
@@ -93,12 +269,16 @@ def load(app):
 
             # Insert the new word
             cursor.execute('''
-                INSERT INTO words (english, arabic)
-                VALUES (?, ?)
+                INSERT INTO words (english, arabic, root, transliteration, parts, parts_of_speech)
+                VALUES (?, ?, '', '', '[]', '{}')
             ''', (data['word'], data['meaning']))
-            
-            app.db.commit()
             word_id = cursor.lastrowid
+            # Quiz distractors for the new word and the lists it lands next to
+            refresh_neighbors(cursor.connection, [word_id])
+
+            app.db.commit()
+            # total_vocabulary on every open dashboard
+            app.dashboard_publisher.notify_all()
 
             # Return the created word
             cursor.execute('''
@@ -107,41 +287,29 @@ def load(app):
             ''', (word_id,))
             
             new_word = cursor.fetchone()
-            return jsonify(new_word), 201
+            return jsonify(dict(new_word)), 201
 
         except Exception as e:
             app.db.rollback()
             return jsonify({'error': str(e)}), 500
 
+    # Endpoint: GET /api/words/<id>, ?include=groups,reviews for the detail page
     @app.route('/api/words/<int:word_id>', methods=['GET'])
     @cross_origin()
+    @app.response_cache.cached('words', 'word_reviews', 'word_review_items', 'groups', 'word_groups')
     def get_word(word_id):
         try:
+            try:
+                include = parse_include(request.args.get('include'))
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+
             cursor = app.db.cursor()
-            cursor.execute('''
-                SELECT w.*, COALESCE(r.correct_count, 0) as correct_count, 
-                       COALESCE(r.wrong_count, 0) as wrong_count
-                FROM words w
-                LEFT JOIN word_reviews r ON w.id = r.word_id
-                WHERE w.id = ?
-            ''', (word_id,))
-            
-            word = cursor.fetchone()
-            if word is None:
+            words = fetch_words(cursor, [word_id])
+            if not words:
                 return jsonify({'error': 'Word not found'}), 404
-                
-            word_data = {
-                'id': word['id'],
-                'english': word['english'],
-                'arabic': word['arabic'],
-                'root': word['root'],
-                'transliteration': word['transliteration'],
-                'parts': json.loads(word['parts']) if word['parts'] else {},
-                'correct_count': word['correct_count'],
-                'wrong_count': word['wrong_count']
-            }
-            
-            return jsonify(word_data)
+
+            return jsonify(expand(cursor, words, include)[0])
             
         except Exception as e:
             app.logger.error(f"Error in get_word: {str(e)}")
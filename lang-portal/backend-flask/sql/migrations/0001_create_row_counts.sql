@@ -0,0 +1,50 @@
+-- Counter cache of table sizes used for pagination totals. group_id is 0 for
+-- the whole table, or the group the rows belong to.
+CREATE TABLE IF NOT EXISTS row_counts (
+  table_name TEXT NOT NULL,
+  group_id INTEGER NOT NULL DEFAULT 0,
+  count INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (table_name, group_id)
+) WITHOUT ROWID;
+
+INSERT OR REPLACE INTO row_counts (table_name, group_id, count)
+SELECT 'words', 0, COUNT(*) FROM words
+UNION ALL SELECT 'groups', 0, COUNT(*) FROM groups
+UNION ALL SELECT 'study_sessions', 0, COUNT(*) FROM study_sessions
+UNION ALL SELECT 'study_sessions', group_id, COUNT(*) FROM study_sessions GROUP BY group_id;
+
+CREATE TRIGGER IF NOT EXISTS row_counts_words_insert AFTER INSERT ON words
+BEGIN
+  INSERT INTO row_counts (table_name, group_id, count) VALUES ('words', 0, 1)
+    ON CONFLICT (table_name, group_id) DO UPDATE SET count = count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS row_counts_words_delete AFTER DELETE ON words
+BEGIN
+  UPDATE row_counts SET count = count - 1 WHERE table_name = 'words' AND group_id = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS row_counts_groups_insert AFTER INSERT ON groups
+BEGIN
+  INSERT INTO row_counts (table_name, group_id, count) VALUES ('groups', 0, 1)
+    ON CONFLICT (table_name, group_id) DO UPDATE SET count = count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS row_counts_groups_delete AFTER DELETE ON groups
+BEGIN
+  UPDATE row_counts SET count = count - 1 WHERE table_name = 'groups' AND group_id = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS row_counts_study_sessions_insert AFTER INSERT ON study_sessions
+BEGIN
+  INSERT INTO row_counts (table_name, group_id, count) VALUES ('study_sessions', 0, 1)
+    ON CONFLICT (table_name, group_id) DO UPDATE SET count = count + 1;
+  INSERT INTO row_counts (table_name, group_id, count) VALUES ('study_sessions', NEW.group_id, 1)
+    ON CONFLICT (table_name, group_id) DO UPDATE SET count = count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS row_counts_study_sessions_delete AFTER DELETE ON study_sessions
+BEGIN
+  UPDATE row_counts SET count = count - 1
+  WHERE table_name = 'study_sessions' AND group_id IN (0, OLD.group_id);
+END;
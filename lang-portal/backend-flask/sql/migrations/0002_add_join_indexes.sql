@@ -0,0 +1,14 @@
+-- Indexes for the joins in routes/groups.py, routes/study_sessions.py and
+-- routes/dashboard.py, which otherwise scan these tables for every row.
+
+-- A word belongs to a group at most once
+DELETE FROM word_groups
+WHERE rowid NOT IN (SELECT MIN(rowid) FROM word_groups GROUP BY group_id, word_id);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_word_groups_group_word ON word_groups (group_id, word_id);
+CREATE INDEX IF NOT EXISTS idx_word_groups_word ON word_groups (word_id);
+
+CREATE INDEX IF NOT EXISTS idx_word_review_items_session ON word_review_items (study_session_id);
+CREATE INDEX IF NOT EXISTS idx_word_review_items_word ON word_review_items (word_id);
+
+CREATE INDEX IF NOT EXISTS idx_study_sessions_timestamp ON study_sessions (timestamp);
+CREATE INDEX IF NOT EXISTS idx_study_sessions_group ON study_sessions (group_id);
@@ -0,0 +1,12 @@
+-- word_reviews holds one counter row per word. Fold any duplicates into the
+-- oldest row before enforcing that with a unique index.
+UPDATE word_reviews
+SET correct_count = (SELECT SUM(correct_count) FROM word_reviews d WHERE d.word_id = word_reviews.word_id),
+    wrong_count = (SELECT SUM(wrong_count) FROM word_reviews d WHERE d.word_id = word_reviews.word_id),
+    last_reviewed = (SELECT MAX(last_reviewed) FROM word_reviews d WHERE d.word_id = word_reviews.word_id)
+WHERE id IN (SELECT MIN(id) FROM word_reviews GROUP BY word_id HAVING COUNT(*) > 1);
+
+DELETE FROM word_reviews
+WHERE id NOT IN (SELECT MIN(id) FROM word_reviews GROUP BY word_id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_word_reviews_word ON word_reviews (word_id);
@@ -0,0 +1,36 @@
+-- Bulk imports upsert on (arabic, english). Merge any existing duplicates
+-- into the lowest id first, re-pointing everything that references them.
+CREATE TEMP TABLE word_duplicates AS
+SELECT w.id AS id, k.keep_id AS keep_id
+FROM words w
+JOIN (SELECT arabic, english, MIN(id) AS keep_id FROM words GROUP BY arabic, english HAVING COUNT(*) > 1) k
+  ON k.arabic = w.arabic AND k.english = w.english
+WHERE w.id != k.keep_id;
+
+UPDATE OR IGNORE word_groups
+SET word_id = (SELECT keep_id FROM word_duplicates WHERE id = word_groups.word_id)
+WHERE word_id IN (SELECT id FROM word_duplicates);
+DELETE FROM word_groups WHERE word_id IN (SELECT id FROM word_duplicates);
+
+UPDATE word_reviews
+SET correct_count = correct_count + (SELECT COALESCE(SUM(d.correct_count), 0) FROM word_reviews d JOIN word_duplicates x ON x.id = d.word_id WHERE x.keep_id = word_reviews.word_id),
+    wrong_count = wrong_count + (SELECT COALESCE(SUM(d.wrong_count), 0) FROM word_reviews d JOIN word_duplicates x ON x.id = d.word_id WHERE x.keep_id = word_reviews.word_id)
+WHERE word_id IN (SELECT keep_id FROM word_duplicates);
+UPDATE OR IGNORE word_reviews
+SET word_id = (SELECT keep_id FROM word_duplicates WHERE id = word_reviews.word_id)
+WHERE word_id IN (SELECT id FROM word_duplicates);
+DELETE FROM word_reviews WHERE word_id IN (SELECT id FROM word_duplicates);
+
+UPDATE word_review_items
+SET word_id = (SELECT keep_id FROM word_duplicates WHERE id = word_review_items.word_id)
+WHERE word_id IN (SELECT id FROM word_duplicates);
+UPDATE study_sessions
+SET word_id = (SELECT keep_id FROM word_duplicates WHERE id = study_sessions.word_id)
+WHERE word_id IN (SELECT id FROM word_duplicates);
+
+DELETE FROM words WHERE id IN (SELECT id FROM word_duplicates);
+DROP TABLE word_duplicates;
+
+UPDATE groups SET words_count = (SELECT COUNT(*) FROM word_groups WHERE group_id = groups.id);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_words_arabic_english ON words (arabic, english);
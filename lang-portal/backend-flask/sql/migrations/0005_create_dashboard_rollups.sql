@@ -0,0 +1,125 @@
+-- Rollups behind /dashboard/stats, maintained by triggers as reviews and
+-- sessions are written so the endpoint only does point reads.
+-- `invoke rebuild-rollups` recomputes them from raw history.
+
+-- Per-word review counters. mastered = at least 5 attempts, 80% correct.
+CREATE TABLE IF NOT EXISTS word_review_stats (
+  word_id INTEGER PRIMARY KEY,
+  attempts INTEGER NOT NULL DEFAULT 0,
+  correct INTEGER NOT NULL DEFAULT 0,
+  mastered INTEGER NOT NULL DEFAULT 0
+);
+
+-- Activity per calendar day
+CREATE TABLE IF NOT EXISTS daily_activity (
+  day TEXT PRIMARY KEY,
+  sessions_count INTEGER NOT NULL DEFAULT 0,
+  reviews_count INTEGER NOT NULL DEFAULT 0,
+  correct_count INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+-- Groups studied per day, for the active groups count
+CREATE TABLE IF NOT EXISTS group_activity (
+  day TEXT NOT NULL,
+  group_id INTEGER NOT NULL,
+  sessions_count INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (day, group_id)
+) WITHOUT ROWID;
+
+-- Running totals: reviews, correct_reviews, words_studied, mastered_words
+CREATE TABLE IF NOT EXISTS study_totals (
+  name TEXT PRIMARY KEY,
+  value INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+-- Backfill from existing history
+INSERT INTO word_review_stats (word_id, attempts, correct, mastered)
+SELECT word_id, COUNT(*), SUM(correct != 0),
+       COUNT(*) >= 5 AND SUM(correct != 0) * 1.0 / COUNT(*) >= 0.8
+FROM word_review_items
+GROUP BY word_id;
+
+INSERT INTO daily_activity (day, sessions_count, reviews_count, correct_count)
+SELECT day, SUM(sessions_count), SUM(reviews_count), SUM(correct_count)
+FROM (
+  SELECT date(timestamp) AS day, 1 AS sessions_count, 0 AS reviews_count, 0 AS correct_count FROM study_sessions
+  UNION ALL
+  SELECT date(created_at), 0, 1, correct != 0 FROM word_review_items
+)
+GROUP BY day;
+
+INSERT INTO group_activity (day, group_id, sessions_count)
+SELECT date(timestamp), group_id, COUNT(*) FROM study_sessions GROUP BY date(timestamp), group_id;
+
+INSERT INTO study_totals (name, value)
+SELECT 'reviews', COUNT(*) FROM word_review_items
+UNION ALL SELECT 'correct_reviews', COALESCE(SUM(correct != 0), 0) FROM word_review_items
+UNION ALL SELECT 'words_studied', COUNT(*) FROM word_review_stats
+UNION ALL SELECT 'mastered_words', COALESCE(SUM(mastered), 0) FROM word_review_stats;
+
+CREATE TRIGGER IF NOT EXISTS rollups_word_review_items_insert AFTER INSERT ON word_review_items
+BEGIN
+  UPDATE study_totals SET value = value + 1
+  WHERE name = 'words_studied' AND NOT EXISTS (SELECT 1 FROM word_review_stats WHERE word_id = NEW.word_id);
+  INSERT OR IGNORE INTO word_review_stats (word_id) VALUES (NEW.word_id);
+
+  -- Take the word out of mastered_words, update it, and put it back if it still qualifies
+  UPDATE study_totals SET value = value - (SELECT mastered FROM word_review_stats WHERE word_id = NEW.word_id)
+  WHERE name = 'mastered_words';
+  UPDATE word_review_stats SET
+    attempts = attempts + 1,
+    correct = correct + (NEW.correct != 0),
+    mastered = attempts + 1 >= 5 AND (correct + (NEW.correct != 0)) * 1.0 / (attempts + 1) >= 0.8
+  WHERE word_id = NEW.word_id;
+  UPDATE study_totals SET value = value + (SELECT mastered FROM word_review_stats WHERE word_id = NEW.word_id)
+  WHERE name = 'mastered_words';
+
+  UPDATE study_totals SET value = value + 1 WHERE name = 'reviews';
+  UPDATE study_totals SET value = value + (NEW.correct != 0) WHERE name = 'correct_reviews';
+  INSERT INTO daily_activity (day, reviews_count, correct_count)
+  VALUES (date(NEW.created_at), 1, NEW.correct != 0)
+  ON CONFLICT (day) DO UPDATE SET
+    reviews_count = reviews_count + 1,
+    correct_count = correct_count + excluded.correct_count;
+END;
+
+CREATE TRIGGER IF NOT EXISTS rollups_word_review_items_delete AFTER DELETE ON word_review_items
+BEGIN
+  UPDATE study_totals SET value = value - (SELECT mastered FROM word_review_stats WHERE word_id = OLD.word_id)
+  WHERE name = 'mastered_words';
+  UPDATE word_review_stats SET
+    attempts = attempts - 1,
+    correct = correct - (OLD.correct != 0),
+    mastered = attempts - 1 >= 5 AND (correct - (OLD.correct != 0)) * 1.0 / (attempts - 1) >= 0.8
+  WHERE word_id = OLD.word_id;
+  UPDATE study_totals SET value = value + (SELECT mastered FROM word_review_stats WHERE word_id = OLD.word_id)
+  WHERE name = 'mastered_words';
+
+  UPDATE study_totals SET value = value - 1
+  WHERE name = 'words_studied' AND (SELECT attempts FROM word_review_stats WHERE word_id = OLD.word_id) = 0;
+  DELETE FROM word_review_stats WHERE word_id = OLD.word_id AND attempts = 0;
+
+  UPDATE study_totals SET value = value - 1 WHERE name = 'reviews';
+  UPDATE study_totals SET value = value - (OLD.correct != 0) WHERE name = 'correct_reviews';
+  UPDATE daily_activity SET
+    reviews_count = reviews_count - 1,
+    correct_count = correct_count - (OLD.correct != 0)
+  WHERE day = date(OLD.created_at);
+END;
+
+CREATE TRIGGER IF NOT EXISTS rollups_study_sessions_insert AFTER INSERT ON study_sessions
+BEGIN
+  INSERT INTO daily_activity (day, sessions_count) VALUES (date(NEW.timestamp), 1)
+  ON CONFLICT (day) DO UPDATE SET sessions_count = sessions_count + 1;
+  INSERT INTO group_activity (day, group_id, sessions_count) VALUES (date(NEW.timestamp), NEW.group_id, 1)
+  ON CONFLICT (day, group_id) DO UPDATE SET sessions_count = sessions_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS rollups_study_sessions_delete AFTER DELETE ON study_sessions
+BEGIN
+  UPDATE daily_activity SET sessions_count = sessions_count - 1 WHERE day = date(OLD.timestamp);
+  UPDATE group_activity SET sessions_count = sessions_count - 1
+  WHERE day = date(OLD.timestamp) AND group_id = OLD.group_id;
+  DELETE FROM group_activity
+  WHERE day = date(OLD.timestamp) AND group_id = OLD.group_id AND sessions_count = 0;
+END;
@@ -0,0 +1,73 @@
+-- Data version per table, bumped by triggers on every write. The response
+-- cache keys its entries on these so a cached response is only served while
+-- the tables it was built from are unchanged.
+CREATE TABLE IF NOT EXISTS table_versions (
+  table_name TEXT PRIMARY KEY,
+  version INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+INSERT OR IGNORE INTO table_versions (table_name) VALUES
+  ('words'),
+  ('word_reviews'),
+  ('groups'),
+  ('study_activities');
+
+CREATE TRIGGER IF NOT EXISTS table_versions_words_insert AFTER INSERT ON words
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'words';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_words_update AFTER UPDATE ON words
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'words';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_words_delete AFTER DELETE ON words
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'words';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_word_reviews_insert AFTER INSERT ON word_reviews
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'word_reviews';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_word_reviews_update AFTER UPDATE ON word_reviews
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'word_reviews';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_word_reviews_delete AFTER DELETE ON word_reviews
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'word_reviews';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_groups_insert AFTER INSERT ON groups
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'groups';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_groups_update AFTER UPDATE ON groups
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'groups';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_groups_delete AFTER DELETE ON groups
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'groups';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_study_activities_insert AFTER INSERT ON study_activities
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'study_activities';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_study_activities_update AFTER UPDATE ON study_activities
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'study_activities';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_study_activities_delete AFTER DELETE ON study_activities
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'study_activities';
+END;
@@ -0,0 +1,83 @@
+-- One row per study session with its review activity, kept current by
+-- triggers so session listings read and sort without touching
+-- word_review_items. end_time is the last review, or start + 30 minutes
+-- for a session without reviews.
+CREATE TABLE IF NOT EXISTS study_session_summaries (
+  study_session_id INTEGER PRIMARY KEY,
+  group_id INTEGER NOT NULL,
+  activity_id INTEGER NOT NULL,
+  start_time DATETIME,
+  last_activity_time DATETIME,
+  end_time DATETIME,
+  review_count INTEGER NOT NULL DEFAULT 0,
+  correct_count INTEGER NOT NULL DEFAULT 0
+);
+
+-- Sort orders offered by /groups/<id>/study_sessions
+CREATE INDEX IF NOT EXISTS idx_study_session_summaries_group_start
+  ON study_session_summaries (group_id, start_time);
+CREATE INDEX IF NOT EXISTS idx_study_session_summaries_group_end
+  ON study_session_summaries (group_id, end_time);
+CREATE INDEX IF NOT EXISTS idx_study_session_summaries_group_reviews
+  ON study_session_summaries (group_id, review_count);
+
+-- Backfill from existing history
+INSERT OR REPLACE INTO study_session_summaries
+  (study_session_id, group_id, activity_id, start_time, last_activity_time, end_time, review_count, correct_count)
+SELECT s.id, s.group_id, s.activity_id, s.timestamp, r.last_activity_time,
+       COALESCE(r.last_activity_time, datetime(s.timestamp, '+30 minutes')),
+       COALESCE(r.review_count, 0), COALESCE(r.correct_count, 0)
+FROM study_sessions s
+LEFT JOIN (
+  SELECT study_session_id, MAX(created_at) AS last_activity_time,
+         COUNT(*) AS review_count, SUM(correct != 0) AS correct_count
+  FROM word_review_items
+  GROUP BY study_session_id
+) r ON r.study_session_id = s.id;
+
+CREATE TRIGGER IF NOT EXISTS study_session_summaries_session_insert AFTER INSERT ON study_sessions
+BEGIN
+  INSERT OR REPLACE INTO study_session_summaries (study_session_id, group_id, activity_id, start_time, end_time)
+  VALUES (NEW.id, NEW.group_id, NEW.activity_id, NEW.timestamp, datetime(NEW.timestamp, '+30 minutes'));
+END;
+
+CREATE TRIGGER IF NOT EXISTS study_session_summaries_session_update
+AFTER UPDATE OF group_id, activity_id, timestamp ON study_sessions
+BEGIN
+  UPDATE study_session_summaries SET
+    group_id = NEW.group_id,
+    activity_id = NEW.activity_id,
+    start_time = NEW.timestamp,
+    end_time = COALESCE(last_activity_time, datetime(NEW.timestamp, '+30 minutes'))
+  WHERE study_session_id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS study_session_summaries_session_delete AFTER DELETE ON study_sessions
+BEGIN
+  DELETE FROM study_session_summaries WHERE study_session_id = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS study_session_summaries_review_insert AFTER INSERT ON word_review_items
+BEGIN
+  UPDATE study_session_summaries SET
+    review_count = review_count + 1,
+    correct_count = correct_count + (NEW.correct != 0),
+    last_activity_time = MAX(COALESCE(last_activity_time, NEW.created_at), NEW.created_at),
+    end_time = MAX(COALESCE(last_activity_time, NEW.created_at), NEW.created_at)
+  WHERE study_session_id = NEW.study_session_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS study_session_summaries_review_delete AFTER DELETE ON word_review_items
+BEGIN
+  UPDATE study_session_summaries SET
+    review_count = review_count - 1,
+    correct_count = correct_count - (OLD.correct != 0),
+    last_activity_time = (
+      SELECT MAX(created_at) FROM word_review_items WHERE study_session_id = OLD.study_session_id
+    ),
+    end_time = COALESCE(
+      (SELECT MAX(created_at) FROM word_review_items WHERE study_session_id = OLD.study_session_id),
+      datetime(start_time, '+30 minutes')
+    )
+  WHERE study_session_id = OLD.study_session_id;
+END;
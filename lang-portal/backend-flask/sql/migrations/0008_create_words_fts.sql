@@ -0,0 +1,80 @@
+-- Full-text index over words for /api/words/search. Arabic and root are
+-- indexed without tashkeel and with hamza/alef variants folded (the
+-- replace() chain below must match ARABIC_NORMALIZATION in lib/search.py);
+-- roots are stored without the spaces between their letters.
+CREATE VIEW IF NOT EXISTS words_search_source AS
+SELECT
+  id,
+  english,
+  replace(replace(replace(replace(replace(replace(replace(replace(replace(replace(replace(replace(replace(replace(replace(replace(replace(replace(arabic
+    , char(1611), '')
+    , char(1612), '')
+    , char(1613), '')
+    , char(1614), '')
+    , char(1615), '')
+    , char(1616), '')
+    , char(1617), '')
+    , char(1618), '')
+    , char(1648), '')
+    , char(1600), '')
+    , char(1571), char(1575))
+    , char(1573), char(1575))
+    , char(1570), char(1575))
+    , char(1649), char(1575))
+    , char(1572), char(1608))
+    , char(1574), char(1610))
+    , char(1609), char(1610))
+    , char(1577), char(1607)) AS arabic,
+  transliteration,
+  replace(replace(replace(replace(replace(replace(replace(replace(replace(replace(replace(replace(replace(replace(replace(replace(replace(replace(replace(root
+    , char(1611), '')
+    , char(1612), '')
+    , char(1613), '')
+    , char(1614), '')
+    , char(1615), '')
+    , char(1616), '')
+    , char(1617), '')
+    , char(1618), '')
+    , char(1648), '')
+    , char(1600), '')
+    , char(1571), char(1575))
+    , char(1573), char(1575))
+    , char(1570), char(1575))
+    , char(1649), char(1575))
+    , char(1572), char(1608))
+    , char(1574), char(1610))
+    , char(1609), char(1610))
+    , char(1577), char(1607)), ' ', '') AS root
+FROM words;
+
+-- Prefix indexes keep search-as-you-type queries on short prefixes cheap
+CREATE VIRTUAL TABLE IF NOT EXISTS words_fts USING fts5(
+  english, arabic, transliteration, root,
+  tokenize = 'unicode61 remove_diacritics 2',
+  prefix = '1 2 3'
+);
+
+INSERT INTO words_fts (rowid, english, arabic, transliteration, root)
+SELECT id, english, arabic, transliteration, root FROM words_search_source;
+
+CREATE TRIGGER IF NOT EXISTS words_fts_insert AFTER INSERT ON words
+BEGIN
+  INSERT INTO words_fts (rowid, english, arabic, transliteration, root)
+  SELECT id, english, arabic, transliteration, root FROM words_search_source WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS words_fts_update
+AFTER UPDATE OF id, english, arabic, transliteration, root ON words
+BEGIN
+  DELETE FROM words_fts WHERE rowid = OLD.id;
+  INSERT INTO words_fts (rowid, english, arabic, transliteration, root)
+  SELECT id, english, arabic, transliteration, root FROM words_search_source WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS words_fts_delete AFTER DELETE ON words
+BEGIN
+  DELETE FROM words_fts WHERE rowid = OLD.id;
+END;
+
+-- create_word checks for an existing english word, and /api/words sorts by it
+CREATE INDEX IF NOT EXISTS idx_words_english ON words (english);
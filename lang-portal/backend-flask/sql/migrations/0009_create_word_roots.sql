@@ -0,0 +1,31 @@
+-- Word families: every word under its normalized root (the compact, folded
+-- form from words_search_source), so /api/roots can look a family up by key
+-- instead of scanning words.root with LIKE.
+CREATE TABLE IF NOT EXISTS word_roots (
+  root TEXT NOT NULL,
+  word_id INTEGER NOT NULL,
+  PRIMARY KEY (root, word_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_word_roots_word_id ON word_roots (word_id);
+
+INSERT OR IGNORE INTO word_roots (root, word_id)
+SELECT root, id FROM words_search_source WHERE root != '';
+
+CREATE TRIGGER IF NOT EXISTS word_roots_insert AFTER INSERT ON words
+BEGIN
+  INSERT OR IGNORE INTO word_roots (root, word_id)
+  SELECT root, id FROM words_search_source WHERE id = NEW.id AND root != '';
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_roots_update AFTER UPDATE OF id, root ON words
+BEGIN
+  DELETE FROM word_roots WHERE word_id = OLD.id;
+  INSERT OR IGNORE INTO word_roots (root, word_id)
+  SELECT root, id FROM words_search_source WHERE id = NEW.id AND root != '';
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_roots_delete AFTER DELETE ON words
+BEGIN
+  DELETE FROM word_roots WHERE word_id = OLD.id;
+END;
@@ -0,0 +1,60 @@
+-- Spaced-repetition state per word (see lib/scheduler.py). due is NULL for
+-- words that have never been reviewed. The rows are written by review
+-- ingestion; `invoke rebuild-schedule` replays word_review_items into them.
+CREATE TABLE IF NOT EXISTS word_schedule (
+  word_id INTEGER PRIMARY KEY,
+  repetitions INTEGER NOT NULL DEFAULT 0,
+  interval_days REAL NOT NULL DEFAULT 0,
+  ease REAL NOT NULL DEFAULT 2.5,
+  due DATETIME,
+  last_reviewed DATETIME
+);
+
+CREATE INDEX IF NOT EXISTS idx_word_schedule_due ON word_schedule (due);
+
+-- The same due times per group membership, so a group's queue is one range
+-- scan of (group_id, due) however many groups a word is in
+CREATE TABLE IF NOT EXISTS group_word_schedule (
+  group_id INTEGER NOT NULL,
+  word_id INTEGER NOT NULL,
+  due DATETIME,
+  PRIMARY KEY (group_id, word_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_group_word_schedule_due ON group_word_schedule (group_id, due);
+CREATE INDEX IF NOT EXISTS idx_group_word_schedule_word ON group_word_schedule (word_id);
+
+INSERT OR IGNORE INTO word_schedule (word_id) SELECT id FROM words;
+
+INSERT OR IGNORE INTO group_word_schedule (group_id, word_id, due)
+SELECT wg.group_id, wg.word_id, s.due
+FROM word_groups wg
+JOIN word_schedule s ON s.word_id = wg.word_id;
+
+CREATE TRIGGER IF NOT EXISTS word_schedule_word_insert AFTER INSERT ON words
+BEGIN
+  INSERT OR IGNORE INTO word_schedule (word_id) VALUES (NEW.id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_schedule_word_delete AFTER DELETE ON words
+BEGIN
+  DELETE FROM word_schedule WHERE word_id = OLD.id;
+  DELETE FROM group_word_schedule WHERE word_id = OLD.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_schedule_due_update AFTER UPDATE OF due ON word_schedule
+WHEN NEW.due IS NOT OLD.due
+BEGIN
+  UPDATE group_word_schedule SET due = NEW.due WHERE word_id = NEW.word_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS group_word_schedule_membership_insert AFTER INSERT ON word_groups
+BEGIN
+  INSERT OR REPLACE INTO group_word_schedule (group_id, word_id, due)
+  VALUES (NEW.group_id, NEW.word_id, (SELECT due FROM word_schedule WHERE word_id = NEW.word_id));
+END;
+
+CREATE TRIGGER IF NOT EXISTS group_word_schedule_membership_delete AFTER DELETE ON word_groups
+BEGIN
+  DELETE FROM group_word_schedule WHERE group_id = OLD.group_id AND word_id = OLD.word_id;
+END;
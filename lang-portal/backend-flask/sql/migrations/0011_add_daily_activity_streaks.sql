@@ -0,0 +1,66 @@
+-- Streaks straight from the activity calendar: streak is the number of
+-- consecutive days with sessions ending on `day` (0 on days without
+-- sessions). The current streak is then a point read of today or
+-- yesterday, and the longest one MAX(streak) off an index.
+ALTER TABLE daily_activity ADD COLUMN streak INTEGER NOT NULL DEFAULT 0;
+
+-- Backfill: consecutive active days share julianday(day) - their rank
+CREATE TEMP TABLE daily_activity_streaks AS
+SELECT day, ROW_NUMBER() OVER (PARTITION BY island ORDER BY day) AS streak
+FROM (
+  SELECT day, julianday(day) - ROW_NUMBER() OVER (ORDER BY day) AS island
+  FROM daily_activity
+  WHERE sessions_count > 0
+);
+
+UPDATE daily_activity
+SET streak = (SELECT streak FROM daily_activity_streaks s WHERE s.day = daily_activity.day)
+WHERE sessions_count > 0;
+
+DROP TABLE daily_activity_streaks;
+
+CREATE INDEX IF NOT EXISTS idx_daily_activity_streak ON daily_activity (streak);
+
+-- A day gaining its first session continues the streak of the day before,
+-- and the run that started the day after (if any) now continues from it:
+-- those days are found by their own streak pointing back to day + 1.
+CREATE TRIGGER IF NOT EXISTS daily_activity_streak_insert AFTER INSERT ON daily_activity
+WHEN NEW.sessions_count > 0
+BEGIN
+  UPDATE daily_activity
+  SET streak = 1 + COALESCE((SELECT streak FROM daily_activity WHERE day = date(NEW.day, '-1 day')), 0)
+  WHERE day = NEW.day;
+  UPDATE daily_activity
+  SET streak = streak + (SELECT streak FROM daily_activity WHERE day = NEW.day)
+  WHERE day > NEW.day AND streak > 0 AND date(day, '-' || (streak - 1) || ' days') = date(NEW.day, '+1 day');
+END;
+
+CREATE TRIGGER IF NOT EXISTS daily_activity_streak_start AFTER UPDATE OF sessions_count ON daily_activity
+WHEN OLD.sessions_count <= 0 AND NEW.sessions_count > 0
+BEGIN
+  UPDATE daily_activity
+  SET streak = 1 + COALESCE((SELECT streak FROM daily_activity WHERE day = date(NEW.day, '-1 day')), 0)
+  WHERE day = NEW.day;
+  UPDATE daily_activity
+  SET streak = streak + (SELECT streak FROM daily_activity WHERE day = NEW.day)
+  WHERE day > NEW.day AND streak > 0 AND date(day, '-' || (streak - 1) || ' days') = date(NEW.day, '+1 day');
+END;
+
+-- A day losing its last session breaks its run in two: the days after it
+-- in the run no longer count the days up to and including it
+CREATE TRIGGER IF NOT EXISTS daily_activity_streak_end AFTER UPDATE OF sessions_count ON daily_activity
+WHEN OLD.sessions_count > 0 AND NEW.sessions_count <= 0
+BEGIN
+  UPDATE daily_activity
+  SET streak = streak - OLD.streak
+  WHERE day > NEW.day AND streak > 0 AND date(day, '-' || (streak - 1) || ' days') <= NEW.day;
+  UPDATE daily_activity SET streak = 0 WHERE day = NEW.day;
+END;
+
+CREATE TRIGGER IF NOT EXISTS daily_activity_streak_delete AFTER DELETE ON daily_activity
+WHEN OLD.streak > 0
+BEGIN
+  UPDATE daily_activity
+  SET streak = streak - OLD.streak
+  WHERE day > OLD.day AND streak > 0 AND date(day, '-' || (streak - 1) || ' days') <= OLD.day;
+END;
@@ -0,0 +1,24 @@
+-- Keep the per-group counters right when sessions change group, as merging
+-- groups (lib/membership.py) moves the merged group's sessions over.
+-- study_session_summaries already follows group_id (0007).
+CREATE TRIGGER IF NOT EXISTS row_counts_study_sessions_group_update
+AFTER UPDATE OF group_id ON study_sessions
+WHEN NEW.group_id IS NOT OLD.group_id
+BEGIN
+  UPDATE row_counts SET count = count - 1
+  WHERE table_name = 'study_sessions' AND group_id = OLD.group_id;
+  INSERT INTO row_counts (table_name, group_id, count) VALUES ('study_sessions', NEW.group_id, 1)
+    ON CONFLICT (table_name, group_id) DO UPDATE SET count = count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS rollups_study_sessions_group_update
+AFTER UPDATE OF group_id ON study_sessions
+WHEN NEW.group_id IS NOT OLD.group_id
+BEGIN
+  UPDATE group_activity SET sessions_count = sessions_count - 1
+  WHERE day = date(OLD.timestamp) AND group_id = OLD.group_id;
+  DELETE FROM group_activity
+  WHERE day = date(OLD.timestamp) AND group_id = OLD.group_id AND sessions_count = 0;
+  INSERT INTO group_activity (day, group_id, sessions_count) VALUES (date(NEW.timestamp), NEW.group_id, 1)
+  ON CONFLICT (day, group_id) DO UPDATE SET sessions_count = sessions_count + 1;
+END;
@@ -0,0 +1,58 @@
+-- Letter index over words.parts for the Typing Tutor: one row per distinct
+-- letter a word contains, under both its written form with harakat (كَ) and
+-- its bare letter (ك), so a drill can ask for either. Lookups by letter are
+-- primary key range scans returning word ids in order, which
+-- /api/words/by_letters intersects instead of decoding every word's parts.
+CREATE TABLE IF NOT EXISTS word_letters (
+  letter TEXT NOT NULL,
+  word_id INTEGER NOT NULL,
+  PRIMARY KEY (letter, word_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_word_letters_word_id ON word_letters (word_id);
+
+-- Each part's letter with tatweel dropped, then the two keys per letter:
+-- as written, and with the harakat (char 1611-1618) and superscript alef
+-- removed. Must match lib/letters.py. parts that are not a JSON array of
+-- {"letter": ...} objects contribute nothing.
+CREATE VIEW IF NOT EXISTS word_letters_source AS
+SELECT DISTINCT l.word_id, k.value AS letter
+FROM (
+  SELECT w.id AS word_id, replace(trim(json_extract(part.value, '$.letter')), char(1600), '') AS letter
+  FROM words w,
+       json_each(CASE WHEN json_valid(w.parts) AND json_type(w.parts) = 'array' THEN w.parts ELSE '[]' END) part
+  WHERE part.type = 'object'
+) l,
+json_each(json_array(l.letter,
+  replace(replace(replace(replace(replace(replace(replace(replace(replace(l.letter
+    , char(1611), '')
+    , char(1612), '')
+    , char(1613), '')
+    , char(1614), '')
+    , char(1615), '')
+    , char(1616), '')
+    , char(1617), '')
+    , char(1618), '')
+    , char(1648), ''))) k
+WHERE k.value != '';
+
+INSERT OR IGNORE INTO word_letters (letter, word_id)
+SELECT letter, word_id FROM word_letters_source;
+
+CREATE TRIGGER IF NOT EXISTS word_letters_insert AFTER INSERT ON words
+BEGIN
+  INSERT OR IGNORE INTO word_letters (letter, word_id)
+  SELECT letter, word_id FROM word_letters_source WHERE word_id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_letters_update AFTER UPDATE OF id, parts ON words
+BEGIN
+  DELETE FROM word_letters WHERE word_id = OLD.id;
+  INSERT OR IGNORE INTO word_letters (letter, word_id)
+  SELECT letter, word_id FROM word_letters_source WHERE word_id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_letters_delete AFTER DELETE ON words
+BEGIN
+  DELETE FROM word_letters WHERE word_id = OLD.id;
+END;
@@ -0,0 +1,67 @@
+-- Trigram index over words.transliteration and words.english for the
+-- typo-tolerant lookup in lib/fuzzy.py. Each text is lower-cased (ASCII,
+-- as SQLite's lower() does) and every word in it padded pg_trgm style, two
+-- spaces before and one after, so "kataba" gives "  k", " ka", "kat", ...,
+-- "ba ". Must match lib/fuzzy.py.
+CREATE TABLE IF NOT EXISTS word_trigrams (
+  trigram TEXT NOT NULL,
+  word_id INTEGER NOT NULL,
+  PRIMARY KEY (trigram, word_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_word_trigrams_word_id ON word_trigrams (word_id);
+
+-- Words per trigram, so a lookup can start from its rarest trigrams
+CREATE TABLE IF NOT EXISTS word_trigram_counts (
+  trigram TEXT PRIMARY KEY,
+  words INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+-- Trigger bodies cannot use a recursive CTE, so the trigram offsets come
+-- from a table. Text past the last offset is not indexed.
+CREATE TABLE IF NOT EXISTS trigram_positions (n INTEGER PRIMARY KEY);
+
+WITH RECURSIVE positions (n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM positions WHERE n < 256)
+INSERT OR IGNORE INTO trigram_positions (n) SELECT n FROM positions;
+
+CREATE VIEW IF NOT EXISTS word_trigrams_source AS
+SELECT DISTINCT t.word_id, substr(t.text, p.n, 3) AS trigram
+FROM (
+  SELECT w.id AS word_id, '  ' || replace(lower(trim(f.value, ' ')), ' ', '  ') || ' ' AS text
+  FROM words w, json_each(json_array(w.transliteration, w.english)) f
+  WHERE trim(COALESCE(f.value, ''), ' ') != ''
+) t
+JOIN trigram_positions p ON p.n <= length(t.text) - 2
+WHERE trim(substr(t.text, p.n, 3), ' ') != '';
+
+CREATE TRIGGER IF NOT EXISTS word_trigram_counts_insert AFTER INSERT ON word_trigrams
+BEGIN
+  INSERT INTO word_trigram_counts (trigram, words) VALUES (NEW.trigram, 1)
+  ON CONFLICT (trigram) DO UPDATE SET words = words + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_trigram_counts_delete AFTER DELETE ON word_trigrams
+BEGIN
+  UPDATE word_trigram_counts SET words = words - 1 WHERE trigram = OLD.trigram;
+END;
+
+INSERT OR IGNORE INTO word_trigrams (trigram, word_id)
+SELECT trigram, word_id FROM word_trigrams_source;
+
+CREATE TRIGGER IF NOT EXISTS word_trigrams_insert AFTER INSERT ON words
+BEGIN
+  INSERT OR IGNORE INTO word_trigrams (trigram, word_id)
+  SELECT trigram, word_id FROM word_trigrams_source WHERE word_id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_trigrams_update AFTER UPDATE OF id, english, transliteration ON words
+BEGIN
+  DELETE FROM word_trigrams WHERE word_id = OLD.id;
+  INSERT OR IGNORE INTO word_trigrams (trigram, word_id)
+  SELECT trigram, word_id FROM word_trigrams_source WHERE word_id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_trigrams_delete AFTER DELETE ON words
+BEGIN
+  DELETE FROM word_trigrams WHERE word_id = OLD.id;
+END;
@@ -0,0 +1,97 @@
+-- Distractor index for /api/groups/<id>/quiz: for every word, a short list
+-- of words a learner could plausibly mistake it for, so a quiz reads its
+-- wrong answers by primary key instead of sampling the group in Python.
+-- Neighbors share the word's root, or the length and first letter of its
+-- folded Arabic (words_search_source), or just the length. The list is
+-- built here for existing words and refreshed by lib/neighbors.py when
+-- words are imported; deletes are handled by the trigger at the end.
+
+-- Each word's length and first letter, kept current like word_roots
+CREATE TABLE IF NOT EXISTS word_shapes (
+  word_id INTEGER PRIMARY KEY,
+  letters INTEGER NOT NULL,
+  initial TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_word_shapes_shape ON word_shapes (letters, initial);
+CREATE INDEX IF NOT EXISTS idx_word_shapes_letters ON word_shapes (letters);
+
+CREATE VIEW IF NOT EXISTS word_shapes_source AS
+SELECT id AS word_id, length(replace(arabic, ' ', '')) AS letters, substr(replace(arabic, ' ', ''), 1, 1) AS initial
+FROM words_search_source;
+
+INSERT OR REPLACE INTO word_shapes (word_id, letters, initial)
+SELECT word_id, letters, initial FROM word_shapes_source;
+
+CREATE TRIGGER IF NOT EXISTS word_shapes_insert AFTER INSERT ON words
+BEGIN
+  INSERT OR REPLACE INTO word_shapes (word_id, letters, initial)
+  SELECT word_id, letters, initial FROM word_shapes_source WHERE word_id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_shapes_update AFTER UPDATE OF id, arabic ON words
+BEGIN
+  DELETE FROM word_shapes WHERE word_id = OLD.id;
+  INSERT OR REPLACE INTO word_shapes (word_id, letters, initial)
+  SELECT word_id, letters, initial FROM word_shapes_source WHERE word_id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS word_shapes_delete AFTER DELETE ON words
+BEGIN
+  DELETE FROM word_shapes WHERE word_id = OLD.id;
+END;
+
+-- Candidates per word, best tier first: 3 = same root, 2 = same length
+-- and first letter, 1 = same length. Each tier takes the two nearest words
+-- by id on either side off an index ordered by word_id, so a word has at
+-- most 12 however large its family or bucket is. Filtered on word_id, each
+-- arm is driven by that word's own rows.
+CREATE VIEW IF NOT EXISTS word_neighbor_candidates AS
+SELECT r.word_id, n.id AS neighbor_id, 3 AS tier
+FROM word_roots r
+JOIN words n ON n.id IN (
+  SELECT word_id FROM word_roots WHERE root = r.root AND word_id > r.word_id
+  ORDER BY word_id LIMIT 2
+) OR n.id IN (
+  SELECT word_id FROM word_roots WHERE root = r.root AND word_id < r.word_id
+  ORDER BY word_id DESC LIMIT 2
+)
+UNION ALL
+SELECT s.word_id, n.id, 2
+FROM word_shapes s
+JOIN words n ON n.id IN (
+  SELECT word_id FROM word_shapes WHERE letters = s.letters AND initial = s.initial AND word_id > s.word_id
+  ORDER BY word_id LIMIT 2
+) OR n.id IN (
+  SELECT word_id FROM word_shapes WHERE letters = s.letters AND initial = s.initial AND word_id < s.word_id
+  ORDER BY word_id DESC LIMIT 2
+)
+UNION ALL
+SELECT s.word_id, n.id, 1
+FROM word_shapes s
+JOIN words n ON n.id IN (
+  SELECT word_id FROM word_shapes WHERE letters = s.letters AND word_id > s.word_id
+  ORDER BY word_id LIMIT 2
+) OR n.id IN (
+  SELECT word_id FROM word_shapes WHERE letters = s.letters AND word_id < s.word_id
+  ORDER BY word_id DESC LIMIT 2
+);
+
+-- A word listed under several tiers keeps the first, and best, one
+CREATE TABLE IF NOT EXISTS word_neighbors (
+  word_id INTEGER NOT NULL,
+  neighbor_id INTEGER NOT NULL,
+  tier INTEGER NOT NULL,
+  PRIMARY KEY (word_id, neighbor_id)
+) WITHOUT ROWID;
+
+-- Deleting a word drops it from the lists it appears in
+CREATE INDEX IF NOT EXISTS idx_word_neighbors_neighbor_id ON word_neighbors (neighbor_id);
+
+INSERT OR IGNORE INTO word_neighbors (word_id, neighbor_id, tier)
+SELECT word_id, neighbor_id, tier FROM word_neighbor_candidates;
+
+CREATE TRIGGER IF NOT EXISTS word_neighbors_delete AFTER DELETE ON words
+BEGIN
+  DELETE FROM word_neighbors WHERE word_id = OLD.id OR neighbor_id = OLD.id;
+END;
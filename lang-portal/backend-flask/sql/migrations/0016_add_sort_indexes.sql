@@ -0,0 +1,8 @@
+-- (sort key, id) indexes for the columns /api/words and /groups page by, so
+-- a keyset page seeks straight to its first row instead of sorting the table.
+-- /api/words by english already has idx_words_english (id is the rowid).
+CREATE INDEX IF NOT EXISTS idx_words_arabic_id ON words (arabic, id);
+CREATE INDEX IF NOT EXISTS idx_words_root_id ON words (root, id);
+
+CREATE INDEX IF NOT EXISTS idx_groups_name_id ON groups (name, id);
+CREATE INDEX IF NOT EXISTS idx_groups_words_count_id ON groups (words_count, id);
@@ -0,0 +1,20 @@
+-- A table_versions row for group membership, so cached responses that read
+-- word_groups (group filters, include=groups) change when a word joins or
+-- leaves a group, and learner shards know when to resync their per-group
+-- schedules (lib/shards.py).
+INSERT OR IGNORE INTO table_versions (table_name) VALUES ('word_groups');
+
+CREATE TRIGGER IF NOT EXISTS table_versions_word_groups_insert AFTER INSERT ON word_groups
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'word_groups';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_word_groups_update AFTER UPDATE ON word_groups
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'word_groups';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_word_groups_delete AFTER DELETE ON word_groups
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'word_groups';
+END;
@@ -0,0 +1,22 @@
+-- Every merge of one group into another (lib/membership.py merge_groups).
+-- The merge re-points the shared database's study sessions itself; learner
+-- shards cannot be reached from that transaction, so they re-point theirs
+-- from this table when they next sync (lib/shards.py). target_id is kept
+-- final: merging a group that absorbed others moves their rows along too.
+CREATE TABLE IF NOT EXISTS group_merges (
+  source_id INTEGER PRIMARY KEY,
+  target_id INTEGER NOT NULL,
+  merged_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT OR IGNORE INTO table_versions (table_name) VALUES ('group_merges');
+
+CREATE TRIGGER IF NOT EXISTS table_versions_group_merges_insert AFTER INSERT ON group_merges
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'group_merges';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_group_merges_update AFTER UPDATE ON group_merges
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'group_merges';
+END;
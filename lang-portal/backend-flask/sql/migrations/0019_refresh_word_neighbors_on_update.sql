@@ -0,0 +1,55 @@
+-- Keep word_neighbors right when a word's Arabic or root is edited in
+-- place. Imports and POST /api/words refresh the lists they add through
+-- lib/neighbors.py; an update reaches the same lists here: the word's own,
+-- the lists that held it, and the lists of its new candidates (a word is
+-- among another's nearest exactly when that one is among its own, so
+-- these are also the lists that should now hold it).
+--
+-- The lists that held the word are found through their rows pointing at
+-- it, so those rows are kept until last: every other row of the affected
+-- lists is rebuilt from the candidates first, then the rows pointing at
+-- the word are put right.
+
+CREATE TRIGGER IF NOT EXISTS word_neighbors_update AFTER UPDATE OF arabic, root ON words
+WHEN NEW.arabic IS NOT OLD.arabic OR NEW.root IS NOT OLD.root
+BEGIN
+  -- Triggers fire newest first: bring the word's shape and root rows up to
+  -- date before reading candidates (their own triggers redo this after)
+  DELETE FROM word_shapes WHERE word_id = NEW.id;
+  INSERT OR REPLACE INTO word_shapes (word_id, letters, initial)
+  SELECT word_id, letters, initial FROM word_shapes_source WHERE word_id = NEW.id;
+  DELETE FROM word_roots WHERE word_id = NEW.id;
+  INSERT OR IGNORE INTO word_roots (root, word_id)
+  SELECT root, id FROM words_search_source WHERE id = NEW.id AND root != '';
+
+  DELETE FROM word_neighbors
+  WHERE neighbor_id != NEW.id AND word_id IN (
+    SELECT NEW.id
+    UNION SELECT neighbor_id FROM word_neighbor_candidates WHERE word_id = NEW.id
+    UNION SELECT word_id FROM word_neighbors WHERE neighbor_id = NEW.id
+  );
+  INSERT OR IGNORE INTO word_neighbors (word_id, neighbor_id, tier)
+  SELECT word_id, neighbor_id, tier FROM word_neighbor_candidates
+  WHERE word_id IN (
+    SELECT NEW.id
+    UNION SELECT neighbor_id FROM word_neighbor_candidates WHERE word_id = NEW.id
+    UNION SELECT word_id FROM word_neighbors WHERE neighbor_id = NEW.id
+  );
+
+  -- Rows pointing at the word: drop those no longer a candidate, or not
+  -- at the candidate's best tier, then add the missing ones
+  DELETE FROM word_neighbors
+  WHERE neighbor_id = NEW.id AND (
+    NOT EXISTS (
+      SELECT 1 FROM word_neighbor_candidates c
+      WHERE c.word_id = word_neighbors.word_id AND c.neighbor_id = NEW.id AND c.tier = word_neighbors.tier
+    ) OR EXISTS (
+      SELECT 1 FROM word_neighbor_candidates c
+      WHERE c.word_id = word_neighbors.word_id AND c.neighbor_id = NEW.id AND c.tier > word_neighbors.tier
+    )
+  );
+  INSERT OR IGNORE INTO word_neighbors (word_id, neighbor_id, tier)
+  SELECT word_id, neighbor_id, tier FROM word_neighbor_candidates
+  WHERE neighbor_id = NEW.id
+    AND word_id IN (SELECT neighbor_id FROM word_neighbor_candidates WHERE word_id = NEW.id);
+END;
@@ -0,0 +1,19 @@
+-- A table_versions row for the review log, so cached responses that read
+-- word_review_items (include=reviews) change with it rather than relying on
+-- every write to it also touching word_reviews.
+INSERT OR IGNORE INTO table_versions (table_name) VALUES ('word_review_items');
+
+CREATE TRIGGER IF NOT EXISTS table_versions_word_review_items_insert AFTER INSERT ON word_review_items
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'word_review_items';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_word_review_items_update AFTER UPDATE ON word_review_items
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'word_review_items';
+END;
+
+CREATE TRIGGER IF NOT EXISTS table_versions_word_review_items_delete AFTER DELETE ON word_review_items
+BEGIN
+  UPDATE table_versions SET version = version + 1 WHERE table_name = 'word_review_items';
+END;
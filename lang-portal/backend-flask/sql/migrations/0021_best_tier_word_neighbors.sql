@@ -0,0 +1,70 @@
+-- A word listed under several tiers keeps the best one. 0015 and 0019 had
+-- INSERT OR IGNORE keep whichever candidate row came first, which is only
+-- the best while SQLite reads the view's UNION ALL arms in the order they
+-- are written; nothing guarantees that. Pairs now go in as MAX(tier), and
+-- the lists built so far are rebuilt that way.
+--
+-- The candidates are read in a subquery with LIMIT -1 (no limit) that
+-- keeps SQLite from merging it into the GROUP BY: merged, the word_id
+-- filter is no longer pushed into the view's arms and every word's
+-- candidates are computed.
+
+DELETE FROM word_neighbors;
+INSERT INTO word_neighbors (word_id, neighbor_id, tier)
+SELECT word_id, neighbor_id, MAX(tier) FROM word_neighbor_candidates
+GROUP BY word_id, neighbor_id;
+
+-- As in 0019, with the inserts grouped
+DROP TRIGGER IF EXISTS word_neighbors_update;
+
+CREATE TRIGGER IF NOT EXISTS word_neighbors_update AFTER UPDATE OF arabic, root ON words
+WHEN NEW.arabic IS NOT OLD.arabic OR NEW.root IS NOT OLD.root
+BEGIN
+  -- Triggers fire newest first: bring the word's shape and root rows up to
+  -- date before reading candidates (their own triggers redo this after)
+  DELETE FROM word_shapes WHERE word_id = NEW.id;
+  INSERT OR REPLACE INTO word_shapes (word_id, letters, initial)
+  SELECT word_id, letters, initial FROM word_shapes_source WHERE word_id = NEW.id;
+  DELETE FROM word_roots WHERE word_id = NEW.id;
+  INSERT OR IGNORE INTO word_roots (root, word_id)
+  SELECT root, id FROM words_search_source WHERE id = NEW.id AND root != '';
+
+  DELETE FROM word_neighbors
+  WHERE neighbor_id != NEW.id AND word_id IN (
+    SELECT NEW.id
+    UNION SELECT neighbor_id FROM word_neighbor_candidates WHERE word_id = NEW.id
+    UNION SELECT word_id FROM word_neighbors WHERE neighbor_id = NEW.id
+  );
+  INSERT OR IGNORE INTO word_neighbors (word_id, neighbor_id, tier)
+  SELECT word_id, neighbor_id, MAX(tier) FROM (
+    SELECT word_id, neighbor_id, tier FROM word_neighbor_candidates
+    WHERE word_id IN (
+      SELECT NEW.id
+      UNION SELECT neighbor_id FROM word_neighbor_candidates WHERE word_id = NEW.id
+      UNION SELECT word_id FROM word_neighbors WHERE neighbor_id = NEW.id
+    )
+    LIMIT -1
+  )
+  GROUP BY word_id, neighbor_id;
+
+  -- Rows pointing at the word: drop those no longer a candidate, or not
+  -- at the candidate's best tier, then add the missing ones
+  DELETE FROM word_neighbors
+  WHERE neighbor_id = NEW.id AND (
+    NOT EXISTS (
+      SELECT 1 FROM word_neighbor_candidates c
+      WHERE c.word_id = word_neighbors.word_id AND c.neighbor_id = NEW.id AND c.tier = word_neighbors.tier
+    ) OR EXISTS (
+      SELECT 1 FROM word_neighbor_candidates c
+      WHERE c.word_id = word_neighbors.word_id AND c.neighbor_id = NEW.id AND c.tier > word_neighbors.tier
+    )
+  );
+  INSERT OR IGNORE INTO word_neighbors (word_id, neighbor_id, tier)
+  SELECT word_id, neighbor_id, MAX(tier) FROM (
+    SELECT word_id, neighbor_id, tier FROM word_neighbor_candidates
+    WHERE neighbor_id = NEW.id
+      AND word_id IN (SELECT neighbor_id FROM word_neighbor_candidates WHERE word_id = NEW.id)
+    LIMIT -1
+  )
+  GROUP BY word_id, neighbor_id;
+END;
@@ -3,7 +3,102 @@ from lib.db import db
 
 @task
 def init_db(c):
-  from flask import Flask
-  app = Flask(__name__)
-  db.init(app)
-  print("Database initialized successfully.")
\ No newline at end of file
+  # Clones the seeded template, building it first if it is out of date
+  db.init()
+  print("Database initialized successfully.")
+
+@task
+def build_template(c):
+  from lib.template import ensure_template
+  import time
+
+  start = time.perf_counter()
+  path = ensure_template()
+  print(f"Seeded template at {path} ({time.perf_counter() - start:.2f}s).")
+
+@task
+def migrate(c, database='words.db'):
+  from migrate import run_migrations
+  run_migrations(database)
+
+@task(help={
+  'path': 'JSON, JSONL/NDJSON or CSV file of words',
+  'group': 'Name of the group to add the words to (created if missing)',
+  'key': 'Top-level key holding the words array in a JSON file, e.g. verbs',
+  'format': 'json, jsonl or csv; guessed from the file extension by default',
+})
+def import_words(c, path, group, key=None, format=None, batch_size=1000, database='words.db'):
+  from lib.db import Db
+  from lib.importer import read_records, import_words
+  import time
+
+  start = time.perf_counter()
+  with Db(database).write() as connection:
+    stats = import_words(connection, read_records(path, words_key=key, format=format), group, batch_size=batch_size)
+  elapsed = time.perf_counter() - start
+  print(f"Imported {stats['records']} records into '{group}' in {elapsed:.2f}s: "
+        f"{stats['words_added']} new words, {stats['memberships_added']} added to the group.")
+
+@task(help={'verify_only': 'Only report rollups that disagree with history'})
+def rebuild_rollups(c, verify_only=False, database='words.db'):
+  from lib.db import Db
+  from lib.rollups import rebuild, verify
+
+  with Db(database).write() as connection:
+    if not verify_only:
+      rebuild(connection)
+      print("Rebuilt dashboard rollups from history.")
+    mismatches = verify(connection)
+  for name, count in mismatches.items():
+    print(f"{name}: {count} row(s) differ from history")
+  if mismatches:
+    raise SystemExit(1)
+  print("Dashboard rollups match history.")
+
+@task
+def rebuild_schedule(c, database='words.db'):
+  from lib.db import Db
+  from lib.scheduler import replay
+  import time
+
+  start = time.perf_counter()
+  with Db(database).write() as connection:
+    replayed = replay(connection)
+  print(f"Replayed {replayed} reviews into the study schedule in {time.perf_counter() - start:.2f}s.")
+
+@task(help={
+  'output': 'Directory of Parquet files and manifest.json; later runs add only new rows',
+  'batch_size': 'Rows read from SQLite per batch',
+  'learner_db_dir': "The app's LEARNER_DB_DIR, to export each learner's history too",
+})
+def export_history(c, output='exports', database='words.db', batch_size=50000, learner_db_dir=None):
+  from lib.db import Db
+  from lib.export import export_history
+  from lib.shards import learner_files
+  import time
+
+  def shard_readers(directory):
+    # One shard open at a time, each read like the shared database
+    for learner, path in learner_files(directory):
+      shard = Db(path)
+      connection = shard.acquire_reader()
+      try:
+        yield learner, connection
+      finally:
+        shard.release_reader(connection)
+        shard.dispose()
+
+  start = time.perf_counter()
+  db = Db(database)
+  # A pooled reader: each batch is its own short read, so writers are never
+  # held up for the length of the export
+  connection = db.acquire_reader()
+  try:
+    learners = shard_readers(learner_db_dir) if learner_db_dir else ()
+    exported = export_history(connection, output, batch_size=batch_size, learners=learners)
+  finally:
+    db.release_reader(connection)
+    db.dispose()
+  for table, rows in exported.items():
+    print(f"{table}: {rows} new rows")
+  print(f"Exported to {output} in {time.perf_counter() - start:.2f}s.")
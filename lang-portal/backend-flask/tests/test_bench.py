@@ -0,0 +1,30 @@
+import sqlite3
+
+from bench.dataset import build
+from bench.load import SCENARIOS, compare
+from lib.rollups import verify
+
+def test_load_scenarios_cover_every_route(app):
+    routes = {(rule.rule, method) for rule in app.url_map.iter_rules() if rule.endpoint != 'static'
+              for method in rule.methods - {'HEAD', 'OPTIONS'}}
+    assert routes == {(scenario.rule, scenario.method) for scenario in SCENARIOS}
+
+def test_dataset_matches_rollups(tmp_path):
+    path = str(tmp_path / 'bench.db')
+    build(path, words=200, groups=5, reviews=1000, log=lambda message: None)
+    connection = sqlite3.connect(path)
+    try:
+        assert connection.execute('SELECT COUNT(*) FROM words').fetchone()[0] == 200
+        assert connection.execute('SELECT SUM(words_count) FROM groups').fetchone()[0] == \
+            connection.execute('SELECT COUNT(*) FROM word_groups').fetchone()[0]
+        assert connection.execute('SELECT SUM(correct_count + wrong_count) FROM word_reviews').fetchone()[0] == 1000
+        assert verify(connection) == {}
+    finally:
+        connection.close()
+
+def test_compare_flags_regressions():
+    baseline = {'endpoints': {'words': {'p95_ms': 10.0, 'throughput': 500.0, 'errors': 0}}}
+    ok = {'endpoints': {'words': {'p95_ms': 11.0, 'throughput': 450.0, 'errors': 0}}}
+    slow = {'endpoints': {'words': {'p95_ms': 13.0, 'throughput': 450.0, 'errors': 0}}}
+    assert compare(ok, baseline, 0.2) == {}
+    assert list(compare(slow, baseline, 0.2)) == ['words']
@@ -0,0 +1,48 @@
+
+def test_conditional_get(app, client):
+    first = client.get('/groups')
+    etag = first.headers['ETag']
+    assert client.get('/groups').get_data() == first.get_data()
+
+    response = client.get('/groups', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.get_data() == b''
+    assert client.get('/api/cache/stats').get_json() == {
+        'hits': 2, 'misses': 1, 'not_modified': 1, 'evictions': 0,
+        'entries': 1, 'bytes': len(first.get_data()), 'max_bytes': app.response_cache.max_bytes
+    }
+
+def test_not_modified_without_database(app, client, monkeypatch):
+    app.response_cache.version_ttl = 60
+    etag = client.get('/api/words/1').headers['ETag']
+
+    def unavailable():
+        raise AssertionError('database used')
+    monkeypatch.setattr(app.db, 'acquire_reader', unavailable)
+    assert client.get('/api/words/1', headers={'If-None-Match': etag}).status_code == 304
+
+def test_writes_invalidate_dependent_entries(app, client):
+    words = client.get('/api/words/1')
+    groups = client.get('/groups/1')
+    with app.db.write() as connection:
+        connection.execute('UPDATE word_reviews SET correct_count = 5 WHERE word_id = 1')
+
+    response = client.get('/api/words/1', headers={'If-None-Match': words.headers['ETag']})
+    assert response.status_code == 200
+    assert response.get_json()['correct_count'] == 5
+    assert client.get('/groups/1', headers={'If-None-Match': groups.headers['ETag']}).status_code == 304
+
+def test_query_args_are_part_of_the_key(client):
+    assert client.get('/api/words?page=1').headers['ETag'] != client.get('/api/words?page=2').headers['ETag']
+
+def test_lru_eviction(app, client):
+    size = len(client.get('/groups/1').get_data())
+    app.response_cache.clear()
+    app.response_cache.max_bytes = size * 2
+    client.get('/groups/1')
+    client.get('/groups/2')  # 404s are not cached
+    client.get('/groups')
+    client.get('/groups/1')
+    stats = app.response_cache.stats()
+    assert stats['entries'] <= 2 and stats['bytes'] <= size * 2
+    assert stats['evictions'] >= 1
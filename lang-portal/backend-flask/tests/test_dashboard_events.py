@@ -0,0 +1,149 @@
+import json
+import threading
+
+from lib.publisher import Publisher, patch
+
+def read_events(chunks, count):
+    """The next `count` events from an SSE stream as (name, data)."""
+    events = []
+    while len(events) < count:
+        chunk = next(chunks)
+        chunk = chunk.decode('utf-8') if isinstance(chunk, bytes) else chunk
+        fields = dict(line.split(': ', 1) for line in chunk.strip().split('\n') if not line.startswith(':'))
+        if 'event' in fields:
+            events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+def open_stream(client, query=''):
+    response = client.get(f'/api/dashboard/events{query}', buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    return response, iter(response.response)
+
+def review(client, correct=True):
+    response = client.post('/study-sessions/1/reviews', json={'reviews': [{'word_id': 1, 'correct': correct}]})
+    assert response.status_code == 201, response.get_json()
+
+def test_patch():
+    assert patch({'a': 1, 'b': 2}, {'a': 1, 'b': 3}) == {'b': 3}
+    assert patch({'word': {'id': 1, 'correct_count': 1}}, {'word': {'id': 1, 'correct_count': 2}}) == \
+        {'word': {'id': 1, 'correct_count': 2}}
+    assert patch(None, {'a': 1}) == {'a': 1}
+    assert patch({'a': 1}, None) is None
+
+def test_stream_sends_state_then_patches(client):
+    stats = client.get('/dashboard/stats').get_json()
+    session = client.get('/dashboard/recent-session').get_json()['session']
+
+    response, chunks = open_stream(client)
+    assert dict(read_events(chunks, 2)) == {'stats': stats, 'session': session}
+
+    review(client)
+    events = dict(read_events(chunks, 2))
+    new_stats = client.get('/dashboard/stats').get_json()
+    assert events['stats'] == {key: value for key, value in new_stats.items() if stats[key] != value}
+    assert events['session'] == {'word': {**session['word'], 'correct_count': session['word']['correct_count'] + 1}}
+    response.close()
+
+def test_one_computation_per_write(app, client):
+    streams = [open_stream(client) for _ in range(3)]
+    for _, chunks in streams:
+        read_events(chunks, 2)
+    assert app.dashboard_publisher.computations == 1
+    assert app.dashboard_publisher.subscriber_count() == 3
+
+    review(client, correct=False)
+    for _, chunks in streams:
+        assert 'session' in dict(read_events(chunks, 2))
+    assert app.dashboard_publisher.computations == 2
+
+    for response, _ in streams:
+        response.close()
+    assert app.dashboard_publisher.subscriber_count() == 0
+
+def test_vocabulary_writes_reach_open_streams(app, client):
+    response, chunks = open_stream(client)
+    read_events(chunks, 2)
+
+    assert client.post('/api/words', json={'word': 'book', 'meaning': 'كتاب'}).status_code == 201
+    assert read_events(chunks, 1) == [('stats', {'total_vocabulary': 2})]
+
+    with app.db.write() as connection:
+        connection.execute("INSERT INTO groups (name) VALUES ('Other Group')")
+    assert client.post('/groups/1/merge', json={'target_group_id': 2}).status_code == 200
+    assert read_events(chunks, 1) == [('session', {'group': {'id': 2, 'name': 'Other Group'}})]
+    response.close()
+
+def test_max_events_and_keepalive(app, client):
+    app.config['DASHBOARD_KEEPALIVE_SECONDS'] = 0.01
+    response, chunks = open_stream(client, '?max_events=3')
+    read_events(chunks, 2)
+    assert next(chunks) == b': keepalive\n\n'
+    review(client)
+    read_events(chunks, 1)
+    assert list(chunks) == []
+    assert app.dashboard_publisher.subscriber_count() == 0
+
+    assert client.get('/api/dashboard/events?max_events=0').status_code == 400
+
+def test_writes_are_coalesced():
+    computing = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    class Database:
+        def acquire_reader(self):
+            return self
+        def release_reader(self, connection):
+            pass
+        def cursor(self):
+            return None
+
+    def compute(cursor):
+        calls.append(len(calls))
+        if len(calls) == 2:
+            # Hold the first recomputation while more writes come in
+            computing.set()
+            release.wait(5)
+        return {'stats': {'writes': len(calls)}}
+
+    publisher = Publisher(lambda learner: Database(), compute)
+    subscription = publisher.subscribe()
+    publisher.notify()
+    assert computing.wait(5)
+    for _ in range(10):
+        publisher.notify()
+    release.set()
+    events = subscription.events(keepalive=5)
+    assert next(events).startswith('id: 1\nevent: stats\ndata: {"writes":1}')
+    assert 'data: {"writes":2}' in next(events)
+    assert 'data: {"writes":3}' in next(events)
+    publisher.stop()
+    assert list(events) == []
+    assert len(calls) == 3
+
+def test_write_during_subscribe_is_not_lost():
+    writes = [0]
+
+    class Database:
+        def acquire_reader(self):
+            return self
+        def release_reader(self, connection):
+            pass
+        def cursor(self):
+            return None
+
+    def compute(cursor):
+        state = {'stats': {'writes': writes[0]}}
+        if writes[0] == 0:
+            # A write commits after the new subscriber's state was read
+            writes[0] += 1
+            publisher.notify()
+        return state
+
+    publisher = Publisher(lambda learner: Database(), compute)
+    subscription = publisher.subscribe()
+    events = subscription.events(keepalive=5)
+    assert 'data: {"writes":0}' in next(events)
+    assert 'data: {"writes":1}' in next(events)
+    publisher.stop()
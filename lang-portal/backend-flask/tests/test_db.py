@@ -0,0 +1,31 @@
+import sqlite3
+import pytest
+
+def test_connections_use_wal(app):
+    connection = app.db.acquire_reader()
+    assert connection.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    app.db.release_reader(connection)
+
+def test_readers_are_read_only_and_pooled(app):
+    reader = app.db.acquire_reader()
+    with pytest.raises(sqlite3.OperationalError):
+        reader.execute('DELETE FROM words')
+    app.db.release_reader(reader)
+    assert app.db.acquire_reader() is reader
+
+def test_writes_share_one_writer(app):
+    writer = app.db.acquire_writer()
+    writer.execute('DELETE FROM word_reviews')
+    app.db.release_writer()
+    # Uncommitted work is rolled back when the writer is released
+    assert app.db.acquire_writer() is writer
+    assert writer.execute('SELECT COUNT(*) FROM word_reviews').fetchone()[0] == 1
+    app.db.release_writer()
+
+def test_write_after_read_in_same_context(app):
+    with app.test_request_context('/api/words', method='GET'):
+        reader = app.db.get()
+    with app.test_request_context('/api/words', method='POST'):
+        writer = app.db.get()
+        assert writer is not reader
+        writer.execute('DELETE FROM word_reviews')
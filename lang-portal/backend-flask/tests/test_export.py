@@ -0,0 +1,94 @@
+import os
+import sqlite3
+
+import pytest
+
+pq = pytest.importorskip('pyarrow.parquet')
+
+from lib.export import export_history, load_manifest
+from lib.shards import LearnerShards, learner_files
+
+def add_reviews(app, days):
+    with app.db.write() as connection:
+        connection.executemany('''
+            INSERT INTO word_review_items (word_id, study_session_id, correct, created_at)
+            VALUES (1, 1, ?, ?)
+        ''', [(i % 2, f'{day} 12:00:00') for i, day in enumerate(days)])
+
+def export(app, directory, batch_size=3):
+    connection = app.db.acquire_reader()
+    try:
+        return export_history(connection, str(directory), batch_size=batch_size)
+    finally:
+        app.db.release_reader(connection)
+
+def read(directory, table):
+    manifest = load_manifest(str(directory))
+    rows = []
+    for entry in manifest['tables'][table]['files']:
+        rows += pq.read_table(os.path.join(directory, entry['path'])).to_pylist()
+    return sorted(rows, key=lambda row: row['id'])
+
+def test_export_partitions_by_day(app, tmp_path):
+    add_reviews(app, ['2025-01-01'] * 4 + ['2025-01-02'] * 3)
+
+    assert export(app, tmp_path) == {'word_review_items': 7, 'study_sessions': 1}
+    manifest = load_manifest(str(tmp_path))
+    files = manifest['tables']['word_review_items']['files']
+    assert {entry['date'] for entry in files} == {'2025-01-01', '2025-01-02'}
+    assert all(entry['path'].startswith(f"word_review_items/date={entry['date']}/") for entry in files)
+    assert sum(entry['rows'] for entry in files) == 7
+
+    reviews = read(tmp_path, 'word_review_items')
+    assert [row['correct'] for row in reviews] == [False, True] * 3 + [False]
+    assert str(reviews[-1]['created_at']) == '2025-01-02 12:00:00'
+    assert read(tmp_path, 'study_sessions')[0]['group_id'] == 1
+
+def test_export_is_incremental(app, tmp_path):
+    add_reviews(app, ['2025-01-01'] * 2)
+    export(app, tmp_path)
+    watermark = load_manifest(str(tmp_path))['tables']['word_review_items']['watermark']
+
+    assert export(app, tmp_path) == {'word_review_items': 0, 'study_sessions': 0}
+    add_reviews(app, ['2025-01-03'])
+    assert export(app, tmp_path)['word_review_items'] == 1
+
+    state = load_manifest(str(tmp_path))['tables']['word_review_items']
+    assert state['files'][-1]['min_id'] == watermark + 1 and state['rows'] == 3
+    assert len(read(tmp_path, 'word_review_items')) == 3
+
+def test_export_covers_learner_shards(app, tmp_path):
+    shards = LearnerShards(app.config['DATABASE'], str(tmp_path / 'learners'))
+    for learner, sessions in (('amira', 2), ('badr', 1)):
+        with shards.get(learner).write() as connection:
+            connection.executemany('''
+                INSERT INTO study_sessions (word_id, group_id, activity_id, correct, timestamp)
+                VALUES (1, 1, 1, 1, '2025-01-01 12:00:00')
+            ''', [()] * sessions)
+    shards.close()
+
+    def learners():
+        for learner, path in learner_files(str(tmp_path / 'learners')):
+            connection = sqlite3.connect(path)
+            try:
+                yield learner, connection
+            finally:
+                connection.close()
+
+    def export_all():
+        connection = app.db.acquire_reader()
+        try:
+            return export_history(connection, str(tmp_path / 'out'), batch_size=3, learners=learners())
+        finally:
+            app.db.release_reader(connection)
+
+    assert export_all()['study_sessions'] == 4
+    state = load_manifest(str(tmp_path / 'out'))['tables']['study_sessions']
+    assert state['rows'] == 4 and state['watermark'] == 1
+    # Shards number their rows on their own, so each has its own watermark
+    assert {learner: entry['watermark'] for learner, entry in state['learners'].items()} == {'amira': 2, 'badr': 1}
+    sessions = read(tmp_path / 'out', 'study_sessions')
+    assert sorted((row['learner_id'] or '', row['id']) for row in sessions) == \
+        [('', 1), ('amira', 1), ('amira', 2), ('badr', 1)]
+
+    assert export_all()['study_sessions'] == 0
@@ -0,0 +1,74 @@
+import itertools
+
+import pytest
+
+from lib.fuzzy import bounded_levenshtein, trigrams
+
+def add_word(app, english, transliteration):
+    with app.db.write() as connection:
+        return connection.execute('''
+            INSERT INTO words (english, arabic, root, transliteration, parts, parts_of_speech)
+            VALUES (?, ?, '', ?, '[]', '{}')
+        ''', (english, english, transliteration)).lastrowid
+
+def fuzzy(client, query):
+    response = client.get(f'/api/words/fuzzy?{query}')
+    assert response.status_code == 200, response.get_json()
+    return [(word['english'], word['distance'], word['matched']) for word in response.get_json()['words']]
+
+def levenshtein(a, b):
+    previous = list(range(len(b) + 1))
+    for i, char in enumerate(a, 1):
+        current = [i]
+        for j, other in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != other)))
+        previous = current
+    return previous[-1]
+
+def test_bounded_levenshtein():
+    words = ['', 'a', 'ab', 'ba', 'abc', 'kataba', 'ktaba', 'katab', 'kitab']
+    for a, b in itertools.product(words, repeat=2):
+        for limit in range(4):
+            assert bounded_levenshtein(a, b, limit) == min(levenshtein(a, b), limit + 1), (a, b, limit)
+
+def test_index_matches_python_trigrams(app):
+    word_id = add_word(app, 'To  Write', 'Kataba')
+    with app.db.write() as connection:
+        stored = {row[0] for row in connection.execute('SELECT trigram FROM word_trigrams WHERE word_id = ?', (word_id,))}
+        assert stored == set(trigrams('To  Write')) | set(trigrams('Kataba'))
+        assert connection.execute("SELECT words FROM word_trigram_counts WHERE trigram = 'kat'").fetchone()[0] == 1
+
+        connection.execute("UPDATE words SET transliteration = 'daras' WHERE id = ?", (word_id,))
+        assert connection.execute("SELECT words FROM word_trigram_counts WHERE trigram = 'kat'").fetchone()[0] == 0
+        assert connection.execute(
+            "SELECT COUNT(*) FROM word_trigrams WHERE trigram = 'ras' AND word_id = ?", (word_id,)).fetchone()[0] == 1
+
+def test_typos_find_the_word(app, client):
+    add_word(app, 'to write', 'kataba')
+    add_word(app, 'book', 'kitaab')
+    add_word(app, 'to study', 'darasa')
+
+    for query in ('kataba', 'katab', 'ktaba', 'kattaba'):
+        assert fuzzy(client, f'q={query}')[0][0] == 'to write'
+    assert fuzzy(client, 'q=kataba')[0] == ('to write', 0, 'transliteration')
+    # Against the closest word of the English as well as all of it
+    assert fuzzy(client, 'q=wriitte&max_distance=2')[0] == ('to write', 2, 'english')
+    assert fuzzy(client, 'q=Studdy')[0] == ('to study', 1, 'english')
+    assert fuzzy(client, 'q=katab&max_distance=0') == []
+    assert fuzzy(client, 'q=zzzzzz') == []
+
+def test_short_queries_get_fewer_edits(app, client):
+    add_word(app, 'egg', 'bayd')
+    add_word(app, 'sea', 'bahr')
+    # Three trigrams are too few to find every word even one edit away
+    # ("xh" shares none with "bh"), so a two-letter query only matches exactly
+    response = client.get('/api/words/fuzzy?q=bh&max_distance=3').get_json()
+    assert response['max_distance'] == 0 and response['words'] == []
+    # Four trigrams are enough for one edit, and every word within it is found
+    response = client.get('/api/words/fuzzy?q=bayr&max_distance=3').get_json()
+    assert response['max_distance'] == 1
+    assert sorted((word['english'], word['distance']) for word in response['words']) == [('egg', 1), ('sea', 1)]
+
+@pytest.mark.parametrize('query', ['', 'q=', 'q=' + 'a' * 65])
+def test_rejected_requests(client, query):
+    assert client.get(f'/api/words/fuzzy?{query}').status_code == 400
@@ -0,0 +1,42 @@
+import io
+import json
+import pytest
+from lib.importer import JsonArrayReader, read_records, import_words
+
+SEED = 'seed/data_verbs.json'
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 4096])
+def test_json_reader_streams_nested_array(chunk_size):
+    with open(SEED, encoding='utf-8') as file:
+        expected = json.load(file)['verbs']
+    with open(SEED, encoding='utf-8') as file:
+        assert list(JsonArrayReader(file, key='verbs', chunk_size=chunk_size)) == expected
+
+def test_json_reader_skips_other_keys():
+    document = '{"meta": {"n": [1, 2]}, "words": [{"a": 1}, 2.5, "x"], "tail": null}'
+    assert list(JsonArrayReader(io.StringIO(document), key='words', chunk_size=3)) == [{'a': 1}, 2.5, 'x']
+
+def test_import_upserts_and_counts_once(app, tmp_path):
+    jsonl = tmp_path / 'words.jsonl'
+    jsonl.write_text('\n'.join(json.dumps(word, ensure_ascii=False) for word in [
+        {'english': 'book', 'arabic': 'كِتَاب', 'root': 'ك ت ب', 'transliteration': 'kitaab', 'parts': []},
+        {'english': 'book', 'arabic': 'كِتَاب', 'root': 'ك ت ب', 'transliteration': 'kitab', 'parts': []},
+        {'english': 'test', 'arabic': 'اختبار', 'root': 'خ ب ر', 'transliteration': 'ikhtibaar', 'parts': []},
+    ]), encoding='utf-8')
+    csv_file = tmp_path / 'words.csv'
+    csv_file.write_text('english,arabic,root,transliteration,parts\nwriter,كَاتِب,ك ت ب,kaatib,[]\n', encoding='utf-8')
+
+    with app.db.write() as connection:
+        stats = import_words(connection, read_records(str(jsonl)), 'Imported', batch_size=2)
+        assert stats == {'records': 3, 'words_added': 1, 'memberships_added': 2}
+        stats = import_words(connection, read_records(str(csv_file)), 'Imported')
+        assert stats == {'records': 1, 'words_added': 1, 'memberships_added': 1}
+        # Re-importing changes nothing
+        stats = import_words(connection, read_records(str(jsonl)), 'Imported')
+        assert stats['words_added'] == stats['memberships_added'] == 0
+
+        group = connection.execute("SELECT id, words_count FROM groups WHERE name = 'Imported'").fetchone()
+        assert group['words_count'] == 3
+        assert connection.execute('SELECT COUNT(*) FROM word_groups WHERE group_id = ?', (group['id'],)).fetchone()[0] == 3
+        transliteration = connection.execute("SELECT transliteration FROM words WHERE english = 'book'").fetchone()[0]
+        assert transliteration == 'kitab'
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+def add_word(app, english, letters, arabic=None):
+    parts = json.dumps([{'letter': letter, 'transliteration': ''} for letter in letters], ensure_ascii=False)
+    with app.db.write() as connection:
+        return connection.execute('''
+            INSERT INTO words (english, arabic, root, transliteration, parts, parts_of_speech)
+            VALUES (?, ?, '', '', ?, '{}')
+        ''', (english, arabic or ''.join(letters), parts)).lastrowid
+
+def by_letters(client, query):
+    response = client.get(f'/api/words/by_letters?{query}')
+    assert response.status_code == 200, response.get_json()
+    return [word['english'] for word in response.get_json()['words']]
+
+def test_index_follows_parts(app):
+    word_id = add_word(app, 'to write', ['كَ', 'تَ', 'بَ'])
+    with app.db.write() as connection:
+        letters = {row[0] for row in connection.execute('SELECT letter FROM word_letters WHERE word_id = ?', (word_id,))}
+        assert letters == {'كَ', 'ك', 'تَ', 'ت', 'بَ', 'ب'}
+
+        connection.execute('UPDATE words SET parts = ? WHERE id = ?', (json.dumps([{'letter': 'مـُ'}]), word_id))
+        letters = {row[0] for row in connection.execute('SELECT letter FROM word_letters WHERE word_id = ?', (word_id,))}
+        assert letters == {'مُ', 'م'}  # tatweel dropped
+
+        connection.execute('DELETE FROM words WHERE id = ?', (word_id,))
+        assert connection.execute('SELECT COUNT(*) FROM word_letters WHERE word_id = ?', (word_id,)).fetchone()[0] == 0
+
+def test_include_and_exclude(app, client):
+    add_word(app, 'to write', ['كَ', 'تَ', 'بَ'])
+    add_word(app, 'to be killed', ['قُ', 'تِ', 'لَ'])
+    add_word(app, 'book', ['كِ', 'تَ', 'ا', 'بٌ'])
+    add_word(app, 'lecture', ['مُ', 'حَ', 'ا', 'ضَ', 'رَ', 'ةٌ'])
+
+    assert by_letters(client, 'include=ك,ت') == ['to write', 'book']
+    assert by_letters(client, 'include=ت&exclude=ب') == ['to be killed']
+    # With harakat only that combination matches
+    assert by_letters(client, 'include=تَ') == ['to write', 'book']
+    assert by_letters(client, 'include=ك,ـتـ&exclude=ا') == ['to write']
+    assert by_letters(client, 'include=ظ') == []
+
+def test_paging_and_group_filter(app, client):
+    ids = [add_word(app, f'word {i}', ['سَ', 'لَ', 'مَ']) for i in range(5)]
+    client.post('/groups/1/words', json={'word_ids': ids[3:]})
+
+    first = client.get('/api/words/by_letters?include=س&limit=2').get_json()
+    assert [word['id'] for word in first['words']] == ids[:2] and first['has_more']
+    last = client.get('/api/words/by_letters?include=س&limit=2&page=3').get_json()
+    assert [word['id'] for word in last['words']] == ids[4:] and not last['has_more']
+    assert by_letters(client, 'include=س&group_id=1') == ['word 3', 'word 4']
+
+def test_group_filter_follows_membership(app, client):
+    word_id = add_word(app, 'peace', ['سَ', 'لَ', 'ا', 'مٌ'])
+    assert by_letters(client, 'include=س&group_id=1') == []
+    # Straight into word_groups, without touching groups: the cached
+    # response must still go
+    with app.db.write() as connection:
+        connection.execute('INSERT INTO word_groups (word_id, group_id) VALUES (?, 1)', (word_id,))
+    assert by_letters(client, 'include=س&group_id=1') == ['peace']
+
+@pytest.mark.parametrize('query', ['', 'exclude=ب', 'include=' + ','.join('ابتثجحخدذرز')])
+def test_rejected_requests(client, query):
+    assert client.get(f'/api/words/by_letters?{query}').status_code == 400
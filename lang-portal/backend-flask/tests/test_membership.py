@@ -0,0 +1,78 @@
+import pytest
+
+from lib.rollups import verify
+
+@pytest.fixture
+def words(app):
+    with app.db.write() as connection:
+        return [connection.execute('''
+            INSERT INTO words (english, arabic, root, transliteration, parts, parts_of_speech)
+            VALUES (?, ?, '', '', '{}', '{}')
+        ''', (f'word {i}', f'كلمة {i}')).lastrowid for i in range(5)]
+
+def create_group(app, name):
+    with app.db.write() as connection:
+        return connection.execute('INSERT INTO groups (name) VALUES (?)', (name,)).lastrowid
+
+def check_counts(app):
+    with app.db.write() as connection:
+        drift = connection.execute('''
+            SELECT g.id, g.words_count, COUNT(wg.word_id)
+            FROM groups g LEFT JOIN word_groups wg ON wg.group_id = g.id
+            GROUP BY g.id HAVING g.words_count != COUNT(wg.word_id)
+        ''').fetchall()
+        assert [tuple(row) for row in drift] == []
+        assert verify(connection) == {}
+
+def test_add_and_remove_words(app, client, words):
+    response = client.post('/groups/1/words', json={'word_ids': words + [1, 999]})
+    assert response.status_code == 200
+    # The existing member and the unknown word are skipped
+    assert response.get_json() == {'group_id': 1, 'added': 5, 'word_count': 6}
+    assert client.get('/groups/1').get_json()['word_count'] == 6
+
+    response = client.delete('/groups/1/words', json={'word_ids': words[:3] + [999]})
+    assert response.get_json() == {'group_id': 1, 'removed': 3, 'word_count': 3}
+    with app.db.write() as connection:
+        scheduled = [row[0] for row in connection.execute('SELECT word_id FROM group_word_schedule WHERE group_id = 1')]
+        assert sorted(scheduled) == sorted([1] + words[3:])
+    check_counts(app)
+
+def test_move_words(app, client, words):
+    target = create_group(app, 'Target')
+    client.post('/groups/1/words', json={'word_ids': words})
+    client.post(f'/groups/{target}/words', json={'word_ids': words[:2]})
+
+    response = client.post('/groups/1/words/move', json={'word_ids': words[:4], 'target_group_id': target})
+    assert response.status_code == 200
+    assert response.get_json() == {'group_id': 1, 'target_group_id': target, 'moved': 4, 'added': 2,
+                                   'word_count': 2, 'target_word_count': 4}
+    check_counts(app)
+
+def test_merge_groups(app, client, words):
+    source = create_group(app, 'Source')
+    client.post(f'/groups/{source}/words', json={'word_ids': words + [1]})
+    with app.db.write() as connection:
+        connection.execute('INSERT INTO study_sessions (word_id, group_id, activity_id, correct) VALUES (1, ?, 1, 1)', (source,))
+
+    response = client.post(f'/groups/{source}/merge', json={'target_group_id': 1})
+    assert response.status_code == 200
+    assert response.get_json() == {'merged_group_id': source, 'target_group_id': 1, 'added': 5,
+                                   'study_sessions_moved': 1, 'target_word_count': 6}
+    assert client.get(f'/groups/{source}').status_code == 404
+    sessions = client.get('/groups/1/study_sessions').get_json()
+    assert len(sessions['study_sessions']) == 2 and sessions['total_pages'] == 1
+    check_counts(app)
+
+@pytest.mark.parametrize('method, url, body, status', [
+    ('post', '/groups/1/words', {'word_ids': []}, 400),
+    ('post', '/groups/1/words', {'word_ids': [1, True]}, 400),
+    ('delete', '/groups/99/words', {'word_ids': [1]}, 404),
+    ('post', '/groups/1/words/move', {'word_ids': [1], 'target_group_id': 1}, 400),
+    ('post', '/groups/1/words/move', {'word_ids': [1], 'target_group_id': 99}, 404),
+    ('post', '/groups/1/merge', {}, 400),
+    ('post', '/groups/99/merge', {'target_group_id': 1}, 404),
+])
+def test_rejected_requests(app, client, method, url, body, status):
+    assert getattr(client, method)(url, json=body).status_code == status
+    check_counts(app)
@@ -0,0 +1,60 @@
+import logging
+
+import sqlite3
+
+from lib.metrics import Histogram, InstrumentedConnection, finish_request, parameter_shape, start_request
+
+def metric_lines(client, prefix):
+    text = client.get('/metrics').get_data(as_text=True)
+    return [line for line in text.splitlines() if line.startswith(prefix)]
+
+def test_request_metrics(client):
+    for _ in range(3):
+        assert client.get('/groups/1').status_code == 200
+    client.get('/groups/99')
+
+    assert 'http_request_duration_seconds_count{method="GET",route="/groups/<int:id>",status="200"} 3' in \
+        metric_lines(client, 'http_request_duration_seconds_count')
+    assert 'http_request_duration_seconds_count{method="GET",route="/groups/<int:id>",status="404"} 1' in \
+        metric_lines(client, 'http_request_duration_seconds_count')
+    # One statement counted per SQL query; cache hits run none
+    statements = metric_lines(client, 'http_request_sql_statements_sum{route="/groups/<int:id>"}')
+    assert statements and float(statements[0].split()[-1]) > 0
+
+def test_slow_queries_are_logged_without_values(app, client, caplog):
+    app.config['SLOW_QUERY_SECONDS'] = 0
+    with caplog.at_level(logging.WARNING):
+        client.get('/api/words/search?q=test')
+    slow = [record.getMessage() for record in caplog.records if 'Slow query' in record.getMessage()]
+    assert slow and any('params=(str' in message for message in slow)
+    assert not any("'test" in message for message in slow)
+    assert metric_lines(client, 'sqlite_slow_queries_total{route="/api/words/search"}')
+
+def test_statements_are_counted_per_parameter_set():
+    connection = sqlite3.connect(':memory:', factory=InstrumentedConnection)
+    connection.execute('CREATE TABLE t (x INTEGER)')
+    stats = start_request()
+    try:
+        connection.execute('SELECT 1')
+        connection.executemany('INSERT INTO t (x) VALUES (?)', [(1,), (2,), (3,)])
+    finally:
+        finish_request()
+        connection.close()
+    assert stats.statements == 4
+
+def test_parameter_shape():
+    assert parameter_shape((1, 'a', None)) == '(int, str, NoneType)'
+    assert parameter_shape({'q': 'x'}) == '{q: str}'
+    assert parameter_shape([(1, True), (2, False)], many=True) == '2 x (int, bool)'
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram('latency', 'Latency', ('route',), (0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(('/a',), value)
+    assert histogram.render()[2:] == [
+        'latency_bucket{route="/a",le="0.1"} 1',
+        'latency_bucket{route="/a",le="1"} 3',
+        'latency_bucket{route="/a",le="+Inf"} 4',
+        'latency_sum{route="/a"} 6.050000',
+        'latency_count{route="/a"} 4',
+    ]
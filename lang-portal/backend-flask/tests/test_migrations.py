@@ -0,0 +1,40 @@
+import sqlite3
+import pytest
+from lib.migrations import migrate, load_migrations, MigrationError
+
+def quiet(message):
+    pass
+
+@pytest.fixture
+def migrations_dir(tmp_path):
+    (tmp_path / '0001_create_items.sql').write_text('CREATE TABLE items (id INTEGER PRIMARY KEY);')
+    (tmp_path / '0002_index_items.sql').write_text('CREATE INDEX idx_items ON items (id);')
+    return tmp_path
+
+def test_applies_pending_migrations_once(migrations_dir):
+    connection = sqlite3.connect(':memory:')
+    assert migrate(connection, migrations_dir, log=quiet) == [1, 2]
+    assert migrate(connection, migrations_dir, log=quiet) == []
+    versions = connection.execute('SELECT version FROM schema_migrations').fetchall()
+    assert versions == [(1,), (2,)]
+
+def test_rejects_edited_migration(migrations_dir):
+    connection = sqlite3.connect(':memory:')
+    migrate(connection, migrations_dir, log=quiet)
+    (migrations_dir / '0002_index_items.sql').write_text('CREATE INDEX idx_other ON items (id);')
+    with pytest.raises(MigrationError):
+        migrate(connection, migrations_dir, log=quiet)
+
+def test_failed_migration_rolls_back(migrations_dir):
+    (migrations_dir / '0003_broken.sql').write_text(
+        'CREATE TABLE partial (id INTEGER);\nINSERT INTO missing VALUES (1);')
+    connection = sqlite3.connect(':memory:')
+    with pytest.raises(MigrationError):
+        migrate(connection, migrations_dir, log=quiet)
+    tables = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert 'partial' not in tables
+    assert connection.execute('SELECT MAX(version) FROM schema_migrations').fetchone()[0] == 2
+
+def test_repository_migrations_are_numbered_uniquely():
+    versions = [migration[0] for migration in load_migrations()]
+    assert versions == sorted(set(versions))
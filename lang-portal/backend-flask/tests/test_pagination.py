@@ -0,0 +1,40 @@
+import json
+import pytest
+from lib.pagination import encode_cursor, decode_cursor
+
+def add_words(app, count):
+    with app.db.write() as connection:
+        connection.executemany('''
+            INSERT INTO words (english, arabic, root, transliteration, parts, parts_of_speech)
+            VALUES (?, ?, '', '', ?, '')
+        ''', [(f'word {i % 7}', f'كلمة {i}', json.dumps([])) for i in range(count)])
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor('كتب', 42)) == ('كتب', 42)
+    with pytest.raises(ValueError):
+        decode_cursor('not-a-cursor')
+
+@pytest.mark.parametrize('sort_by', ['english', 'arabic'])
+@pytest.mark.parametrize('order', ['asc', 'desc'])
+def test_cursor_walks_every_word_once(app, client, order, sort_by):
+    add_words(app, 120)
+    seen = []
+    cursor = ''
+    while cursor is not None:
+        data = client.get(f'/api/words?sort_by={sort_by}&order={order}&cursor={cursor}').get_json()
+        seen.extend(word['id'] for word in data['words'])
+        cursor = data['next_cursor']
+    assert data['total_words'] == 121
+    assert sorted(seen) == list(range(1, 122))
+
+def test_invalid_cursor(client):
+    assert client.get('/groups?cursor=bogus').status_code == 400
+
+def test_cursor_needs_an_indexed_sort(client):
+    assert client.get('/api/words?sort_by=correct_count&cursor=').status_code == 400
+    assert client.get('/api/words?sort_by=root&cursor=').status_code == 200
+
+def test_group_study_sessions_cursor(client):
+    data = client.get('/groups/1/study_sessions?cursor=').get_json()
+    assert len(data['study_sessions']) == 1
+    assert data['next_cursor'] is None
@@ -0,0 +1,89 @@
+import re
+import pytest
+
+from lib.pagination import encode_cursor
+
+# Every GET route, with the scans it is expected to make: a walk down an index
+# that the page's LIMIT stops early, or the whole of a table that is small by
+# construction. Any other scan, including an index walk through a different
+# index, or an automatic index SQLite builds because a real one is missing,
+# fails the test. The schema table is in the page cache and never counts,
+# nor does the handful of rows in table_versions the response cache reads;
+# virtual tables (FTS5, json_each) are searched through their own indexes.
+# CTEs are listed by name.
+ROUTES = {
+    '/api/words': {'w USING INDEX idx_words_english'},
+    '/api/words?sort_by=arabic&cursor=': {'w USING INDEX idx_words_arabic_id'},
+    '/api/words?sort_by=arabic&cursor=' + encode_cursor('', 0): set(),
+    '/api/words?sort_by=root&order=desc&cursor=' + encode_cursor('~', 0): set(),
+    '/api/words/1': set(),
+    '/api/words/1?include=groups,reviews': set(),
+    '/api/words?ids=1,2&include=groups,reviews': set(),
+    '/api/words?include=groups': {'w USING INDEX idx_words_english'},
+    '/api/words/search?q=tes': set(),
+    '/api/words/fuzzy?q=tset': {'c'},  # the capped candidate list
+    '/api/words/search?q=tes&group_id=1': set(),
+    '/api/roots/خ ب ر/words': set(),
+    '/api/words/by_letters?include=خ,تِ&exclude=ب': set(),
+    '/api/words/by_letters?include=خ&group_id=1': set(),
+    '/groups': {'groups USING INDEX idx_groups_name_id'},
+    '/groups?sort_by=words_count&order=desc&cursor=' + encode_cursor(10 ** 9, 0): set(),
+    '/groups/1': set(),
+    '/groups/1/words': set(),
+    '/groups/1/words/raw': set(),
+    '/api/groups/1/quiz?n=5&seed=1': set(),
+    '/groups/1/study_sessions': set(),
+    '/groups/1/study_sessions?sort_by=endTime&cursor=': set(),
+    '/groups/1/study_sessions?sort_by=reviewItemsCount&order=asc': set(),
+    '/study-sessions': {'ss USING INDEX idx_study_sessions_timestamp'},
+    '/api/study_sessions/next_words': set(),
+    '/api/study_sessions/next_words?group_id=1': set(),
+    '/study-activities': {'study_activities'},
+    '/study-activities/1': set(),
+    '/dashboard/recent-session': {'ss USING INDEX idx_study_sessions_timestamp'},
+    '/dashboard/stats': {'study_totals'},
+    '/api/dashboard/study_progress': set(),
+}
+
+SCAN = re.compile(r'^SCAN (.+)$')
+
+@pytest.fixture
+def statements(app, monkeypatch):
+    traced = []
+    connect = app.db.connect
+
+    def traced_connect(readonly=False):
+        connection = connect(readonly)
+        connection.set_trace_callback(traced.append)
+        return connection
+
+    monkeypatch.setattr(app.db, 'connect', traced_connect)
+    return traced
+
+def full_scans(connection, sql):
+    plan = connection.execute(f'EXPLAIN QUERY PLAN {sql}').fetchall()
+    details = [row[3] for row in plan]
+    scans = {
+        match.group(1) for match in map(SCAN.match, details)
+        if match and 'VIRTUAL TABLE' not in match.group(1)
+    }
+    scans = {
+        scan for scan in scans
+        if not scan.startswith('main.') and scan not in ('sqlite_master', 'table_versions', 'CONSTANT ROW')
+    }
+    automatic = [detail for detail in details if 'AUTOMATIC' in detail]
+    return scans, automatic
+
+@pytest.mark.parametrize('url', ROUTES)
+def test_route_queries_use_indexes(app, client, statements, url):
+    response = client.get(url)
+    assert response.status_code == 200, response.get_json()
+
+    queries = [sql for sql in statements if sql.lstrip().upper().startswith(('SELECT', 'WITH'))]
+    assert queries
+    with app.db.write() as connection:
+        for sql in queries:
+            scans, automatic = full_scans(connection, sql)
+            assert not automatic, f'{url} builds an automatic index:\n{sql}'
+            unexpected = scans - ROUTES[url]
+            assert not unexpected, f'{url} scans {unexpected}:\n{sql}'
@@ -0,0 +1,103 @@
+from lib.importer import import_words
+
+def word(english, arabic, root=''):
+    return {'english': english, 'arabic': arabic, 'root': root, 'transliteration': '', 'parts': []}
+
+VOCABULARY = [
+    word('to write', 'كتب', 'ك ت ب'),
+    word('book', 'كتاب', 'ك ت ب'),
+    word('office', 'مكتب', 'ك ت ب'),
+    word('writer', 'كاتب', 'ك ت ب'),
+    word('dog', 'كلب'),
+    word('heart', 'قلب'),
+    word('to learn', 'درس', 'د ر س'),
+    word('lesson', 'درس', 'د ر س'),
+    word('school', 'مدرسة', 'د ر س'),
+    word('teacher', 'مدرس', 'د ر س'),
+]
+
+def import_vocabulary(app, records=VOCABULARY, group='Quiz'):
+    with app.db.write() as connection:
+        import_words(connection, records, group)
+        ids = {row['english']: row['id'] for row in connection.execute('SELECT id, english FROM words')}
+        group_id = connection.execute('SELECT id FROM groups WHERE name = ?', (group,)).fetchone()[0]
+    return ids, group_id
+
+def neighbors(app, word_id):
+    with app.db.write() as connection:
+        return {row[0]: row[1] for row in connection.execute(
+            'SELECT neighbor_id, tier FROM word_neighbors WHERE word_id = ?', (word_id,))}
+
+def test_import_builds_neighbors(app):
+    ids, _ = import_vocabulary(app)
+
+    # Same root first, then the same length and first letter, then length
+    book = neighbors(app, ids['book'])
+    assert book[ids['to write']] == 3 and book[ids['office']] == 3
+    assert neighbors(app, ids['dog'])[ids['to write']] == 2
+    assert neighbors(app, ids['heart'])[ids['dog']] == 1
+
+    # A later import refreshes the lists it lands next to
+    more, _ = import_vocabulary(app, [word('books', 'كتب', 'ك ت ب')])
+    assert neighbors(app, ids['writer'])[more['books']] == 3
+
+    with app.db.write() as connection:
+        connection.execute('DELETE FROM words WHERE id = ?', (ids['book'],))
+    assert neighbors(app, ids['book']) == {}
+    assert ids['book'] not in neighbors(app, ids['to write'])
+
+def test_created_and_edited_words_get_neighbors(app, client):
+    ids, _ = import_vocabulary(app)
+    response = client.post('/api/words', json={'word': 'club', 'meaning': 'نادي'})
+    assert response.status_code == 201
+    club = response.get_json()['id']
+    assert neighbors(app, club)
+
+    # Moving the dog into the root family swaps its list over, and the
+    # family's lists take it in place of the words now further away
+    with app.db.write() as connection:
+        connection.execute("UPDATE words SET root = 'ك ت ب' WHERE id = ?", (ids['dog'],))
+    with app.db.write() as connection:
+        expected = {(row[0], row[1]): row[2] for row in connection.execute('''
+            SELECT word_id, neighbor_id, MAX(tier) FROM word_neighbor_candidates GROUP BY word_id, neighbor_id
+        ''')}
+        actual = {(row[0], row[1]): row[2] for row in connection.execute('SELECT * FROM word_neighbors')}
+    assert actual == expected
+    assert neighbors(app, ids['dog'])[ids['writer']] == 3
+
+def test_quiz(app, client):
+    ids, group_id = import_vocabulary(app)
+
+    response = client.get(f'/api/groups/{group_id}/quiz?n=5&seed=7')
+    assert response.status_code == 200, response.get_json()
+    questions = response.get_json()['questions']
+    assert len(questions) == 5
+    assert len({question['word']['id'] for question in questions}) == 5
+    for question in questions:
+        choices = question['choices']
+        assert len(choices) == 4
+        assert len({choice['english'].casefold() for choice in choices}) == 4
+        assert question['answer_id'] == question['word']['id']
+        assert question['answer_id'] in [choice['id'] for choice in choices]
+
+    # The same seed replays the same quiz
+    assert client.get(f'/api/groups/{group_id}/quiz?n=5&seed=7').get_json()['questions'] == questions
+
+def test_quiz_distractors_prefer_the_root(app, client):
+    ids, group_id = import_vocabulary(app)
+
+    questions = client.get(f'/api/groups/{group_id}/quiz?n=10&choices=3&seed=1').get_json()['questions']
+    school = next(question for question in questions if question['word']['english'] == 'school')
+    assert {choice['english'] for choice in school['choices']} < {'school', 'to learn', 'lesson', 'teacher'}
+
+def test_quiz_smaller_than_n(app, client):
+    ids, group_id = import_vocabulary(app, VOCABULARY[:3])
+
+    questions = client.get(f'/api/groups/{group_id}/quiz?n=20&choices=6').get_json()['questions']
+    assert sorted(question['word']['id'] for question in questions) == sorted(ids[w['english']] for w in VOCABULARY[:3])
+
+def test_quiz_errors(client):
+    assert client.get('/api/groups/999/quiz').status_code == 404
+    assert client.get('/api/groups/1/quiz?n=0').status_code == 400
+    assert client.get('/api/groups/1/quiz?n=51').status_code == 400
+    assert client.get('/api/groups/1/quiz?choices=1').status_code == 400
@@ -0,0 +1,81 @@
+import sqlite3
+import threading
+import time
+import pytest
+
+from lib.reviews import SubmitTimeout
+
+def counters(app, word_id=1):
+    with app.db.write() as connection:
+        return tuple(connection.execute('''
+            SELECT correct_count, wrong_count FROM word_reviews WHERE word_id = ?
+        ''', (word_id,)).fetchone())
+
+def test_batch_appends_items_and_counters(app, client):
+    response = client.post('/study-sessions/1/reviews', json={'reviews': [
+        {'word_id': 1, 'correct': True},
+        {'word_id': 1, 'correct': False},
+        {'word_id': 1, 'correct': True},
+    ]})
+    assert response.status_code == 201
+    assert response.get_json() == {'study_session_id': 1, 'reviews_recorded': 3}
+    assert counters(app) == (3, 1)
+    stats = client.get('/dashboard/stats').get_json()
+    assert stats['total_words_studied'] == 1
+    assert stats['success_rate'] == 2 / 3
+
+def test_single_review(app, client):
+    response = client.post('/api/study_sessions/1/words/1/review', json={'correct': False})
+    assert response.status_code == 201
+    assert counters(app) == (1, 1)
+
+@pytest.mark.parametrize('url, body, status', [
+    ('/study-sessions/1/reviews', [], 400),
+    ('/study-sessions/1/reviews', [{'word_id': '1', 'correct': True}], 400),
+    ('/study-sessions/1/reviews', [{'word_id': 1, 'correct': 1}], 400),
+    ('/study-sessions/1/reviews', [{'word_id': 42, 'correct': True}], 400),
+    ('/study-sessions/99/reviews', [{'word_id': 1, 'correct': True}], 404),
+])
+def test_rejected_batches(app, client, url, body, status):
+    assert client.post(url, json=body).status_code == status
+    assert counters(app) == (1, 0)
+
+def test_concurrent_batches_share_a_commit(app):
+    with app.db.write() as connection:
+        connection.execute('''
+            CREATE TRIGGER fail_word_review AFTER INSERT ON word_review_items
+            WHEN NEW.study_session_id = 2 BEGIN SELECT RAISE(ABORT, 'rejected'); END
+        ''')
+    results = {}
+
+    def submit(thread):
+        try:
+            results[thread] = app.review_writer.submit(2 if thread == 0 else 1, [(1, True)] * 10)
+        except sqlite3.DatabaseError as e:
+            results[thread] = e
+
+    # Hold the writer so every submission queues up behind the first commit
+    app.db.acquire_writer()
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    app.db.release_writer()
+    for thread in threads:
+        thread.join()
+
+    # The failing batch is rolled back on its own
+    assert isinstance(results.pop(0), sqlite3.DatabaseError)
+    assert set(results.values()) == {10}
+    assert counters(app) == (71, 0)
+
+def test_timed_out_batch_is_withdrawn(app):
+    # The writer is busy past the timeout, so the batch is never written
+    app.db.acquire_writer()
+    try:
+        with pytest.raises(SubmitTimeout):
+            app.review_writer.submit(1, [(1, True)], timeout=0.05)
+    finally:
+        app.db.release_writer()
+    assert app.review_writer.submit(1, [(1, False)]) == 1
+    assert counters(app) == (1, 1)
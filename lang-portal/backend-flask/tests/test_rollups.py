@@ -0,0 +1,35 @@
+from lib.rollups import rebuild, verify
+
+def add_reviews(app, results, word_id=1, session_id=1):
+    with app.db.write() as connection:
+        connection.executemany('''
+            INSERT INTO word_review_items (word_id, study_session_id, correct) VALUES (?, ?, ?)
+        ''', [(word_id, session_id, correct) for correct in results])
+
+def test_stats_read_from_rollups(app, client):
+    add_reviews(app, [1, 1, 1, 1, 0, 1])
+    stats = client.get('/dashboard/stats').get_json()
+    assert stats == {
+        'total_vocabulary': 1,
+        'total_words_studied': 1,
+        'mastered_words': 1,
+        'success_rate': 5 / 6,
+        'total_sessions': 1,
+        'active_groups': 1,
+        'current_streak': 1,
+        'longest_streak': 1
+    }
+
+def test_word_falls_out_of_mastered(app, client):
+    add_reviews(app, [1, 1, 1, 1, 1, 0, 0])
+    assert client.get('/dashboard/stats').get_json()['mastered_words'] == 0
+
+def test_rebuild_repairs_drift(app):
+    add_reviews(app, [1, 0, 1])
+    with app.db.write() as connection:
+        assert verify(connection) == {}
+        connection.execute("UPDATE study_totals SET value = value + 3 WHERE name = 'reviews'")
+        connection.execute('DELETE FROM word_review_stats')
+        assert verify(connection) == {'word_review_stats': 1, 'study_totals': 2}
+        rebuild(connection)
+        assert verify(connection) == {}
@@ -0,0 +1,50 @@
+import json
+
+def add_words(app, words):
+    with app.db.write() as connection:
+        return [connection.execute('''
+            INSERT INTO words (english, arabic, root, transliteration, parts, parts_of_speech)
+            VALUES (?, ?, ?, '', ?, '')
+        ''', (english, arabic, root, json.dumps([]))).lastrowid for english, arabic, root in words]
+
+def family(client, root):
+    response = client.get(f'/api/roots/{root}/words')
+    assert response.status_code == 200
+    return [word['english'] for word in response.get_json()['words']]
+
+def test_root_family(app, client):
+    add_words(app, [('to write', 'كَتَبَ', 'ك ت ب'), ('book', 'كِتَاب', 'ك ت ب'), ('to eat', 'أَكَلَ', 'أ ك ل')])
+    assert family(client, 'ك ت ب') == ['to write', 'book']
+    assert family(client, 'كتب') == ['to write', 'book']
+    # Hamza variants fold like they do in search
+    assert family(client, 'ا ك ل') == ['to eat']
+    assert family(client, 'ق ر أ') == []
+
+def test_index_follows_updates(app, client):
+    write, book = add_words(app, [('to write', 'كَتَبَ', 'ك ت ب'), ('book', 'كِتَاب', 'ك ت ب')])
+    with app.db.write() as connection:
+        connection.execute("UPDATE words SET root = 'ق ر أ' WHERE id = ?", (book,))
+        connection.execute('DELETE FROM words WHERE id = ?', (write,))
+    assert family(client, 'ك ت ب') == []
+    assert family(client, 'ق ر أ') == ['book']
+
+def test_batch_lookup(app, client):
+    add_words(app, [('to write', 'كَتَبَ', 'ك ت ب'), ('to eat', 'أَكَلَ', 'أ ك ل')])
+    response = client.post('/api/roots/lookup', json={'roots': ['ك ت ب', 'خ ب ر', 'ق ر أ']})
+    assert response.status_code == 200
+    assert [(f['root'], [w['english'] for w in f['words']]) for f in response.get_json()['families']] == [
+        ('ك ت ب', ['to write']),
+        ('خ ب ر', ['test']),
+        ('ق ر أ', []),
+    ]
+
+def test_batch_lookup_validation(client):
+    assert client.post('/api/roots/lookup', json={'roots': 'ك ت ب'}).status_code == 400
+    assert client.post('/api/roots/lookup', json={'roots': ['ك'] * 101}).status_code == 400
+
+def test_batch_lookup_reads_from_the_pool(app, client, monkeypatch):
+    # A lookup writes nothing, so it must not take the writer a POST gets
+    def acquire_writer():
+        raise AssertionError('lookup took the writer')
+    monkeypatch.setattr(app.db, 'acquire_writer', acquire_writer)
+    assert client.post('/api/roots/lookup', json={'roots': ['خ ب ر']}).status_code == 200
@@ -0,0 +1,80 @@
+import json
+from lib.scheduler import NEW, review, replay
+
+def test_sm2_intervals():
+    first = review(NEW, True, '2025-01-01 10:00:00')
+    assert (first.repetitions, first.interval_days, first.due) == (1, 1.0, '2025-01-02 10:00:00')
+    # Correct answers before the word is due don't advance it
+    assert review(first, True, '2025-01-01 10:00:05')[:4] == first[:4]
+    second = review(first, True, '2025-01-02 12:00:00')
+    assert (second.repetitions, second.interval_days, second.due) == (2, 6.0, '2025-01-08 12:00:00')
+    third = review(second, True, '2025-01-08 12:00:00')
+    assert third.interval_days == 15.0
+
+    lapse = review(third, False, '2025-01-09 08:00:00')
+    assert (lapse.repetitions, lapse.due) == (0, '2025-01-09 08:10:00')
+    assert lapse.ease < third.ease
+
+def add_group_words(app, count):
+    with app.db.write() as connection:
+        ids = [connection.execute('''
+            INSERT INTO words (english, arabic, root, transliteration, parts, parts_of_speech)
+            VALUES (?, ?, '', '', ?, '')
+        ''', (f'word {i}', f'كلمة {i}', json.dumps([]))).lastrowid for i in range(count)]
+        connection.executemany('INSERT INTO word_groups (word_id, group_id) VALUES (?, 1)', [(i,) for i in ids])
+    return ids
+
+def test_ingestion_schedules_words(app, client):
+    client.post('/study-sessions/1/reviews', json=[{'word_id': 1, 'correct': True}])
+    with app.db.write() as connection:
+        schedule = connection.execute('SELECT repetitions, due FROM word_schedule WHERE word_id = 1').fetchone()
+        group_due = connection.execute('SELECT due FROM group_word_schedule WHERE word_id = 1').fetchone()[0]
+    assert schedule['repetitions'] == 1 and schedule['due'] == group_due
+
+def test_next_words_order(app, client):
+    overdue, fresh, later, also_overdue = add_group_words(app, 4)
+    with app.db.write() as connection:
+        connection.executemany('UPDATE word_schedule SET due = ? WHERE word_id = ?', [
+            ('2000-01-02 00:00:00', overdue),
+            ('2999-01-01 00:00:00', later),
+            ('2000-01-01 00:00:00', also_overdue),
+            ('2999-01-01 00:00:00', 1),
+        ])
+    words = client.get('/api/study_sessions/next_words?group_id=1&n=4').get_json()['words']
+    assert [(word['id'], word['status']) for word in words] == [
+        (also_overdue, 'due'), (overdue, 'due'), (fresh, 'new'), (1, 'upcoming')
+    ]
+    assert len(client.get('/api/study_sessions/next_words?n=2').get_json()['words']) == 2
+
+def test_next_words_validation(client):
+    assert client.get('/api/study_sessions/next_words?n=0').status_code == 400
+    assert client.get('/api/study_sessions/next_words?n=101').status_code == 400
+    assert client.get('/api/study_sessions/next_words?group_id=99').status_code == 404
+
+def test_replay_rebuilds_schedule(app):
+    with app.db.write() as connection:
+        connection.executemany('''
+            INSERT INTO word_review_items (word_id, study_session_id, correct, created_at) VALUES (1, 1, ?, ?)
+        ''', [(1, '2025-01-01 10:00:00'), (1, '2025-01-02 10:00:00'), (0, '2025-01-03T10:00:00')])
+        connection.execute('UPDATE word_schedule SET repetitions = 9')
+    with app.db.write() as connection:
+        assert replay(connection) == 3
+        row = connection.execute('SELECT repetitions, due FROM word_schedule WHERE word_id = 1').fetchone()
+        assert tuple(row) == (0, '2025-01-03 10:10:00')
+        assert connection.execute('SELECT due FROM group_word_schedule WHERE word_id = 1').fetchone()[0] == row['due']
+
+def test_replay_rebuilds_group_schedule(app):
+    unreviewed, missing = add_group_words(app, 2)
+    with app.db.write() as connection:
+        # A due time with no reviews behind it, and a membership whose
+        # group row went missing
+        connection.execute("UPDATE word_schedule SET due = '2000-01-01 00:00:00' WHERE word_id = ?", (unreviewed,))
+        connection.execute('DELETE FROM group_word_schedule WHERE word_id = ?', (missing,))
+        connection.execute('''
+            INSERT INTO word_review_items (word_id, study_session_id, correct, created_at)
+            VALUES (1, 1, 0, '2025-01-03 10:00:00')
+        ''')
+    with app.db.write() as connection:
+        replay(connection)
+        rows = connection.execute('SELECT word_id, due FROM group_word_schedule WHERE group_id = 1 ORDER BY word_id').fetchall()
+    assert [tuple(row) for row in rows] == [(1, '2025-01-03 10:10:00'), (unreviewed, None), (missing, None)]
@@ -0,0 +1,65 @@
+import json
+from lib.search import ARABIC_NORMALIZATION, normalize_arabic, match_query
+
+WORDS = [
+    ('to write', 'كَتَبَ', 'ك ت ب', 'kataba'),
+    ('to eat', 'أَكَلَ', 'أ ك ل', 'akala'),
+    ('writer', 'كَاتِب', 'ك ت ب', 'kaatib'),
+    ('library', 'مَكْتَبَة', 'ك ت ب', 'maktaba'),
+]
+
+def add_words(app, group_id=None):
+    with app.db.write() as connection:
+        ids = [connection.execute('''
+            INSERT INTO words (english, arabic, root, transliteration, parts, parts_of_speech)
+            VALUES (?, ?, ?, ?, ?, '')
+        ''', (*word, json.dumps([]))).lastrowid for word in WORDS]
+        if group_id is not None:
+            connection.execute('INSERT INTO word_groups (word_id, group_id) VALUES (?, ?)', (ids[2], group_id))
+    return ids
+
+def search(client, query):
+    response = client.get(f'/api/words/search?{query}')
+    assert response.status_code == 200, response.get_json()
+    return [word['english'] for word in response.get_json()['words']]
+
+def test_match_query():
+    assert match_query('to wri') == '"to" "wri"*'
+    assert match_query('NEAR(ك') == '"NEAR" "ك"*'
+    assert match_query('ك ت ب') == '"كتب"*'
+    assert match_query(' -- ') is None
+
+def test_view_matches_python_normalization(app):
+    text = 'x' + ''.join(ARABIC_NORMALIZATION) + 'x'
+    with app.db.write() as connection:
+        connection.execute('UPDATE words SET arabic = ? WHERE id = 1', (text,))
+        stored = connection.execute('SELECT arabic FROM words_search_source WHERE id = 1').fetchone()[0]
+    assert stored == normalize_arabic(text)
+
+def test_arabic_ignores_tashkeel_and_hamza(app, client):
+    add_words(app)
+    # Matches the word itself first, then the other words from its root
+    assert search(client, 'q=كتب')[0] == 'to write'
+    assert search(client, 'q=اكل') == ['to eat']
+    assert search(client, 'q=مكتبة') == ['library']
+
+def test_prefix_transliteration_and_root(app, client):
+    add_words(app)
+    assert sorted(search(client, 'q=wri')) == ['to write', 'writer']
+    assert search(client, 'q=kaat') == ['writer']
+    assert sorted(search(client, 'q=ك ت ب')) == ['library', 'to write', 'writer']
+
+def test_group_filter(app, client):
+    add_words(app, group_id=1)
+    assert search(client, 'q=wri&group_id=1') == ['writer']
+
+def test_index_follows_updates_and_deletes(app, client):
+    ids = add_words(app)
+    with app.db.write() as connection:
+        connection.execute("UPDATE words SET english = 'to scribble' WHERE id = ?", (ids[0],))
+        connection.execute('DELETE FROM words WHERE id = ?', (ids[2],))
+    assert search(client, 'q=wri') == []
+    assert search(client, 'q=scrib') == ['to scribble']
+
+def test_missing_query(client):
+    assert client.get('/api/words/search?q=').status_code == 400
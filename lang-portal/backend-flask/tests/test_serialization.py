@@ -0,0 +1,44 @@
+import json
+import pytest
+import lib.serialization
+from lib.serialization import raw_parts
+
+PAYLOAD = {
+    'parts': raw_parts('[{"letter":"كَ","transliteration":"ka"}]'),
+    'empty': raw_parts(''),
+    # Looks like a placeholder but can never carry the per-call nonce
+    'trap': '\x00deadbeefdeadbeef:0\x00',
+    'arabic': 'كتب',
+}
+
+EXPECTED = {
+    'parts': [{'letter': 'كَ', 'transliteration': 'ka'}],
+    'empty': {},
+    'trap': '\x00deadbeefdeadbeef:0\x00',
+    'arabic': 'كتب',
+}
+
+@pytest.fixture(params=['orjson', 'stdlib'])
+def encoder(request, monkeypatch):
+    if request.param == 'stdlib':
+        monkeypatch.setattr(lib.serialization, 'orjson', None)
+    return request.param
+
+def test_fragments_are_spliced(app, encoder):
+    with app.app_context():
+        assert json.loads(app.json.dumps(PAYLOAD)) == EXPECTED
+        assert json.loads(app.json.dumps(PAYLOAD, indent=2)) == EXPECTED
+        response = app.json.response(PAYLOAD)
+        assert response.mimetype == 'application/json'
+        assert json.loads(response.get_data()) == EXPECTED
+        # Arabic is written as UTF-8 rather than \u escapes
+        assert 'كتب' in response.get_data(as_text=True)
+
+def test_unknown_types_still_fail(app):
+    with app.app_context(), pytest.raises(TypeError):
+        app.json.dumps({'value': object()})
+
+def test_routes_pass_parts_through(client):
+    word = client.get('/api/words/1').get_json()
+    assert word['parts'] == {'verb': 'test', 'noun': 'test'}
+    assert client.get('/api/words').get_json()['words'][0]['parts'] == word['parts']
@@ -0,0 +1,46 @@
+from lib.rollups import verify
+
+def add_session(connection, timestamp):
+    return connection.execute('''
+        INSERT INTO study_sessions (word_id, group_id, activity_id, correct, timestamp)
+        VALUES (1, 1, 1, 1, ?)
+    ''', (timestamp,)).lastrowid
+
+def add_review(connection, session_id, created_at, correct=1):
+    connection.execute('''
+        INSERT INTO word_review_items (word_id, study_session_id, correct, created_at)
+        VALUES (1, ?, ?, ?)
+    ''', (session_id, correct, created_at))
+
+def test_summaries_follow_reviews(app, client):
+    with app.db.write() as connection:
+        busy = add_session(connection, '2025-01-01 10:00:00')
+        idle = add_session(connection, '2025-01-02 10:00:00')
+        add_review(connection, busy, '2025-01-01 10:05:00')
+        add_review(connection, busy, '2025-01-01 10:20:00', correct=0)
+
+    sessions = client.get('/groups/1/study_sessions?sort_by=reviewItemsCount').get_json()['study_sessions']
+    assert [(s['id'], s['end_time'], s['review_items_count']) for s in sessions[:2]] == [
+        (busy, '2025-01-01 10:20:00', 2),
+        (sessions[1]['id'], sessions[1]['end_time'], 0),
+    ]
+    by_id = {s['id']: s for s in sessions}
+    assert by_id[idle]['end_time'] == '2025-01-02 10:30:00'
+
+    listed = client.get('/study-sessions').get_json()['sessions']
+    assert {s['id']: s['correct_count'] for s in listed}[busy] == 1
+
+def test_deleting_reviews_recomputes_end_time(app):
+    with app.db.write() as connection:
+        session = add_session(connection, '2025-01-01 10:00:00')
+        add_review(connection, session, '2025-01-01 10:05:00')
+        add_review(connection, session, '2025-01-01 10:40:00')
+        connection.execute('DELETE FROM word_review_items WHERE created_at = ?', ('2025-01-01 10:40:00',))
+        assert tuple(connection.execute('''
+            SELECT end_time, review_count FROM study_session_summaries WHERE study_session_id = ?
+        ''', (session,)).fetchone()) == ('2025-01-01 10:05:00', 1)
+        connection.execute('DELETE FROM word_review_items WHERE study_session_id = ?', (session,))
+        assert connection.execute('''
+            SELECT end_time FROM study_session_summaries WHERE study_session_id = ?
+        ''', (session,)).fetchone()[0] == '2025-01-01 10:30:00'
+        assert verify(connection) == {}
@@ -0,0 +1,157 @@
+import os
+import sqlite3
+
+import pytest
+
+from lib.shards import LEARNER_HEADER, LearnerShards
+
+@pytest.fixture
+def shards(app, tmp_path):
+    app.db.shards = LearnerShards(app.config['DATABASE'], str(tmp_path), capacity=2)
+    return app.db.shards
+
+def start_session(shards, learner):
+    with shards.get(learner).write() as connection:
+        return connection.execute('''
+            INSERT INTO study_sessions (word_id, group_id, activity_id, correct) VALUES (1, 1, 1, 1)
+        ''').lastrowid
+
+def test_learner_shard_schema(shards):
+    with shards.get('amira').write() as connection:
+        main_tables = {row[0] for row in connection.execute("SELECT name FROM main.sqlite_master WHERE type = 'table'")}
+        # Vocabulary comes from the shared database
+        assert 'words' not in main_tables and 'study_sessions' in main_tables
+        assert connection.execute('SELECT english FROM words').fetchone()[0] == 'test'
+        assert connection.execute("SELECT count FROM row_counts WHERE table_name = 'words'").fetchone()[0] == 1
+        # Every shared word starts out new in the learner's schedule
+        assert [tuple(row) for row in connection.execute('SELECT group_id, word_id FROM group_word_schedule')] == [(1, 1)]
+
+def test_reviews_go_to_the_learners_shard(app, client, shards):
+    session_id = start_session(shards, 'amira')
+    response = client.post(f'/study-sessions/{session_id}/reviews', headers={LEARNER_HEADER: 'amira'},
+                           json=[{'word_id': 1, 'correct': True}, {'word_id': 1, 'correct': False}])
+    assert response.status_code == 201
+
+    word = client.get('/api/words/1', headers={LEARNER_HEADER: 'amira'}).get_json()
+    assert (word['correct_count'], word['wrong_count']) == (1, 1)
+    # The shared database and other learners are untouched
+    assert client.get('/api/words/1').get_json()['correct_count'] == 1
+    assert client.get('/api/words/1?learner_id=badr').get_json()['correct_count'] == 0
+    with app.db.write() as connection:
+        assert connection.execute('SELECT COUNT(*) FROM word_review_items').fetchone()[0] == 0
+
+    stats = client.get('/dashboard/stats', headers={LEARNER_HEADER: 'amira'}).get_json()
+    assert (stats['total_vocabulary'], stats['total_sessions'], stats['total_words_studied']) == (1, 1, 1)
+
+def test_shard_follows_vocabulary_changes(app, client, shards):
+    shards.get('amira')
+    with app.db.write() as connection:
+        word_id = connection.execute('''
+            INSERT INTO words (english, arabic, root, transliteration, parts, parts_of_speech)
+            VALUES ('new', 'جديد', 'ج د د', '', '[]', '')
+        ''').lastrowid
+        connection.execute('INSERT INTO word_groups (word_id, group_id) VALUES (?, 1)', (word_id,))
+        connection.execute('DELETE FROM word_groups WHERE word_id = 1')
+    words = client.get('/api/study_sessions/next_words?group_id=1', headers={LEARNER_HEADER: 'amira'}).get_json()['words']
+    assert [word['id'] for word in words] == [word_id]
+    with shards.get('amira').write() as connection:
+        assert connection.execute('SELECT COUNT(*) FROM word_schedule').fetchone()[0] == 2
+        assert [tuple(row) for row in connection.execute('SELECT group_id, word_id FROM group_word_schedule')] == [(1, word_id)]
+
+def test_merges_reach_learner_sessions(app, client, shards):
+    with app.db.write() as connection:
+        first, second = [connection.execute('INSERT INTO groups (name) VALUES (?)', (name,)).lastrowid
+                         for name in ('First', 'Second')]
+    with shards.get('amira').write() as connection:
+        connection.execute('INSERT INTO study_sessions (word_id, group_id, activity_id, correct) VALUES (1, ?, 1, 1)', (first,))
+    # The second merge carries the first one's sessions along
+    assert client.post(f'/groups/{first}/merge', json={'target_group_id': second}).status_code == 200
+    assert client.post(f'/groups/{second}/merge', json={'target_group_id': 1}).status_code == 200
+
+    sessions = client.get('/groups/1/study_sessions', headers={LEARNER_HEADER: 'amira'}).get_json()
+    assert len(sessions['study_sessions']) == 1 and sessions['total_pages'] == 1
+    with shards.get('amira').write() as connection:
+        assert [tuple(row) for row in connection.execute('SELECT DISTINCT group_id FROM study_sessions')] == [(1,)]
+        counts = connection.execute("SELECT group_id, count FROM row_counts WHERE table_name = 'study_sessions' AND group_id > 0")
+        assert {row['group_id']: row['count'] for row in counts} == {first: 0, 1: 1}
+
+def test_unknown_session_is_per_learner(client, shards):
+    start_session(shards, 'amira')
+    response = client.post('/study-sessions/1/reviews', headers={LEARNER_HEADER: 'badr'},
+                           json=[{'word_id': 1, 'correct': True}])
+    assert response.status_code == 404
+
+def test_least_recently_used_shards_are_closed(shards):
+    start_session(shards, 'amira')
+    shards.get('badr')
+    shards.get('amira')
+    shards.get('chen')
+    assert 'badr' not in shards._shards and shards.stats() == {'open': 2, 'opened': 3, 'evictions': 1}
+    assert os.path.exists(shards.path('badr'))
+
+    shards.get('amira').dispose()
+    shards._shards.pop('amira')
+    # Reopening reads the same file back
+    with shards.get('amira').write() as connection:
+        assert connection.execute('SELECT COUNT(*) FROM study_sessions').fetchone()[0] == 1
+
+def test_evicted_shard_closes_connections_on_release(shards):
+    session_id = start_session(shards, 'amira')
+    amira = shards.get('amira')
+    reader, writer = amira.acquire_reader(), amira.acquire_writer()
+    shards.get('badr')
+    shards.get('chen')
+    assert amira.closed
+    # Still usable by whoever holds them, closed once handed back
+    assert reader.execute('SELECT 1').fetchone()[0] == 1
+    amira.release_reader(reader)
+    amira.release_writer()
+    for connection in (reader, writer):
+        with pytest.raises(sqlite3.ProgrammingError):
+            connection.execute('SELECT 1')
+    assert amira._readers.empty() and amira._readers_open == 0 and amira._writer is None
+
+    # A review submitted late is written without starting a writer thread
+    assert amira.review_writer.submit(session_id, [(1, True)]) == 1
+    assert amira.review_writer._thread is None and amira._writer is None
+    with shards.get('amira').write() as connection:
+        assert connection.execute('SELECT COUNT(*) FROM word_review_items').fetchone()[0] == 1
+
+def test_request_routes_its_shard_once(app, tmp_path):
+    # One pooled reader: syncing again while the request holds it would
+    # wait for itself
+    app.db.shards = LearnerShards(app.config['DATABASE'], str(tmp_path), pool_size=1)
+    start_session(app.db.shards, 'amira')
+    with app.test_request_context('/api/words/1', headers={LEARNER_HEADER: 'amira'}):
+        connection = app.db.get()
+        assert app.db.cursor().connection is connection and app.db.get() is connection
+        app.db.close()
+
+    with app.test_request_context('/api/words', method='POST', headers={LEARNER_HEADER: 'amira'}):
+        app.db.cursor().execute('INSERT INTO study_sessions (word_id, group_id, activity_id, correct) VALUES (1, 1, 1, 1)')
+        with app.db.write() as shared:
+            shared.execute("INSERT INTO word_groups (word_id, group_id) VALUES (1, 2)")
+        # The vocabulary changed, but the request's transaction is not
+        # committed by a resync halfway through
+        app.db.cursor()
+        app.db.rollback()
+        app.db.close()
+    with app.db.shards.get('amira').write() as connection:
+        assert connection.execute('SELECT COUNT(*) FROM study_sessions').fetchone()[0] == 1
+
+def test_full_reset_removes_learner_shards(client, shards):
+    start_session(shards, 'amira')
+    assert os.path.exists(shards.path('amira'))
+    assert client.post('/api/full_reset').status_code == 200
+    assert not os.path.exists(shards.path('amira')) and shards.stats()['open'] == 0
+    # The learner starts again from an empty shard
+    stats = client.get('/dashboard/stats', headers={LEARNER_HEADER: 'amira'}).get_json()
+    assert stats['total_sessions'] == 0
+
+def test_malformed_learner_id(tmp_path):
+    from app import create_app
+    app = create_app({'TESTING': True, 'DATABASE': str(tmp_path / 'words.db'),
+                      'LEARNER_DB_DIR': str(tmp_path / 'learners'), 'CORS_ORIGINS': ['*']})
+    response = app.test_client().get('/api/words', headers={LEARNER_HEADER: '../words'})
+    assert response.status_code == 400
+    app.db.dispose()
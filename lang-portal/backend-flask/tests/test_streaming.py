@@ -0,0 +1,47 @@
+import gzip
+import json
+
+def add_group_words(app, count):
+    with app.db.write() as connection:
+        connection.executemany('''
+            INSERT INTO words (english, arabic, root, transliteration, parts, parts_of_speech)
+            VALUES (?, ?, '', '', ?, '')
+        ''', [(f'word {i}', f'كلمة {i}', json.dumps([{'letter': 'ك'}], ensure_ascii=False)) for i in range(count)])
+        connection.execute('''
+            INSERT INTO word_groups (word_id, group_id) SELECT id, 1 FROM words WHERE english LIKE 'word %'
+        ''')
+
+def test_raw_json_array(app, client):
+    add_group_words(app, 2000)
+    response = client.get('/groups/1/words/raw')
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'application/json'
+    words = json.loads(response.get_data())
+    assert len(words) == 2001
+    assert words[0] == {
+        'id': 1, 'english': 'test', 'arabic': 'اختبار', 'root': 'خ ب ر', 'transliteration': 'ikhtibaar',
+        'correct_count': 1, 'wrong_count': 0, 'parts': {'verb': 'test', 'noun': 'test'}
+    }
+    assert words[1]['parts'] == [{'letter': 'ك'}]
+
+def test_raw_ndjson(app, client):
+    add_group_words(app, 10)
+    response = client.get('/groups/1/words/raw', headers={'Accept': 'application/x-ndjson'})
+    assert response.mimetype == 'application/x-ndjson'
+    lines = response.get_data(as_text=True).splitlines()
+    assert [json.loads(line)['id'] for line in lines] == list(range(1, 12))
+    assert client.get('/groups/1/words/raw?format=ndjson').get_data() == response.get_data()
+
+def test_raw_gzip(app, client):
+    add_group_words(app, 100)
+    plain = client.get('/groups/1/words/raw').get_data()
+    response = client.get('/groups/1/words/raw', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.get_data()) == plain
+
+def test_raw_errors_release_the_reader(app, client):
+    assert client.get('/groups/99/words/raw').status_code == 404
+    assert client.get('/groups/1/words/raw?format=xml').status_code == 400
+    # Every reader went back to the pool
+    assert app.db._readers.qsize() == app.db._readers_open
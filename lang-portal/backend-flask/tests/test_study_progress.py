@@ -0,0 +1,61 @@
+from lib.rollups import rebuild, verify
+
+def add_sessions(app, *days_ago):
+    with app.db.write() as connection:
+        return [connection.execute('''
+            INSERT INTO study_sessions (word_id, group_id, activity_id, correct, timestamp)
+            VALUES (1, 1, 1, 1, datetime('now', ?))
+        ''', (f'-{days} days',)).lastrowid for days in days_ago]
+
+def streaks(client):
+    stats = client.get('/dashboard/stats').get_json()
+    return stats['current_streak'], stats['longest_streak']
+
+def test_streaks_follow_the_calendar(app, client):
+    # The fixture's session is today
+    add_sessions(app, 9, 8, 7, 5, 4, 2, 1)
+    assert streaks(client) == (3, 3)
+
+    # Filling a gap joins the runs on either side
+    filler, = add_sessions(app, 3)
+    assert streaks(client) == (6, 6)
+    add_sessions(app, 6)
+    assert streaks(client) == (10, 10)
+
+    # Losing a day's only session splits the run again
+    with app.db.write() as connection:
+        connection.execute('DELETE FROM study_sessions WHERE id = ?', (filler,))
+        assert verify(connection) == {}
+    assert streaks(client) == (3, 6)
+
+def test_streak_survives_rebuild(app, client):
+    add_sessions(app, 1, 2, 2, 4)
+    with app.db.write() as connection:
+        connection.execute('UPDATE daily_activity SET streak = 0')
+        assert verify(connection) == {'daily_activity': 8}
+        rebuild(connection)
+        assert verify(connection) == {}
+    assert streaks(client) == (3, 3)
+
+def test_current_streak_needs_today_or_yesterday(app, client):
+    with app.db.write() as connection:
+        connection.execute('DELETE FROM study_sessions')
+    add_sessions(app, 2, 3)
+    assert streaks(client) == (0, 2)
+
+def test_study_progress(app, client):
+    add_sessions(app, 1, 400)
+    with app.db.write() as connection:
+        connection.execute('''
+            INSERT INTO word_review_items (word_id, study_session_id, correct) VALUES (1, 1, 1), (1, 1, 0)
+        ''')
+    progress = client.get('/api/dashboard/study_progress').get_json()
+    assert progress['total_words_studied'] == 1 and progress['total_available_words'] == 1
+    assert (progress['current_streak'], progress['longest_streak']) == (2, 2)
+    # The session 400 days ago is outside the year
+    assert [(day['sessions'], day['reviews'], day['correct']) for day in progress['days']] == [(1, 0, 0), (1, 2, 1)]
+    assert progress['days'][-1]['date'] == progress['to']
+
+    assert len(client.get('/api/dashboard/study_progress?days=1').get_json()['days']) == 1
+    assert client.get('/api/dashboard/study_progress?days=0').status_code == 400
+    assert client.get('/api/dashboard/study_progress?days=367').status_code == 400
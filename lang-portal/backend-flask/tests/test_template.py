@@ -0,0 +1,62 @@
+import os
+import shutil
+import sqlite3
+
+from lib.db import Db
+from lib.template import SEED_DIR, ensure_template, fingerprint
+
+def test_full_reset_restores_the_template(app, client):
+    with app.db.write() as connection:
+        connection.execute("INSERT INTO groups (name) VALUES ('Scratch')")
+        connection.execute('INSERT INTO study_sessions (word_id, group_id, activity_id, correct) VALUES (1, 1, 1, 0)')
+    client.post('/study-sessions/1/reviews', json=[{'word_id': 1, 'correct': False}])
+    assert client.get('/api/words/1').get_json()['wrong_count'] == 1
+    with app.db.write() as connection:
+        assert [row[0] for row in connection.execute('SELECT name FROM groups ORDER BY id')] == ['Test Group', 'Scratch']
+        assert connection.execute('SELECT COUNT(*) FROM study_sessions').fetchone()[0] == 2
+
+    response = client.post('/api/full_reset')
+    assert response.status_code == 200
+    assert response.get_json() == {'success': True, 'message': 'System has been fully reset'}
+
+    # Served fresh, not from the response cache
+    word = client.get('/api/words/1').get_json()
+    assert (word['correct_count'], word['wrong_count']) == (1, 0)
+    with app.db.write() as connection:
+        assert [row[0] for row in connection.execute('SELECT name FROM groups')] == ['Test Group']
+        assert connection.execute('SELECT COUNT(*) FROM study_sessions').fetchone()[0] == 1
+        assert connection.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+def test_template_is_built_once_per_fingerprint(tmp_path):
+    path = ensure_template(str(tmp_path))
+    assert os.path.basename(path) == f'words-{fingerprint()}.db'
+    built = os.path.getmtime(path)
+    assert ensure_template(str(tmp_path)) == path and os.path.getmtime(path) == built
+    assert os.listdir(tmp_path) == [os.path.basename(path)]
+
+    connection = sqlite3.connect(path)
+    try:
+        groups = [row[0] for row in connection.execute('SELECT name FROM groups ORDER BY name')]
+        assert groups == ['Core Adjectives', 'Core Verbs']
+        assert connection.execute('SELECT COUNT(*) FROM study_activities').fetchone()[0] > 0
+    finally:
+        connection.close()
+
+def test_fingerprint_follows_the_seed_data(tmp_path):
+    seed_dir = tmp_path / 'seed'
+    shutil.copytree(SEED_DIR, seed_dir)
+    assert fingerprint(str(seed_dir)) == fingerprint()
+    with open(seed_dir / 'study_activities.json', 'a', encoding='utf-8') as file:
+        file.write('\n ')
+    assert fingerprint(str(seed_dir)) != fingerprint()
+
+def test_init_replaces_the_database(template, tmp_path):
+    db = Db(str(tmp_path / 'words.db'))
+    with db.write() as connection:
+        connection.execute('CREATE TABLE leftover (id INTEGER)')
+    db.init(template)
+    with db.write() as connection:
+        tables = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert 'leftover' not in tables and 'words' in tables
+        assert connection.execute('SELECT english FROM words').fetchone()[0] == 'test'
+    db.dispose()
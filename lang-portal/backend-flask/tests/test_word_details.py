@@ -0,0 +1,70 @@
+import pytest
+
+def add_words(app, count):
+    with app.db.write() as connection:
+        return [connection.execute('''
+            INSERT INTO words (english, arabic, root, transliteration, parts, parts_of_speech)
+            VALUES (?, ?, '', '', '{}', '{}')
+        ''', (f'word {i}', f'كلمة {i}')).lastrowid for i in range(count)]
+
+def test_multi_get_keeps_the_requested_order(app, client):
+    second, third = add_words(app, 2)
+    response = client.get(f'/api/words?ids={third},1,999,{second},1')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert [word['id'] for word in data['words']] == [third, 1, second]
+    assert data['missing'] == [999]
+    assert data['words'][1] == client.get('/api/words/1').get_json()
+
+def test_include_groups_and_reviews(app, client):
+    (other,) = add_words(app, 1)
+    client.post('/study-sessions/1/reviews', json=[{'word_id': 1, 'correct': True}, {'word_id': 1, 'correct': False}])
+
+    words = client.get(f'/api/words?ids=1,{other}&include=groups,reviews').get_json()['words']
+    assert words[0]['groups'] == [{'id': 1, 'name': 'Test Group'}]
+    assert [review['correct'] for review in words[0]['reviews']] == [False, True]  # newest first
+    assert words[0]['reviews'][0]['study_session_id'] == 1
+    assert (words[1]['groups'], words[1]['reviews']) == ([], [])
+
+    word = client.get('/api/words/1?include=groups').get_json()
+    assert word['groups'] == [{'id': 1, 'name': 'Test Group'}] and 'reviews' not in word
+    page = client.get('/api/words?include=reviews').get_json()['words']
+    assert {word['id']: len(word['reviews']) for word in page} == {1: 2, other: 0}
+
+def test_include_groups_follows_membership(app, client):
+    assert [group['id'] for group in client.get('/api/words/1?include=groups').get_json()['groups']] == [1]
+    with app.db.write() as connection:
+        connection.execute('DELETE FROM word_groups WHERE word_id = 1')
+    assert client.get('/api/words/1?include=groups').get_json()['groups'] == []
+    assert client.get('/api/words?include=groups').get_json()['words'][0]['groups'] == []
+
+def test_include_reviews_follows_the_review_log(app, client):
+    assert client.get('/api/words/1?include=reviews').get_json()['reviews'] == []
+    assert client.get('/api/words?include=reviews').get_json()['words'][0]['reviews'] == []
+    # Straight into the log, leaving word_reviews as it was
+    with app.db.write() as connection:
+        connection.execute('INSERT INTO word_review_items (word_id, study_session_id, correct) VALUES (1, 1, 1)')
+    assert len(client.get('/api/words/1?include=reviews').get_json()['reviews']) == 1
+    assert len(client.get('/api/words?include=reviews').get_json()['words'][0]['reviews']) == 1
+
+def test_statement_count_does_not_grow_with_ids(app, client, monkeypatch):
+    ids = [1] + add_words(app, 40)
+    client.get('/api/words/1')  # opens the pooled connection, loads table versions
+    counts = []
+    observe = app.metrics.observe
+    monkeypatch.setattr(app.metrics, 'observe', lambda *args: counts.append(args[-1].statements) or observe(*args))
+
+    for count in (1, 40):
+        url = f'/api/words?ids={",".join(map(str, ids[:count]))}&include=groups,reviews'
+        assert client.get(url).status_code == 200
+    assert counts[0] == counts[1]
+
+@pytest.mark.parametrize('url', [
+    '/api/words?ids=1,x',
+    '/api/words?ids=',
+    '/api/words?ids=' + ','.join(map(str, range(1, 502))),
+    '/api/words?include=history',
+    '/api/words/1?include=groups,history',
+])
+def test_rejected_requests(client, url):
+    assert client.get(url).status_code == 400